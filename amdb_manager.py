@@ -6,6 +6,10 @@ AmDb 桌面版数据库管理器启动脚本
 """
 
 import sys
+
+# 启动脚本不写入字节码缓存，避免在项目根目录生成__pycache__并减少冷启动开销
+sys.dont_write_bytecode = True
+
 import os
 
 # 添加项目路径
@@ -15,11 +19,12 @@ sys.path.insert(0, project_root)
 # 设置PYTHONPATH
 os.environ['PYTHONPATH'] = project_root
 
-from src.amdb.gui_manager import DatabaseManagerGUI
-import tkinter as tk
-
 def main():
     """启动GUI管理器"""
+    # 延迟导入GUI相关模块，只在真正启动界面时加载
+    import tkinter as tk
+    from src.amdb.gui_manager import DatabaseManagerGUI
+    
     root = tk.Tk()
     app = DatabaseManagerGUI(root)
     root.mainloop()
@@ -23,28 +23,33 @@ print()
 
 # 检查数据目录
 data_dirs = ['./data/sample_db', './data/test_show_commands', './data/perf_large_seq']
+
+def probe(d):
+    """打开数据目录并试读一条记录，返回要输出的行（多个目录并行探测，按顺序输出）"""
+    if not os.path.exists(d):
+        return [f"  - {d}: 不存在"]
+    try:
+        from src.amdb import Database
+        db = Database(data_dir=d)
+        keys = db.version_manager.get_all_keys()
+        lines = [f"  ✓ {d}: {len(keys)} 条记录"]
+        if len(keys) > 0:
+            # 测试读取
+            value = db.get(keys[0])
+            key_str = keys[0].decode('utf-8', errors='ignore')[:30]
+            value_str = str(value)[:30]
+            lines.append(f"    测试读取: {key_str} = {value_str}")
+        return lines
+    except Exception as e:
+        import traceback
+        return [f"  ✗ {d}: 错误 - {e}", traceback.format_exc()]
+
 print("检查数据目录:")
-for d in data_dirs:
-    if os.path.exists(d):
-        try:
-            from src.amdb import Database
-            db = Database(data_dir=d)
-            import time
-            time.sleep(0.2)
-            keys = db.version_manager.get_all_keys()
-            print(f"  ✓ {d}: {len(keys)} 条记录")
-            if len(keys) > 0:
-                # 测试读取
-                value = db.get(keys[0])
-                key_str = keys[0].decode('utf-8', errors='ignore')[:30]
-                value_str = str(value)[:30]
-                print(f"    测试读取: {key_str} = {value_str}")
-        except Exception as e:
-            print(f"  ✗ {d}: 错误 - {e}")
-            import traceback
-            traceback.print_exc()
-    else:
-        print(f"  - {d}: 不存在")
+from concurrent.futures import ThreadPoolExecutor
+with ThreadPoolExecutor(max_workers=len(data_dirs)) as executor:
+    for lines in executor.map(probe, data_dirs):
+        for line in lines:
+            print(line)
 
 print()
 print("启动GUI...")
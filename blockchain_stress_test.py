@@ -10,7 +10,12 @@ from pathlib import Path
 import time
 import hashlib
 import json
+import struct
 import random
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 # 添加项目根目录到路径
 project_root = Path(__file__).parent
@@ -18,10 +23,62 @@ sys.path.insert(0, str(project_root))
 
 from src.amdb import Database
 
-def generate_block_hash(block_data: dict) -> str:
-    """生成区块哈希"""
-    block_str = json.dumps(block_data, sort_keys=True)
-    return hashlib.sha256(block_str.encode()).hexdigest()
+try:
+    import orjson
+
+    def dumps(data: dict) -> bytes:
+        """序列化为UTF-8字节（orjson直接返回bytes，无需再encode）"""
+        return orjson.dumps(data)
+except ImportError:
+    def dumps(data: dict) -> bytes:
+        """序列化为UTF-8字节（未安装orjson时回退到标准库json）"""
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+# 交易的定长二进制规范格式（用于哈希）：tx_id, from, to, amount, fee, timestamp
+# 字符串字段按16字节补零（tx_000000_000 / account_00000 均为13字节）
+TX_STRUCT = struct.Struct('>16s16s16sIII')
+
+def tx_canonical_bytes(tx: dict) -> bytes:
+    """交易的规范字节表示（定长struct打包，不经过JSON或字符串拼接）"""
+    return TX_STRUCT.pack(tx["tx_id"].encode(), tx["from"].encode(), tx["to"].encode(),
+                          tx["amount"], tx["fee"], tx["timestamp"])
+
+def compute_merkle_root(transactions: list) -> str:
+    """计算Merkle根（简化版）：拼接原始32字节摘要后一次哈希，而不是拼接十六进制串"""
+    tx_digests = [hashlib.sha256(tx_canonical_bytes(tx)).digest() for tx in transactions]
+    return hashlib.sha256(b''.join(tx_digests)).hexdigest()
+
+def generate_block_hash(header: dict) -> str:
+    """生成区块哈希：只哈希区块头（交易已由merkle_root承诺），输入大小与交易数无关"""
+    return hashlib.sha256(
+        f"{header['block_number']}|{header['timestamp']}|{header['previous_hash']}|"
+        f"{header['merkle_root']}|{header['nonce']}|{header['difficulty']}".encode()
+    ).hexdigest()
+
+def generate_block_transactions(batch_start: int, batch_end: int, num_accounts: int,
+                                tx_per_block: int, seed: int, base_time: int) -> list:
+    """生成一批区块的交易和Merkle根
+    
+    这部分不依赖前一区块的哈希，可以在子进程中并行执行；
+    返回 [(transactions, merkle_root), ...]，顺序与区块号一致。
+    """
+    randint = random.Random(seed).randint  # 绑定为局部变量，避免热循环中的属性查找
+    account_ids = [f"account_{i:05d}" for i in range(num_accounts)]
+    results = []
+    for i in range(batch_start, batch_end):
+        transactions = []
+        for j in range(tx_per_block):
+            tx = {
+                "tx_id": f"tx_{i:06d}_{j:03d}",
+                "from": account_ids[randint(0, num_accounts-1)],
+                "to": account_ids[randint(0, num_accounts-1)],
+                "amount": randint(1, 1000),
+                "fee": randint(1, 10),
+                "timestamp": base_time + i * tx_per_block + j
+            }
+            transactions.append(tx)
+        results.append((transactions, compute_merkle_root(transactions)))
+    return results
 
 def blockchain_stress_test():
     """区块链数据库压力测试"""
@@ -43,9 +100,9 @@ def blockchain_stress_test():
     
     # 创建数据库
     print("1. 初始化数据库...")
-    start_time = time.time()
+    t0 = time.perf_counter_ns()
     db = Database(data_dir=db_path, enable_sharding=True, shard_count=8)
-    init_time = time.time() - start_time
+    init_time = (time.perf_counter_ns() - t0) / 1e9
     print(f"   ✓ 数据库初始化完成 (耗时: {init_time:.3f}秒)")
     print()
     
@@ -53,6 +110,8 @@ def blockchain_stress_test():
     num_blocks = 1000  # 区块数量
     tx_per_block = 10  # 每个区块的交易数
     num_accounts = 100  # 账户数量
+    base_time = int(time.time())  # 所有时间戳以此为基准偏移，避免在循环中反复取时间
+    rnd = random.Random(42)  # 固定种子的独立随机数生成器，保证压测数据可复现
     
     print("2. 写入测试数据...")
     print(f"   区块数: {num_blocks}")
@@ -61,25 +120,29 @@ def blockchain_stress_test():
     print(f"   预计总记录数: {num_blocks + num_blocks * tx_per_block + num_accounts}")
     print()
     
+    # 预先生成账户ID和键（避免在读写循环中反复格式化和编码）
+    account_ids = [f"account_{i:05d}" for i in range(num_accounts)]
+    account_keys = [f"account:{account_id}".encode() for account_id in account_ids]
+    block_keys = [f"block:{i:010d}".encode() for i in range(num_blocks)]
+    
     # 写入账户
     print("   2.1 写入账户状态...")
-    start_time = time.time()
+    t0 = time.perf_counter_ns()
     account_items = []
     for i in range(num_accounts):
-        account_id = f"account_{i:05d}"
+        account_id = account_ids[i]
         account_data = {
             "account_id": account_id,
-            "balance": random.randint(1000, 100000),
+            "balance": rnd.randint(1000, 100000),
             "nonce": 0,
-            "created_at": int(time.time())
+            "created_at": base_time
         }
-        account_key = f"account:{account_id}".encode()
-        account_value = json.dumps(account_data, ensure_ascii=False).encode('utf-8')
-        account_items.append((account_key, account_value))
+        account_value = dumps(account_data)
+        account_items.append((account_keys[i], account_value))
     
     # 批量写入账户
     success, _ = db.batch_put(account_items)
-    account_write_time = time.time() - start_time
+    account_write_time = (time.perf_counter_ns() - t0) / 1e9
     if success:
         print(f"      ✓ 写入 {num_accounts} 个账户 (耗时: {account_write_time:.3f}秒, 速度: {num_accounts/account_write_time:.0f} 记录/秒)")
     else:
@@ -89,86 +152,112 @@ def blockchain_stress_test():
     
     # 写入区块和交易
     print("   2.2 写入区块和交易...")
-    start_time = time.time()
+    t0 = time.perf_counter_ns()
     previous_hash = "0" * 64
     total_tx = 0
     batch_size = 100  # 每批写入100个区块
+    progress_interval = 10  # 每10批刷新一次进度
+    
+    # 后台写入线程：主线程构建下一批数据的同时，上一批在后台调用batch_put
+    write_queue = queue.Queue(maxsize=2)
+    failed_batches = []
     
-    for batch_start in range(0, num_blocks, batch_size):
-        batch_end = min(batch_start + batch_size, num_blocks)
-        batch_items = []
+    def batch_writer():
+        while True:
+            job = write_queue.get()
+            if job is None:
+                break
+            job_start, job_end, job_items = job
+            ok, _ = db.batch_put(job_items)
+            if not ok:
+                failed_batches.append((job_start, job_end))
+    
+    writer = threading.Thread(target=batch_writer, daemon=True)
+    writer.start()
+    
+    # 交易生成和Merkle根计算在多进程中并行执行，主进程按顺序串联区块哈希并写入
+    batch_starts = list(range(0, num_blocks, batch_size))
+    batch_ends = [min(batch_start + batch_size, num_blocks) for batch_start in batch_starts]
+    seeds = [rnd.getrandbits(32) for _ in batch_starts]
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        batch_results = executor.map(generate_block_transactions, batch_starts, batch_ends,
+                                     repeat(num_accounts), repeat(tx_per_block), seeds,
+                                     repeat(base_time))
         
-        for i in range(batch_start, batch_end):
-            # 生成交易
-            transactions = []
-            for j in range(tx_per_block):
-                tx = {
-                    "tx_id": f"tx_{i:06d}_{j:03d}",
-                    "from": f"account_{random.randint(0, num_accounts-1):05d}",
-                    "to": f"account_{random.randint(0, num_accounts-1):05d}",
-                    "amount": random.randint(1, 1000),
-                    "fee": random.randint(1, 10),
-                    "timestamp": int(time.time()) + i * tx_per_block + j
-                }
-                transactions.append(tx)
+        for batch_num, (batch_start, batch_end, block_txs) in enumerate(
+                zip(batch_starts, batch_ends, batch_results), 1):
+            batch_items = []
             
-            # 计算Merkle根
-            tx_hashes = [hashlib.sha256(json.dumps(tx, sort_keys=True).encode()).hexdigest() for tx in transactions]
-            merkle_root_hash = hashlib.sha256(''.join(tx_hashes).encode()).hexdigest()
-            
-            # 创建区块
-            block = {
-                "block_number": i,
-                "timestamp": int(time.time()) + i,
-                "previous_hash": previous_hash,
-                "merkle_root": merkle_root_hash,
-                "transactions": transactions,
-                "nonce": i * 1000,
-                "difficulty": 2
-            }
-            block["hash"] = generate_block_hash(block)
-            
-            # 添加区块到批量列表
-            block_key = f"block:{block['block_number']:010d}".encode()
-            block_value = json.dumps(block, ensure_ascii=False).encode('utf-8')
-            batch_items.append((block_key, block_value))
-            
-            # 添加交易索引到批量列表
-            for tx in transactions:
-                tx_key = f"tx:{tx['tx_id']}".encode()
-                tx_index = {
-                    "tx_id": tx['tx_id'],
+            for i, (transactions, merkle_root_hash) in enumerate(block_txs, batch_start):
+                # 创建区块
+                block = {
                     "block_number": i,
-                    "block_hash": block['hash'],
-                    "index_in_block": transactions.index(tx)
+                    "timestamp": base_time + i,
+                    "previous_hash": previous_hash,
+                    "merkle_root": merkle_root_hash,
+                    "transactions": transactions,
+                    "nonce": i * 1000,
+                    "difficulty": 2
                 }
-                tx_value = json.dumps(tx_index, ensure_ascii=False).encode('utf-8')
-                batch_items.append((tx_key, tx_value))
-                total_tx += 1
+                block_hash = generate_block_hash(block)
+                block["hash"] = block_hash
+                
+                # 添加区块到批量列表
+                block_value = dumps(block)
+                batch_items.append((block_keys[i], block_value))
+                
+                # 添加交易索引到批量列表
+                for idx, tx in enumerate(transactions):
+                    tx_key = f"tx:{tx['tx_id']}".encode()
+                    tx_index = {
+                        "tx_id": tx['tx_id'],
+                        "block_number": i,
+                        "block_hash": block_hash,
+                        "index_in_block": idx
+                    }
+                    tx_value = dumps(tx_index)
+                    batch_items.append((tx_key, tx_value))
+                    total_tx += 1
+                
+                previous_hash = block_hash
             
-            previous_hash = block["hash"]
-        
-        # 批量写入
-        success, _ = db.batch_put(batch_items)
-        if not success:
-            print(f"      ✗ 批量写入失败 (区块 {batch_start}-{batch_end-1})")
-            return
-        
-        # 显示进度
-        progress = (batch_end / num_blocks) * 100
-        print(f"      进度: {progress:.1f}% ({batch_end}/{num_blocks} 区块, {total_tx} 交易)")
+            # 提交给后台线程批量写入
+            if failed_batches:
+                break
+            write_queue.put((batch_start, batch_end, batch_items))
+            
+            # 显示进度（原地刷新，每10批才写一次stdout，避免打印开销干扰吞吐测量）
+            if batch_num % progress_interval == 0 or batch_end == num_blocks:
+                progress = (batch_end / num_blocks) * 100
+                sys.stdout.write(f"\r      进度: {progress:.1f}% ({batch_end}/{num_blocks} 区块, {total_tx} 交易)")
+                sys.stdout.flush()
+    
+    sys.stdout.write("\n")
+    write_queue.put(None)
+    writer.join()
+    if failed_batches:
+        failed_start, failed_end = failed_batches[0]
+        print(f"      ✗ 批量写入失败 (区块 {failed_start}-{failed_end-1})")
+        return
     
-    block_write_time = time.time() - start_time
+    block_write_time = (time.perf_counter_ns() - t0) / 1e9
     total_records = num_blocks + total_tx
     print(f"      ✓ 写入 {num_blocks} 个区块和 {total_tx} 个交易索引 (耗时: {block_write_time:.3f}秒, 速度: {total_records/block_write_time:.0f} 记录/秒)")
     print()
     
     # 刷新到磁盘
-    print("   2.3 刷新数据到磁盘...")
-    start_time = time.time()
-    db.flush(async_mode=False)
-    flush_time = time.time() - start_time
-    print(f"      ✓ 数据已刷新到磁盘 (耗时: {flush_time:.3f}秒)")
+    # 刷新在后台线程中同步执行，与3.1~3.3的读取测试（命中内存）重叠，3.4之前等待完成
+    print("   2.3 刷新数据到磁盘（后台进行）...")
+    flush_times = []
+    
+    def background_flush():
+        flush_t0 = time.perf_counter_ns()
+        db.flush(async_mode=False)
+        flush_times.append((time.perf_counter_ns() - flush_t0) / 1e9)
+    
+    flush_thread = threading.Thread(target=background_flush, daemon=True)
+    flush_thread.start()
+    print("      ✓ 已启动后台刷新")
     print()
     
     # 读取性能测试
@@ -176,53 +265,50 @@ def blockchain_stress_test():
     
     # 3.1 随机读取区块
     print("   3.1 随机读取区块 (1000次)...")
-    start_time = time.time()
+    # 预先批量抽样待读取的键，RNG开销不计入读取耗时
+    random_block_keys = rnd.choices(block_keys, k=1000)
+    t0 = time.perf_counter_ns()
     read_count = 0
-    for _ in range(1000):
-        block_num = random.randint(0, num_blocks - 1)
-        block_key = f"block:{block_num:010d}".encode()
+    for block_key in random_block_keys:
         value = db.get(block_key)
         if value:
             read_count += 1
-    random_read_time = time.time() - start_time
+    random_read_time = (time.perf_counter_ns() - t0) / 1e9
     print(f"      ✓ 随机读取完成 (成功: {read_count}/1000, 耗时: {random_read_time:.3f}秒, 速度: {1000/random_read_time:.0f} 次/秒)")
     print()
     
     # 3.2 顺序读取区块
     print("   3.2 顺序读取区块 (100个)...")
-    start_time = time.time()
+    t0 = time.perf_counter_ns()
     read_count = 0
     for i in range(100):
-        block_key = f"block:{i:010d}".encode()
-        value = db.get(block_key)
+        value = db.get(block_keys[i])
         if value:
             read_count += 1
-    sequential_read_time = time.time() - start_time
+    sequential_read_time = (time.perf_counter_ns() - t0) / 1e9
     print(f"      ✓ 顺序读取完成 (成功: {read_count}/100, 耗时: {sequential_read_time:.3f}秒, 速度: {100/sequential_read_time:.0f} 次/秒)")
     print()
     
     # 3.3 读取账户
     print("   3.3 随机读取账户 (1000次)...")
-    start_time = time.time()
+    random_account_keys = rnd.choices(account_keys, k=1000)
+    t0 = time.perf_counter_ns()
     read_count = 0
-    for _ in range(1000):
-        account_id = f"account_{random.randint(0, num_accounts-1):05d}"
-        account_key = f"account:{account_id}".encode()
+    for account_key in random_account_keys:
         value = db.get(account_key)
         if value:
             read_count += 1
-    account_read_time = time.time() - start_time
+    account_read_time = (time.perf_counter_ns() - t0) / 1e9
     print(f"      ✓ 账户读取完成 (成功: {read_count}/1000, 耗时: {account_read_time:.3f}秒, 速度: {1000/account_read_time:.0f} 次/秒)")
     print()
     
     # 3.4 范围查询
     print("   3.4 范围查询区块 (block:0000000000 到 block:0000000100)...")
-    start_time = time.time()
-    all_keys = db.version_manager.get_all_keys()
-    matching_keys = [k for k in all_keys if k.startswith(b'block:')]
-    matching_keys.sort()
-    range_keys = [k for k in matching_keys if b'block:0000000000' <= k <= b'block:0000000100']
-    range_query_time = time.time() - start_time
+    flush_thread.join()
+    print(f"      ✓ 后台刷新已完成 (耗时: {flush_times[0]:.3f}秒)")
+    t0 = time.perf_counter_ns()
+    range_keys = [key for key, _ in db.range_scan(b'block:0000000000', b'block:0000000100')]
+    range_query_time = (time.perf_counter_ns() - t0) / 1e9
     print(f"      ✓ 范围查询完成 (找到 {len(range_keys)} 个区块, 耗时: {range_query_time:.3f}秒)")
     print()
     
@@ -97,8 +97,8 @@ exe = EXE(
     name='amdb-cli',
     debug=False,
     bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
+    strip={platform_name != 'win'},
+    upx=False,
     upx_exclude=[],
     runtime_tmpdir=None,
     console=True,
@@ -181,20 +181,17 @@ a = Analysis(
 
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
 
+# onedir布局：依赖展开在 dist/amdb-manager/ 目录中，启动时无需每次解压到临时目录
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.zipfiles,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='amdb-manager',
     debug=False,
     bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    strip={platform_name != 'win'},
+    upx=False,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -203,6 +200,17 @@ exe = EXE(
     entitlements_file=None,
     icon=None,
 )
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.zipfiles,
+    a.datas,
+    strip={platform_name != 'win'},
+    upx=False,
+    upx_exclude=[],
+    name='amdb-manager',
+)
 """
     
     with open(spec_file, 'w', encoding='utf-8') as f:
@@ -216,7 +224,7 @@ exe = EXE(
             '--noconfirm',
             spec_file
         ])
-        print(f"✓ GUI打包完成: dist/amdb-manager.{ext}")
+        print("✓ GUI打包完成: dist/amdb-manager/")
         return True
     except subprocess.CalledProcessError as e:
         print(f"✗ GUI打包失败: {e}")
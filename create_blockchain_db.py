@@ -17,10 +17,24 @@ import hashlib
 import time
 import json
 
-def generate_block_hash(block_data: dict) -> str:
-    """生成区块哈希"""
-    block_str = json.dumps(block_data, sort_keys=True)
-    return hashlib.sha256(block_str.encode()).hexdigest()
+# 交易规范字段顺序（用于哈希，避免每笔交易都经过JSON编码器）
+TX_FIELDS = ("tx_id", "from", "to", "amount", "fee", "timestamp", "type")
+
+def tx_canonical_bytes(tx: dict) -> bytes:
+    """按固定字段顺序拼接交易的规范字节表示"""
+    return "|".join([str(tx.get(field, "")) for field in TX_FIELDS]).encode()
+
+def compute_merkle_root(transactions: list) -> str:
+    """计算Merkle根（简化版）：拼接原始32字节摘要后一次哈希，而不是拼接十六进制串"""
+    tx_digests = [hashlib.sha256(tx_canonical_bytes(tx)).digest() for tx in transactions]
+    return hashlib.sha256(b''.join(tx_digests)).hexdigest()
+
+def generate_block_hash(header: dict) -> str:
+    """生成区块哈希：只哈希区块头（交易已由merkle_root承诺），输入大小与交易数无关"""
+    return hashlib.sha256(
+        f"{header['block_number']}|{header['timestamp']}|{header['previous_hash']}|"
+        f"{header['merkle_root']}|{header['nonce']}|{header['difficulty']}".encode()
+    ).hexdigest()
 
 def create_blockchain_database():
     """创建区块链数据库并写入区块数据"""
@@ -40,11 +54,14 @@ def create_blockchain_database():
     print("   ✓ 数据库初始化完成")
     print()
     
+    # 所有时间戳以此为基准偏移，避免在循环中反复取时间
+    base_time = int(time.time())
+    
     # 创建创世区块
     print("2. 创建创世区块...")
     genesis_block = {
         "block_number": 0,
-        "timestamp": int(time.time()),
+        "timestamp": base_time,
         "previous_hash": "0" * 64,
         "merkle_root": "0" * 64,
         "transactions": [
@@ -81,55 +98,59 @@ def create_blockchain_database():
     num_blocks = 10
     previous_hash = genesis_block["hash"]
     
+    # 预先生成账户ID和区块键（避免在循环中反复格式化和编码）
+    account_ids = [f"account_{i:03d}" for i in range(10)]
+    block_keys = [f"block:{i:010d}".encode() for i in range(num_blocks + 1)]
+    written_blocks = []  # 已写入的区块（供交易索引直接使用，无需再从数据库读回）
+    
     for i in range(1, num_blocks + 1):
         # 生成一些交易
         transactions = []
         for j in range(5):  # 每个区块5笔交易
             tx = {
                 "tx_id": f"tx_{i:05d}_{j:03d}",
-                "from": f"account_{j % 10:03d}",
-                "to": f"account_{(j + 1) % 10:03d}",
+                "from": account_ids[j % 10],
+                "to": account_ids[(j + 1) % 10],
                 "amount": (j + 1) * 100,
                 "fee": 1,
-                "timestamp": int(time.time()) + j
+                "timestamp": base_time + j
             }
             transactions.append(tx)
         
         # 计算Merkle根（简化版）
-        tx_hashes = [hashlib.sha256(json.dumps(tx, sort_keys=True).encode()).hexdigest() for tx in transactions]
-        merkle_root_hash = hashlib.sha256(''.join(tx_hashes).encode()).hexdigest()
+        merkle_root_hash = compute_merkle_root(transactions)
         
         # 创建区块
         block = {
             "block_number": i,
-            "timestamp": int(time.time()) + i,
+            "timestamp": base_time + i,
             "previous_hash": previous_hash,
             "merkle_root": merkle_root_hash,
             "transactions": transactions,
             "nonce": i * 1000,
             "difficulty": 2
         }
-        block["hash"] = generate_block_hash(block)
+        block_hash = generate_block_hash(block)
+        block["hash"] = block_hash
         
         # 写入区块
-        block_key = f"block:{block['block_number']:010d}".encode()
         block_value = json.dumps(block, ensure_ascii=False).encode('utf-8')
-        success, merkle_root = db.put(block_key, block_value)
+        success, merkle_root = db.put(block_keys[i], block_value)
         
         if success:
-            print(f"   ✓ 区块 {i} 写入成功 (哈希: {block['hash'][:16]}...)")
+            written_blocks.append(block)
+            print(f"   ✓ 区块 {i} 写入成功 (哈希: {block_hash[:16]}...)")
         else:
             print(f"   ✗ 区块 {i} 写入失败")
         
-        previous_hash = block["hash"]
+        previous_hash = block_hash
     
     print()
     
     # 写入账户状态
     print("4. 写入账户状态...")
     accounts = {}
-    for i in range(10):
-        account_id = f"account_{i:03d}"
+    for i, account_id in enumerate(account_ids):
         account_data = {
             "account_id": account_id,
             "balance": 10000 + i * 1000,
@@ -148,23 +169,19 @@ def create_blockchain_database():
     # 写入交易索引
     print("5. 写入交易索引...")
     tx_count = 0
-    for i in range(1, num_blocks + 1):
-        block_key = f"block:{i:010d}".encode()
-        block_data = db.get(block_key)
-        if block_data:
-            block = json.loads(block_data.decode('utf-8'))
-            for tx in block.get('transactions', []):
-                tx_key = f"tx:{tx['tx_id']}".encode()
-                tx_index = {
-                    "tx_id": tx['tx_id'],
-                    "block_number": i,
-                    "block_hash": block['hash'],
-                    "index_in_block": block['transactions'].index(tx)
-                }
-                tx_value = json.dumps(tx_index, ensure_ascii=False).encode('utf-8')
-                success, _ = db.put(tx_key, tx_value)
-                if success:
-                    tx_count += 1
+    for block in written_blocks:
+        for idx, tx in enumerate(block['transactions']):
+            tx_key = f"tx:{tx['tx_id']}".encode()
+            tx_index = {
+                "tx_id": tx['tx_id'],
+                "block_number": block['block_number'],
+                "block_hash": block['hash'],
+                "index_in_block": idx
+            }
+            tx_value = json.dumps(tx_index, ensure_ascii=False).encode('utf-8')
+            success, _ = db.put(tx_key, tx_value)
+            if success:
+                tx_count += 1
     
     print(f"   ✓ 写入 {tx_count} 个交易索引")
     print()
@@ -8,13 +8,87 @@
 import sys
 import os
 import time
-import json
+import io
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
 from pathlib import Path
 
 # 添加项目路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.amdb import Database
+from testdata import dumps, fast_rmtree, iter_chunks
+
+USERS = [
+    {"name": "张三", "email": "zhangsan@example.com", "role": "admin", "balance": 1000.50},
+    {"name": "李四", "email": "lisi@example.com", "role": "user", "balance": 2500.75},
+    {"name": "王五", "email": "wangwu@example.com", "role": "user", "balance": 500.00},
+    {"name": "赵六", "email": "zhaoliu@example.com", "role": "vip", "balance": 3000.25},
+    {"name": "钱七", "email": "qianqi@example.com", "role": "user", "balance": 1500.00},
+]
+
+CONTRACTS = [
+    {"name": "TokenContract", "address": "0x1234...", "balance": 1000000, "type": "ERC20"},
+    {"name": "NFTContract", "address": "0x5678...", "balance": 500000, "type": "ERC721"},
+    {"name": "DeFiContract", "address": "0x9abc...", "balance": 2000000, "type": "DeFi"},
+    {"name": "GameContract", "address": "0xdef0...", "balance": 300000, "type": "Game"},
+]
+
+def build_user(i: int, now: float) -> dict:
+    """用户数据库：存储用户信息"""
+    return USERS[i - 1]
+
+def build_transaction(i: int, now: float) -> dict:
+    """交易数据库：存储交易记录"""
+    return {
+        "from": f"user_{(i % 5) + 1:03d}",
+        "to": f"user_{((i + 1) % 5) + 1:03d}",
+        "amount": round(10.0 + (i * 0.5), 2),
+        "timestamp": now - (50 - i) * 60,
+        "status": "completed" if i % 10 != 0 else "pending",
+        "type": "transfer"
+    }
+
+def build_block(i: int, now: float) -> dict:
+    """区块数据库：存储区块数据"""
+    return {
+        "block_number": i,
+        "previous_hash": f"hash_{i-1:06d}" if i > 1 else "0" * 64,
+        "merkle_root": f"merkle_{i:06d}",
+        "timestamp": now - (30 - i) * 300,
+        "transaction_count": 5,
+        "miner": f"miner_{i % 3 + 1}",
+        "difficulty": 1000 + i * 10
+    }
+
+def build_contract(i: int, now: float) -> dict:
+    """智能合约数据库：存储智能合约"""
+    return CONTRACTS[i - 1]
+
+def build_log(i: int, now: float) -> dict:
+    """日志数据库：存储系统日志"""
+    return {
+        "level": ["INFO", "WARNING", "ERROR"][i % 3],
+        "message": f"系统日志消息 {i}",
+        "timestamp": now - (100 - i) * 10,
+        "module": f"module_{i % 5 + 1}",
+        "user_id": f"user_{(i % 5) + 1:03d}"
+    }
+
+# 各数据库的数据模式：键前缀、键格式、记录数、每批写入数量、记录构造函数(序号, 当前时间)、输出单位
+SCHEMAS = {
+    "用户数据库": {"prefix": "user", "key_fmt": "user_{:03d}", "count": len(USERS),
+                 "batch_size": len(USERS), "builder": build_user, "unit": "个用户"},
+    "交易数据库": {"prefix": "transaction", "key_fmt": "tx_{:06d}", "count": 50,
+                 "batch_size": 20, "builder": build_transaction, "unit": "笔交易"},
+    "区块数据库": {"prefix": "block", "key_fmt": "block_{:06d}", "count": 30,
+                 "batch_size": 30, "builder": build_block, "unit": "个区块"},
+    "智能合约数据库": {"prefix": "contract", "key_fmt": "contract_{:03d}", "count": len(CONTRACTS),
+                    "batch_size": len(CONTRACTS), "builder": build_contract, "unit": "个智能合约"},
+    "日志数据库": {"prefix": "log", "key_fmt": "log_{:06d}", "count": 100,
+                 "batch_size": 25, "builder": build_log, "unit": "条日志"},
+}
 
 def create_database(name: str, data_dir: str, description: str):
     """创建单个数据库并写入示例数据"""
@@ -26,109 +100,27 @@ def create_database(name: str, data_dir: str, description: str):
     
     # 清理旧数据（如果存在）
     if os.path.exists(data_dir):
-        import shutil
-        shutil.rmtree(data_dir)
+        fast_rmtree(data_dir)
         print('✓ 已清理旧数据')
     
     # 创建数据库实例
     db = Database(data_dir=data_dir, config_path='./amdb.ini')
     print('✓ 数据库初始化成功')
     
-    # 根据数据库类型写入不同的示例数据
-    if name == "用户数据库":
-        # 用户数据库：存储用户信息
-        users = [
-            ("user_001", {"name": "张三", "email": "zhangsan@example.com", "role": "admin", "balance": 1000.50}),
-            ("user_002", {"name": "李四", "email": "lisi@example.com", "role": "user", "balance": 2500.75}),
-            ("user_003", {"name": "王五", "email": "wangwu@example.com", "role": "user", "balance": 500.00}),
-            ("user_004", {"name": "赵六", "email": "zhaoliu@example.com", "role": "vip", "balance": 3000.25}),
-            ("user_005", {"name": "钱七", "email": "qianqi@example.com", "role": "user", "balance": 1500.00}),
-        ]
-        items = [(f"user:{user_id}".encode(), json.dumps(user_data, ensure_ascii=False).encode()) 
-                 for user_id, user_data in users]
-        db.batch_put(items)
-        print(f'✓ 写入 {len(users)} 个用户')
+    # 根据数据库类型写入不同的示例数据（统一的生成与序列化流程）
+    schema = SCHEMAS.get(name)
+    if schema:
+        prefix = schema["prefix"]
+        key_fmt = schema["key_fmt"]
+        builder = schema["builder"]
+        now = time.time()  # 同一批记录共用一个时间基准
+        items = ((f"{prefix}:{key_fmt.format(i)}".encode(), dumps(builder(i, now)))
+                 for i in range(1, schema["count"] + 1))
         
-    elif name == "交易数据库":
-        # 交易数据库：存储交易记录
-        transactions = []
-        for i in range(1, 51):  # 50笔交易
-            tx_id = f"tx_{i:06d}"
-            tx_data = {
-                "from": f"user_{(i % 5) + 1:03d}",
-                "to": f"user_{((i + 1) % 5) + 1:03d}",
-                "amount": round(10.0 + (i * 0.5), 2),
-                "timestamp": time.time() - (50 - i) * 60,
-                "status": "completed" if i % 10 != 0 else "pending",
-                "type": "transfer"
-            }
-            key = f"transaction:{tx_id}".encode()
-            value = json.dumps(tx_data, ensure_ascii=False).encode()
-            transactions.append((key, value))
-        
-        # 分批写入
-        batch_size = 20
-        for i in range(0, len(transactions), batch_size):
-            batch = transactions[i:i+batch_size]
+        # 分批写入（按批从生成器中取出，不一次性构造全部记录）
+        for batch in iter_chunks(items, schema["batch_size"]):
             db.batch_put(batch)
-        print(f'✓ 写入 {len(transactions)} 笔交易')
-        
-    elif name == "区块数据库":
-        # 区块数据库：存储区块数据
-        blocks = []
-        for i in range(1, 31):  # 30个区块
-            block_id = f"block_{i:06d}"
-            block_data = {
-                "block_number": i,
-                "previous_hash": f"hash_{i-1:06d}" if i > 1 else "0" * 64,
-                "merkle_root": f"merkle_{i:06d}",
-                "timestamp": time.time() - (30 - i) * 300,
-                "transaction_count": 5,
-                "miner": f"miner_{i % 3 + 1}",
-                "difficulty": 1000 + i * 10
-            }
-            key = f"block:{block_id}".encode()
-            value = json.dumps(block_data, ensure_ascii=False).encode()
-            blocks.append((key, value))
-        
-        db.batch_put(blocks)
-        print(f'✓ 写入 {len(blocks)} 个区块')
-        
-    elif name == "智能合约数据库":
-        # 智能合约数据库：存储智能合约
-        contracts = [
-            ("contract_001", {"name": "TokenContract", "address": "0x1234...", "balance": 1000000, "type": "ERC20"}),
-            ("contract_002", {"name": "NFTContract", "address": "0x5678...", "balance": 500000, "type": "ERC721"}),
-            ("contract_003", {"name": "DeFiContract", "address": "0x9abc...", "balance": 2000000, "type": "DeFi"}),
-            ("contract_004", {"name": "GameContract", "address": "0xdef0...", "balance": 300000, "type": "Game"}),
-        ]
-        items = [(f"contract:{contract_id}".encode(), json.dumps(contract_data, ensure_ascii=False).encode()) 
-                 for contract_id, contract_data in contracts]
-        db.batch_put(items)
-        print(f'✓ 写入 {len(contracts)} 个智能合约')
-        
-    elif name == "日志数据库":
-        # 日志数据库：存储系统日志
-        logs = []
-        for i in range(1, 101):  # 100条日志
-            log_id = f"log_{i:06d}"
-            log_data = {
-                "level": ["INFO", "WARNING", "ERROR"][i % 3],
-                "message": f"系统日志消息 {i}",
-                "timestamp": time.time() - (100 - i) * 10,
-                "module": f"module_{i % 5 + 1}",
-                "user_id": f"user_{(i % 5) + 1:03d}"
-            }
-            key = f"log:{log_id}".encode()
-            value = json.dumps(log_data, ensure_ascii=False).encode()
-            logs.append((key, value))
-        
-        # 分批写入
-        batch_size = 25
-        for i in range(0, len(logs), batch_size):
-            batch = logs[i:i+batch_size]
-            db.batch_put(batch)
-        print(f'✓ 写入 {len(logs)} 条日志')
+        print(f'✓ 写入 {schema["count"]} {schema["unit"]}')
     
     # 获取统计信息
     stats = db.get_stats()
@@ -137,6 +129,18 @@ def create_database(name: str, data_dir: str, description: str):
     
     return db
 
+def _create_database_worker(db_info: dict) -> tuple:
+    """在子进程中创建数据库，捕获输出交给父进程打印（避免多个进程的输出交错）"""
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            db = create_database(db_info["name"], db_info["data_dir"], db_info["description"])
+            # 子进程结束后数据库对象随之销毁，退出前同步刷新到磁盘（整个导入只刷新这一次）
+            db.flush(async_mode=False, force_sync=True)
+        return db_info, buf.getvalue(), None
+    except Exception as e:
+        return db_info, buf.getvalue(), f'{type(e).__name__}: {e}\n{traceback.format_exc()}'
+
 def main():
     """创建多个数据库"""
     print('=' * 80)
@@ -174,18 +178,20 @@ def main():
     
     created_dbs = []
     
-    for db_info in databases:
-        try:
-            db = create_database(
-                db_info["name"],
-                db_info["data_dir"],
-                db_info["description"]
-            )
-            created_dbs.append(db_info)
-        except Exception as e:
-            print(f'✗ 创建失败: {type(e).__name__}: {e}')
-            import traceback
-            traceback.print_exc()
+    # 各数据库位于互不相交的目录、没有共享状态，使用多进程并行创建
+    max_workers = min(len(databases), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_create_database_worker, db_info) for db_info in databases]
+        for future in as_completed(futures):
+            db_info, output, error = future.result()
+            print(output, end='')
+            if error:
+                print(f'✗ 创建失败: {error}')
+            else:
+                created_dbs.append(db_info)
+    
+    # 总结按定义顺序输出
+    created_dbs.sort(key=databases.index)
     
     # 总结
     print()
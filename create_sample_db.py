@@ -8,13 +8,13 @@
 import sys
 import os
 import time
-import json
 from pathlib import Path
 
 # 添加项目路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.amdb import Database
+from testdata import dumps, fast_rmtree, iter_chunks, write_batches
 
 def create_sample_database():
     """创建示例数据库并写入演示数据"""
@@ -25,8 +25,7 @@ def create_sample_database():
     
     # 清理旧数据（如果存在）
     if os.path.exists(sample_dir):
-        import shutil
-        shutil.rmtree(sample_dir)
+        fast_rmtree(sample_dir)
         print('✓ 已清理旧数据')
     
     # 创建数据库实例
@@ -39,6 +38,9 @@ def create_sample_database():
     print('=' * 80)
     print()
     
+    # 所有时间戳以同一个"当前时间"为基准偏移
+    now = time.time()
+    
     # 1. 写入用户数据
     print('1. 写入用户数据...')
     users = [
@@ -49,11 +51,7 @@ def create_sample_database():
         ("user_005", {"name": "钱七", "email": "qianqi@example.com", "balance": 1500.00}),
     ]
     
-    user_items = []
-    for user_id, user_data in users:
-        key = f"user:{user_id}".encode()
-        value = json.dumps(user_data, ensure_ascii=False).encode()
-        user_items.append((key, value))
+    user_items = [(f"user:{user_id}".encode(), dumps(user_data)) for user_id, user_data in users]
     
     success, _ = db.batch_put(user_items)
     if success:
@@ -64,49 +62,48 @@ def create_sample_database():
     # 2. 写入交易数据
     print()
     print('2. 写入交易数据...')
-    transactions = []
-    for i in range(1, 101):  # 100笔交易
-        tx_id = f"tx_{i:06d}"
-        tx_data = {
-            "from": f"user_{(i % 5) + 1:03d}",
-            "to": f"user_{((i + 1) % 5) + 1:03d}",
-            "amount": round(10.0 + (i * 0.5), 2),
-            "timestamp": time.time() - (100 - i) * 60,  # 模拟时间序列
-            "status": "completed" if i % 10 != 0 else "pending"
-        }
-        key = f"transaction:{tx_id}".encode()
-        value = json.dumps(tx_data, ensure_ascii=False).encode()
-        transactions.append((key, value))
+    num_transactions = 100
+    
+    def gen_transactions():
+        """流式生成交易记录"""
+        for i in range(1, num_transactions + 1):
+            tx_id = f"tx_{i:06d}"
+            tx_data = {
+                "from": f"user_{(i % 5) + 1:03d}",
+                "to": f"user_{((i + 1) % 5) + 1:03d}",
+                "amount": round(10.0 + (i * 0.5), 2),
+                "timestamp": now - (100 - i) * 60,  # 模拟时间序列
+                "status": "completed" if i % 10 != 0 else "pending"
+            }
+            yield (f"transaction:{tx_id}".encode(), dumps(tx_data))
     
     # 分批写入交易
     batch_size = 20
-    for i in range(0, len(transactions), batch_size):
-        batch = transactions[i:i+batch_size]
-        success, _ = db.batch_put(batch)
-        if success:
-            print(f'  ✓ 写入交易 {i+1}-{min(i+batch_size, len(transactions))}/{len(transactions)}')
+    write_batches(db, gen_transactions(), batch_size, '交易', num_transactions)
     
     # 3. 写入区块数据
     print()
     print('3. 写入区块数据...')
-    blocks = []
-    for i in range(1, 21):  # 20个区块
-        block_id = f"block_{i:06d}"
-        block_data = {
-            "block_number": i,
-            "previous_hash": f"hash_{i-1:06d}" if i > 1 else "0" * 64,
-            "merkle_root": f"merkle_{i:06d}",
-            "timestamp": time.time() - (20 - i) * 300,  # 每5分钟一个区块
-            "transaction_count": 5,
-            "miner": f"miner_{i % 3 + 1}"
-        }
-        key = f"block:{block_id}".encode()
-        value = json.dumps(block_data, ensure_ascii=False).encode()
-        blocks.append((key, value))
-    
-    success, _ = db.batch_put(blocks)
-    if success:
-        print(f'  ✓ 写入 {len(blocks)} 个区块')
+    num_blocks = 20
+    
+    def gen_blocks():
+        """流式生成区块记录"""
+        for i in range(1, num_blocks + 1):
+            block_id = f"block_{i:06d}"
+            block_data = {
+                "block_number": i,
+                "previous_hash": f"hash_{i-1:06d}" if i > 1 else "0" * 64,
+                "merkle_root": f"merkle_{i:06d}",
+                "timestamp": now - (20 - i) * 300,  # 每5分钟一个区块
+                "transaction_count": 5,
+                "miner": f"miner_{i % 3 + 1}"
+            }
+            yield (f"block:{block_id}".encode(), dumps(block_data))
+    
+    for batch in iter_chunks(gen_blocks(), num_blocks):
+        success, _ = db.batch_put(batch)
+        if success:
+            print(f'  ✓ 写入 {len(batch)} 个区块')
     
     # 4. 写入智能合约数据
     print()
@@ -117,11 +114,8 @@ def create_sample_database():
         ("contract_003", {"name": "DeFiContract", "address": "0x9abc...", "balance": 2000000}),
     ]
     
-    contract_items = []
-    for contract_id, contract_data in contracts:
-        key = f"contract:{contract_id}".encode()
-        value = json.dumps(contract_data, ensure_ascii=False).encode()
-        contract_items.append((key, value))
+    contract_items = [(f"contract:{contract_id}".encode(), dumps(contract_data))
+                      for contract_id, contract_data in contracts]
     
     success, _ = db.batch_put(contract_items)
     if success:
@@ -136,16 +130,16 @@ def create_sample_database():
         ("config:security", {"enable_auth": False, "enable_encryption": False}),
     ]
     
-    config_items = []
-    for config_key, config_data in configs:
-        key = f"{config_key}".encode()
-        value = json.dumps(config_data, ensure_ascii=False).encode()
-        config_items.append((key, value))
+    config_items = [(config_key.encode(), dumps(config_data)) for config_key, config_data in configs]
     
     success, _ = db.batch_put(config_items)
     if success:
         print(f'  ✓ 写入 {len(configs)} 个配置项')
     
+    # 所有批量写入完成后统一同步刷新一次（写入阶段不逐批落盘）
+    db.flush(async_mode=False, force_sync=True)
+    print('  ✓ 数据已刷新到磁盘')
+    
     # 获取统计信息
     print()
     print('=' * 80)
@@ -167,11 +161,11 @@ def create_sample_database():
     print()
     print('数据概览:')
     print(f'  - 用户数据: {len(users)} 条')
-    print(f'  - 交易数据: {len(transactions)} 条')
-    print(f'  - 区块数据: {len(blocks)} 条')
+    print(f'  - 交易数据: {num_transactions} 条')
+    print(f'  - 区块数据: {num_blocks} 条')
     print(f'  - 智能合约: {len(contracts)} 条')
     print(f'  - 配置数据: {len(configs)} 条')
-    print(f'  - 总计: {len(users) + len(transactions) + len(blocks) + len(contracts) + len(configs)} 条')
+    print(f'  - 总计: {len(users) + num_transactions + num_blocks + len(contracts) + len(configs)} 条')
     print()
     print('可以使用以下方式访问:')
     print('  1. GUI管理器: python amdb_manager.py')
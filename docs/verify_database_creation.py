@@ -7,13 +7,13 @@
 import sys
 from pathlib import Path
 import os
-import shutil
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.amdb import Database
+from testdata import fast_rmtree
 
 def verify_database_creation(data_dir: str):
     """验证数据库创建"""
@@ -23,7 +23,7 @@ def verify_database_creation(data_dir: str):
     
     # 清理旧数据
     if os.path.exists(data_dir):
-        shutil.rmtree(data_dir)
+        fast_rmtree(data_dir)
         print(f"✓ 已清理旧数据: {data_dir}")
     
     # 步骤1: 导入测试
@@ -128,7 +128,7 @@ if __name__ == '__main__':
     
     # 清理
     if os.path.exists(test_dir):
-        shutil.rmtree(test_dir)
+        fast_rmtree(test_dir)
     
     if not success:
         print("\n✗ 验证失败，请检查上述错误信息")
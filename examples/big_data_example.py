@@ -4,6 +4,7 @@
 """
 
 from src.amdb import Database
+from concurrent.futures import ThreadPoolExecutor
 import time
 import random
 
@@ -25,15 +26,23 @@ def simulate_large_dataset():
     
     batch_size = 10000
     total_records = 10000000
+    suffix_range = range(1000, 10000)  # 与 randint(1000, 9999) 相同的取值范围
     
+    # 生成与写入流水线：后台线程执行上一批的batch_put时，主线程构造下一批
+    # （batch_put内部已按批拆分并用线程池并行写入，这里只需让数据生成不再阻塞写入）
+    writer = ThreadPoolExecutor(max_workers=1)
+    pending = None
     for batch_start in range(0, total_records, batch_size):
-        items = []
-        for i in range(batch_start, min(batch_start + batch_size, total_records)):
-            key = f"user_{i:08d}".encode()
-            value = f"data_{i}_{random.randint(1000, 9999)}".encode()
-            items.append((key, value))
+        # 按列构造键和值：bytes的%格式化在C层完成，不再为每条记录生成中间str再encode
+        ids = range(batch_start, min(batch_start + batch_size, total_records))
+        keys = [b"user_%08d" % i for i in ids]
+        # 随机后缀整批一次生成（random.choices单次调用，免去每条记录一次randint的Python层开销）
+        suffixes = random.choices(suffix_range, k=len(ids))
+        values = [b"data_%d_%d" % pair for pair in zip(ids, suffixes)]
         
-        db.batch_put(items)
+        if pending is not None:
+            pending.result()
+        pending = writer.submit(db.batch_put, list(zip(keys, values)))
         
         if (batch_start + batch_size) % 100000 == 0:
             elapsed = time.time() - start_time
@@ -42,6 +51,10 @@ def simulate_large_dataset():
                   f"耗时: {elapsed:.2f}秒, "
                   f"速度: {(batch_start + batch_size) / elapsed:.0f} 条/秒")
     
+    if pending is not None:
+        pending.result()
+    writer.shutdown()
+    
     elapsed = time.time() - start_time
     print(f"   完成！总耗时: {elapsed:.2f}秒")
     print(f"   平均速度: {total_records / elapsed:.0f} 条/秒\n")
@@ -68,7 +81,7 @@ def simulate_large_dataset():
     start_time = time.time()
     
     for _ in range(read_count):
-        random_key = f"user_{random.randint(0, total_records-1):08d}".encode()
+        random_key = b"user_%08d" % random.randint(0, total_records-1)
         value = db.get(random_key)
     
     elapsed = time.time() - start_time
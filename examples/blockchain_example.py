@@ -7,6 +7,44 @@ from src.amdb import Database
 import time
 
 
+def encode_balance(balance: int) -> bytes:
+    """余额编码为固定8字节小端无符号整数（省去十进制字符串转换）"""
+    return balance.to_bytes(8, 'little')
+
+
+def decode_balance(value: bytes) -> int:
+    """从固定8字节小端编码解码余额"""
+    return int.from_bytes(value, 'little')
+
+
+def get_balance(db, balances: dict, account: bytes) -> int:
+    """读取余额：优先使用内存中的写穿透缓存，未命中时从数据库读取并回填"""
+    balance = balances.get(account)
+    if balance is None:
+        balance = decode_balance(db.get(account))
+        balances[account] = balance
+    return balance
+
+
+def transfer(db, balances: dict, from_account: bytes, to_account: bytes, amount: int) -> bool:
+    """转账：扣款和入账放在同一个事务中提交，两笔写入一起生效，不会出现只扣款未入账的中间状态。
+    提交成功后同步更新余额缓存，后续转账不必再从数据库读回刚写入的余额"""
+    balance_from = get_balance(db, balances, from_account) - amount
+    balance_to = get_balance(db, balances, to_account) + amount
+    
+    tx = db.begin_transaction()
+    tx.read(from_account)
+    tx.read(to_account)
+    tx.put(from_account, encode_balance(balance_from))
+    tx.put(to_account, encode_balance(balance_to))
+    # 示例结束时统一flush，提交时不逐笔触发
+    if not db.commit_transaction(tx, auto_flush=False):
+        return False
+    balances[from_account] = balance_from
+    balances[to_account] = balance_to
+    return True
+
+
 def simulate_blockchain_transactions():
     """模拟区块链交易"""
     db = Database(data_dir="./data/blockchain")
@@ -16,9 +54,9 @@ def simulate_blockchain_transactions():
     # 初始化账户
     print("1. 初始化账户余额...")
     accounts = {
-        b"account:0x1111": b"1000",
-        b"account:0x2222": b"2000",
-        b"account:0x3333": b"3000",
+        b"account:0x1111": encode_balance(1000),
+        b"account:0x2222": encode_balance(2000),
+        b"account:0x3333": encode_balance(3000),
     }
     
     # 批量初始化
@@ -26,31 +64,26 @@ def simulate_blockchain_transactions():
     success, root_hash = db.batch_put(items)
     print(f"   初始化完成，Merkle根: {root_hash.hex()[:16]}...")
     
+    # 余额缓存（写穿透）：与数据库中的值保持一致
+    balances = {account: decode_balance(value) for account, value in accounts.items()}
+    
     # 模拟交易
     print("\n2. 模拟交易...")
     
     # 交易1: 0x1111 转账 100 给 0x2222
     print("   交易1: 0x1111 -> 0x2222 (100)")
-    balance1 = int(db.get(b"account:0x1111").decode())
-    balance2 = int(db.get(b"account:0x2222").decode())
-    
-    db.put(b"account:0x1111", str(balance1 - 100).encode())
-    db.put(b"account:0x2222", str(balance2 + 100).encode())
+    transfer(db, balances, b"account:0x1111", b"account:0x2222", 100)
     
     # 交易2: 0x2222 转账 50 给 0x3333
     print("   交易2: 0x2222 -> 0x3333 (50)")
-    balance2 = int(db.get(b"account:0x2222").decode())
-    balance3 = int(db.get(b"account:0x3333").decode())
-    
-    db.put(b"account:0x2222", str(balance2 - 50).encode())
-    db.put(b"account:0x3333", str(balance3 + 50).encode())
+    transfer(db, balances, b"account:0x2222", b"account:0x3333", 50)
     
     # 获取当前状态
     print("\n3. 当前账户余额:")
     for account in accounts.keys():
         balance = db.get(account)
         version = db.version_manager.get_current_version(account)
-        print(f"   {account.decode()}: {balance.decode()} (版本: {version})")
+        print(f"   {account.decode()}: {decode_balance(balance)} (版本: {version})")
     
     # 获取Merkle根（用于区块头）
     root_hash = db.get_root_hash()
@@ -62,7 +95,7 @@ def simulate_blockchain_transactions():
     if len(history1) >= 2:
         prev_version = history1[0]['version']
         prev_balance = db.get(b"account:0x1111", version=prev_version)
-        print(f"   账户0x1111在版本{prev_version}的余额: {prev_balance.decode()}")
+        print(f"   账户0x1111在版本{prev_version}的余额: {decode_balance(prev_balance)}")
     
     # 验证数据完整性
     print("\n6. 验证数据完整性...")
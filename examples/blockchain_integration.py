@@ -20,6 +20,47 @@ import hashlib
 import time
 from typing import Dict, List, Optional
 
+try:
+    import orjson
+
+    def canonical_json(data) -> bytes:
+        """规范化JSON编码（键排序、紧凑分隔符），orjson直接返回bytes"""
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
+    def block_json(block: Dict) -> bytes:
+        """区块编码：区块由new_block按固定字段顺序构造，按插入顺序输出即为规范形式，无需排序"""
+        return orjson.dumps(block)
+except ImportError:
+    def canonical_json(data) -> bytes:
+        """规范化JSON编码（未安装orjson时回退到标准库json，输出与orjson逐字节一致）"""
+        return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def block_json(block: Dict) -> bytes:
+        """区块编码（未安装orjson时回退到标准库json，输出与orjson逐字节一致）"""
+        return json.dumps(block, separators=(",", ":"), ensure_ascii=False).encode()
+
+def new_block(height: int, prev_hash: str, merkle_root: str, transactions: List[str],
+              difficulty: int = 4) -> Dict:
+    """按规范字段顺序构造区块（nonce固定在最后，挖矿时变化的部分位于序列化结果末尾）"""
+    return {
+        "height": height,
+        "timestamp": int(time.time()),
+        "prev_hash": prev_hash,
+        "merkle_root": merkle_root,
+        "transactions": transactions,
+        "difficulty": difficulty,
+        "nonce": 0
+    }
+
+# 空的SHA-256哈希对象：复制它即可得到初始化好的上下文，省去每次按算法名构造哈希对象
+_SHA256_BASE = hashlib.sha256()
+
+def sha256_hex(data: bytes) -> str:
+    """计算SHA-256并返回十六进制摘要"""
+    h = _SHA256_BASE.copy()
+    h.update(data)
+    return h.hexdigest()
+
 class Blockchain:
     """简单的区块链实现，使用AmDb存储"""
     
@@ -27,11 +68,14 @@ class Blockchain:
         # 初始化AmDb数据库
         self.db = Database(data_dir=data_dir)
         self.current_height = 0
+        # 最新区块哈希（由_store_block维护），出块时直接作为prev_hash，无需读取并解析最新区块
+        self._latest_hash: Optional[str] = None
         
         # 加载最新区块
         latest = self._get_latest_block()
         if latest:
             self.current_height = latest['height']
+            self._latest_hash = latest['block_hash']
     
     def _get_latest_block(self) -> Optional[Dict]:
         """获取最新区块"""
@@ -47,15 +91,7 @@ class Blockchain:
             print("区块链已存在，跳过创世区块创建")
             return
         
-        genesis = {
-            "height": 0,
-            "timestamp": int(time.time()),
-            "prev_hash": "0" * 64,
-            "merkle_root": "0" * 64,
-            "transactions": [],
-            "nonce": 0,
-            "difficulty": 4
-        }
+        genesis = new_block(0, "0" * 64, "0" * 64, [])
         
         block_hash = self._store_block(genesis)
         print(f"✓ 创世区块已创建: {block_hash}")
@@ -63,38 +99,33 @@ class Blockchain:
     
     def _store_block(self, block_data: Dict) -> str:
         """存储区块到数据库"""
-        block_json = json.dumps(block_data, sort_keys=True).encode()
-        block_hash = hashlib.sha256(block_json).hexdigest()
+        block_bytes = block_json(block_data)
+        block_hash = sha256_hex(block_bytes)
         
-        # 存储区块
         block_key = f"block:{block_hash}".encode()
-        self.db.put(block_key, block_json)
-        
-        # 存储高度索引
         height_key = f"height:{block_data['height']}".encode()
-        self.db.put(height_key, block_hash.encode())
-        
-        # 更新最新区块
-        self.db.put(b"latest:block", block_hash.encode())
-        
-        # 存储Merkle根（用于验证）
         merkle_key = f"merkle:{block_data['height']}".encode()
-        self.db.put(merkle_key, block_data['merkle_root'].encode())
+        
+        # 区块、高度索引、最新区块指针、Merkle根（用于验证）一次批量写入
+        self.db.batch_put([
+            (block_key, block_bytes),
+            (height_key, block_hash.encode()),
+            (b"latest:block", block_hash.encode()),
+            (merkle_key, block_data['merkle_root'].encode()),
+        ])
+        self._latest_hash = block_hash
         
         return block_hash
     
     def add_transaction(self, tx_data: Dict) -> str:
         """添加交易"""
-        tx_json = json.dumps(tx_data, sort_keys=True).encode()
-        tx_hash = hashlib.sha256(tx_json).hexdigest()
+        tx_json = canonical_json(tx_data)
+        tx_hash = sha256_hex(tx_json)
         
-        # 存储交易
+        # 存储交易及待处理交易（pending），一次批量写入
         tx_key = f"tx:{tx_hash}".encode()
-        self.db.put(tx_key, tx_json)
-        
-        # 存储待处理交易（pending）
         pending_key = f"pending:tx:{tx_hash}".encode()
-        self.db.put(pending_key, tx_json)
+        self.db.batch_put([(tx_key, tx_json), (pending_key, tx_json)])
         
         return tx_hash
     
@@ -114,21 +145,12 @@ class Blockchain:
         else:
             merkle_root = "0" * 64
         
-        # 获取上一个区块
-        prev_block = self._get_latest_block()
-        prev_hash = prev_block['block_hash'] if prev_block else "0" * 64
+        # 上一个区块的哈希
+        prev_hash = self._latest_hash or "0" * 64
         
         # 创建新区块
         new_height = self.current_height + 1
-        block = {
-            "height": new_height,
-            "timestamp": int(time.time()),
-            "prev_hash": prev_hash,
-            "merkle_root": merkle_root,
-            "transactions": pending_txs,
-            "nonce": 0,
-            "difficulty": 4
-        }
+        block = new_block(new_height, prev_hash, merkle_root, pending_txs)
         
         # 简单挖矿（找到满足难度的nonce）
         block_hash = self._mine(block)
@@ -137,10 +159,8 @@ class Blockchain:
         block['block_hash'] = block_hash
         stored_hash = self._store_block(block)
         
-        # 从pending中移除已打包的交易
-        for tx_hash in pending_txs:
-            pending_key = f"pending:tx:{tx_hash}".encode()
-            self.db.delete(pending_key)
+        # 从pending中移除已打包的交易（一次批量删除）
+        self.db.batch_delete([f"pending:tx:{tx_hash}".encode() for tx_hash in pending_txs])
         
         self.current_height = new_height
         
@@ -152,16 +172,26 @@ class Blockchain:
     def _mine(self, block: Dict) -> str:
         """简单挖矿算法"""
         difficulty = block.get('difficulty', 4)
-        target = "0" * difficulty
+        # 十六进制前difficulty位为0 等价于 摘要（大端整数）的高4*difficulty位为0，即小于该阈值
+        target = 1 << (256 - 4 * difficulty)
+        
+        # 循环中只有nonce变化：先序列化一次，在nonce值处切分出不变的前缀和后缀，
+        # 每轮只格式化nonce并拼接，结果与 block_json(block) 逐字节一致
+        block['nonce'] = 0
+        prefix, suffix = block_json(block).split(b'"nonce":0', 1)
+        prefix += b'"nonce":'
+        # 前缀只压缩一次，每轮复制哈希中间状态后只补上nonce和后缀
+        base = hashlib.sha256(prefix)
         
         nonce = 0
         while True:
-            block['nonce'] = nonce
-            block_json = json.dumps(block, sort_keys=True).encode()
-            block_hash = hashlib.sha256(block_json).hexdigest()
+            h = base.copy()
+            h.update(b"%d%s" % (nonce, suffix))
             
-            if block_hash[:difficulty] == target:
-                return block_hash
+            # 直接用原始摘要做一次整数比较，只有命中时才生成十六进制串
+            if int.from_bytes(h.digest(), 'big') < target:
+                block['nonce'] = nonce
+                return h.hexdigest()
             
             nonce += 1
             if nonce % 10000 == 0:
@@ -172,16 +202,23 @@ class Blockchain:
         if not transactions:
             return "0" * 64
         
-        # 简化的Merkle根计算
-        combined = "".join(transactions)
-        return hashlib.sha256(combined.encode()).hexdigest()
+        # 逐层两两哈希（奇数个节点时复制最后一个），节点使用原始32字节摘要而不是十六进制串；
+        # 全部交易哈希一次解码为连续的 32*N 字节缓冲区，叶子节点按固定宽度切片
+        digests = bytes.fromhex("".join(transactions))
+        level = [digests[i:i + 32] for i in range(0, len(digests), 32)]
+        sha256 = hashlib.sha256
+        while len(level) > 1:
+            if len(level) % 2:
+                level.append(level[-1])
+            level = [sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+        return level[0].hex()
     
     def get_block(self, block_hash: str) -> Optional[Dict]:
         """获取区块"""
         block_key = f"block:{block_hash}".encode()
         block_data = self.db.get(block_key)
         if block_data:
-            block = json.loads(block_data.decode())
+            block = json.loads(block_data)
             block['block_hash'] = block_hash
             return block
         return None
@@ -199,32 +236,23 @@ class Blockchain:
         tx_key = f"tx:{tx_hash}".encode()
         tx_data = self.db.get(tx_key)
         if tx_data:
-            return json.loads(tx_data.decode())
+            return json.loads(tx_data)
         return None
     
     def get_pending_transactions(self) -> List[Dict]:
         """获取待处理交易"""
-        all_keys = self.db.version_manager.get_all_keys()
-        pending_txs = []
-        
-        for key in all_keys:
-            if key.startswith(b"pending:tx:"):
-                tx_data = self.db.get(key)
-                if tx_data:
-                    pending_txs.append(json.loads(tx_data.decode()))
-        
-        return pending_txs
+        # 按前缀做有序范围扫描（交易哈希为十六进制，上界取 \xff），只遍历pending键，且扫描直接带回值
+        return [json.loads(tx_data) for _, tx_data in self.db.range_scan(b"pending:tx:", b"pending:tx:\xff")]
     
     def get_chain_info(self) -> Dict:
         """获取链信息"""
         stats = self.db.get_stats()
-        latest = self._get_latest_block()
         
         return {
             "current_height": self.current_height,
             "total_keys": stats['total_keys'],
             "merkle_root": stats['merkle_root'],
-            "latest_block": latest['block_hash'] if latest else None,
+            "latest_block": self._latest_hash,
             "pending_transactions": len(self.get_pending_transactions())
         }
 
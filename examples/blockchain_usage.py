@@ -9,6 +9,21 @@ import json
 import hashlib
 import time
 
+try:
+    import orjson
+
+    def canonical_json(data) -> bytes:
+        """规范化JSON编码（键排序、紧凑分隔符），orjson直接返回bytes"""
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+except ImportError:
+    def canonical_json(data) -> bytes:
+        """规范化JSON编码（未安装orjson时回退到标准库json，输出与orjson逐字节一致）"""
+        return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+def height_key(height):
+    """高度索引键：高度补零到固定宽度，使键的字典序与数值顺序一致，按高度范围查询可直接做有序范围扫描"""
+    return b"height:%012d" % height
+
 def create_blockchain_db():
     """创建区块链数据库"""
     db = Database(data_dir='./data/blockchain')
@@ -17,45 +32,42 @@ def create_blockchain_db():
 def add_block(db, block_data):
     """添加区块到数据库"""
     # 计算区块哈希
-    block_json = json.dumps(block_data, sort_keys=True).encode()
+    block_json = canonical_json(block_data)
     block_hash = hashlib.sha256(block_json).hexdigest()
     
-    # 存储区块（使用block:hash作为key）
-    block_key = f"block:{block_hash}".encode()
-    db.put(block_key, block_json)
-    
-    # 存储区块索引（按高度索引）
-    height_key = f"height:{block_data['height']}".encode()
-    db.put(height_key, block_hash.encode())
-    
-    # 存储最新区块
-    db.put(b"latest:block", block_hash.encode())
+    # 区块（使用block:hash作为key）、高度索引、最新区块指针一次批量写入
+    hash_bytes = block_hash.encode()
+    db.batch_put([
+        (b"block:%s" % hash_bytes, block_json),
+        (height_key(block_data['height']), hash_bytes),
+        (b"latest:block", hash_bytes),
+    ])
     
     return block_hash
 
 def add_transaction(db, tx_data):
     """添加交易到数据库"""
     # 计算交易哈希
-    tx_json = json.dumps(tx_data, sort_keys=True).encode()
+    tx_json = canonical_json(tx_data)
     tx_hash = hashlib.sha256(tx_json).hexdigest()
     
     # 存储交易
-    tx_key = f"tx:{tx_hash}".encode()
-    db.put(tx_key, tx_json)
+    tx_key = b"tx:%s" % tx_hash.encode()
+    items = [(tx_key, tx_json)]
     
-    # 存储交易索引（按区块索引）
+    # 存储交易索引（按区块索引），与交易一次批量写入
     if 'block_hash' in tx_data:
-        block_tx_key = f"block:{tx_data['block_hash']}:tx:{tx_hash}".encode()
-        db.put(block_tx_key, b"1")
+        block_tx_key = b"block:%s:%s" % (tx_data['block_hash'].encode(), tx_key)
+        items.append((block_tx_key, b"1"))
+    db.batch_put(items)
     
     return tx_hash
 
 def get_block(db, block_hash):
     """获取区块"""
-    block_key = f"block:{block_hash}".encode()
-    block_data = db.get(block_key)
+    block_data = db.get(b"block:%s" % block_hash.encode())
     if block_data:
-        return json.loads(block_data.decode())
+        return json.loads(block_data)
     return None
 
 def get_latest_block(db):
@@ -67,22 +79,19 @@ def get_latest_block(db):
 
 def get_transaction(db, tx_hash):
     """获取交易"""
-    tx_key = f"tx:{tx_hash}".encode()
-    tx_data = db.get(tx_key)
+    tx_data = db.get(b"tx:%s" % tx_hash.encode())
     if tx_data:
-        return json.loads(tx_data.decode())
+        return json.loads(tx_data)
     return None
 
 def query_blocks_by_range(db, start_height, end_height):
     """按高度范围查询区块"""
+    # 一次有序范围扫描取出区间内全部高度索引（闭区间，按高度升序），不再逐个高度查询
     blocks = []
-    for height in range(start_height, end_height + 1):
-        height_key = f"height:{height}".encode()
-        block_hash = db.get(height_key)
-        if block_hash:
-            block = get_block(db, block_hash.decode())
-            if block:
-                blocks.append(block)
+    for _, block_hash in db.range_scan(height_key(start_height), height_key(end_height)):
+        block = get_block(db, block_hash.decode())
+        if block:
+            blocks.append(block)
     return blocks
 
 def example_usage():
@@ -157,12 +166,10 @@ def example_usage():
             "transactions": [],
             "nonce": i * 1000
         }
-        block_json = json.dumps(block, sort_keys=True).encode()
+        block_json = canonical_json(block)
         block_hash = hashlib.sha256(block_json).hexdigest()
-        block_key = f"block:{block_hash}".encode()
-        height_key = f"height:{i}".encode()
-        items.append((block_key, block_json))
-        items.append((height_key, block_hash.encode()))
+        items.append((b"block:%s" % block_hash.encode(), block_json))
+        items.append((height_key(i), block_hash.encode()))
     
     success, _ = db.batch_put(items)
     print(f"✓ 批量添加 {len(items)//2} 个区块: {'成功' if success else '失败'}")
@@ -36,11 +36,8 @@ def quick_test():
     print("-" * 80)
     count = 10000
     
-    items = []
-    for i in range(count):
-        key = f"key{i:08d}".encode()
-        value = f"value{i:08d}".encode()
-        items.append((key, value))
+    # 直接用bytes格式化生成键值（不经过str再encode），数据准备不计入计时
+    items = [(b"key%08d" % i, b"value%08d" % i) for i in range(count)]
     
     start = time.time()
     db.batch_put(items)
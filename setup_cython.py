@@ -7,16 +7,58 @@ Cython扩展构建脚本
 from setuptools import setup, Extension
 from Cython.Build import cythonize
 import numpy
+import os
+import platform
+import shlex
+import subprocess
 import sys
+import sysconfig
+import tempfile
+
+
+def has_openssl() -> bool:
+    """
+    检测构建机能否编译并链接OpenSSL（libcrypto），用于决定是否构建审计哈希扩展
+    使用Python构建时的C编译器（sysconfig的CC，可由环境变量CC/CFLAGS/LDFLAGS覆盖），
+    不依赖Python 3.12起已移除的distutils
+    """
+    cc = os.environ.get('CC') or sysconfig.get_config_var('CC')
+    if not cc:
+        return False  # 例如MSVC构建的Python，没有可直接调用的cc
+    command = shlex.split(cc) + shlex.split(os.environ.get('CFLAGS', ''))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'check_openssl.c')
+        with open(source, 'w') as f:
+            f.write('#include <openssl/evp.h>\nint main(void) { return EVP_sha256() == 0; }\n')
+        command += [source, '-o', os.path.join(tmp_dir, 'check_openssl')]
+        command += shlex.split(os.environ.get('LDFLAGS', '')) + ['-lcrypto']
+        try:
+            result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError:
+            return False
+    return result.returncode == 0
+
+
+# 检测平台和CPU架构，优化编译参数
+machine = platform.machine().lower()
+is_arm64 = machine in ('arm64', 'aarch64')
 
-# 检测平台，优化编译参数
 compile_args = ['-O3']
 link_args = ['-O3']
 
 if sys.platform == 'darwin':  # macOS
-    compile_args.extend(['-march=native', '-mtune=native'])
+    if is_arm64:
+        compile_args.extend(['-march=armv8.2-a+crypto+sha2', '-mtune=native'])
+    else:
+        compile_args.extend(['-march=native', '-mtune=native'])
+    compile_args.append('-flto')
+    link_args.append('-flto')
 elif sys.platform.startswith('linux'):  # Linux
-    compile_args.extend(['-march=native', '-mtune=native', '-mavx2'])
+    # -march=native 只开启构建机支持的指令集扩展（x86的AVX2/BMI2/ADX/SHA-NI、ARM的crypto/sha2等），
+    # 无需再单独追加 -m 参数；ARMv8.0的主机（如Cortex-A72）上也不会生成无法执行的指令
+    compile_args.extend(['-march=native', '-mtune=native'])
+    compile_args.extend(['-fno-plt', '-flto'])
+    link_args.append('-flto')
 elif sys.platform.startswith('win'):  # Windows
     compile_args.extend(['/O2', '/arch:AVX2'])
 
@@ -39,8 +81,22 @@ extensions = [
     ),
 ]
 
+# 审计哈希扩展依赖OpenSSL（libcrypto），只在构建机具备时构建，且编译失败不影响其他扩展；
+# 未构建时audit.py使用纯Python实现
+if has_openssl():
+    extensions.append(Extension(
+        "amdb.audit_cython",
+        ["src/amdb/audit_cython.pyx"],
+        libraries=["crypto"],  # OpenSSL EVP接口（SHA-256）
+        extra_compile_args=compile_args,
+        extra_link_args=link_args,
+        language="c",
+        optional=True
+    ))
+else:
+    print("OpenSSL development files not found, skipping amdb.audit_cython")
+
 # 确保编译后的文件在正确的位置
-import os
 package_dir = os.path.join(os.path.dirname(__file__), 'src')
 
 setup(
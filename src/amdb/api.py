@@ -13,6 +13,19 @@ except ImportError:
     request = None
     jsonify = None
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    import json
+    _loads = json.loads
+
+# NDJSON流式批量写入时每次batch_put的条数（内存中只保留一块）
+NDJSON_CHUNK_SIZE = 500
+
+# 请求体格式错误时解析/取值可能抛出的异常（非JSON、缺少key/value、类型不对），返回400而不是500
+_BAD_REQUEST_ERRORS = (ValueError, KeyError, TypeError, AttributeError)
+
 from .database import Database
 from .query import QueryEngine
 
@@ -42,7 +55,7 @@ class RESTAPI:
             success, root_hash = self.db.put(key, value)
             return jsonify({
                 'success': success,
-                'merkle_root': root_hash.hex() if root_hash else None
+                'merkle_root': self.db.get_root_hex(root_hash) if root_hash else None
             })
         
         @self.app.route('/api/v1/get/<key>', methods=['GET'])
@@ -81,21 +94,28 @@ class RESTAPI:
         @self.app.route('/api/v1/root', methods=['GET'])
         def root():
             """获取Merkle根哈希"""
-            root_hash = self.db.get_root_hash()
-            return jsonify({'merkle_root': root_hash.hex()})
+            return jsonify({'merkle_root': self.db.get_root_hex()})
         
         @self.app.route('/api/v1/batch', methods=['POST'])
         def batch():
-            """批量写入"""
-            data = request.json
-            items = [
-                (item['key'].encode(), item['value'].encode())
-                for item in data.get('items', [])
-            ]
+            """批量写入（Content-Type为application/x-ndjson时按行流式写入）"""
+            if request.mimetype == 'application/x-ndjson':
+                result = self._batch_ndjson(request.stream)
+                return jsonify(result), (400 if 'error' in result else 200)
+            
+            # 直接解析原始请求体（orjson接受bytes，不经过request.json的文本解码与缓存）
+            try:
+                data = _loads(request.get_data(cache=False))
+                items = [
+                    (item['key'].encode(), item['value'].encode())
+                    for item in data.get('items', ())
+                ]
+            except _BAD_REQUEST_ERRORS as e:
+                return jsonify({'success': False, 'count': 0, 'error': f"Invalid request body: {e!r}"}), 400
             success, root_hash = self.db.batch_put(items)
             return jsonify({
                 'success': success,
-                'merkle_root': root_hash.hex() if root_hash else None
+                'merkle_root': self.db.get_root_hex(root_hash) if root_hash else None
             })
         
         @self.app.route('/api/v1/stats', methods=['GET'])
@@ -112,12 +132,8 @@ class RESTAPI:
         @self.app.route('/api/v1/transaction/<int:tx_id>/commit', methods=['POST'])
         def commit_tx(tx_id: int):
             """提交事务"""
-            # 从事务管理器获取事务
-            tx = None
-            for t in self.db.transaction_manager.transactions.values():
-                if t.tx_id == tx_id:
-                    tx = t
-                    break
+            # 从事务管理器获取事务（transactions 按 tx_id 索引，直接查找）
+            tx = self.db.transaction_manager.transactions.get(tx_id)
             
             if not tx:
                 return jsonify({'success': False, 'error': 'Transaction not found'}), 404
@@ -128,11 +144,7 @@ class RESTAPI:
         @self.app.route('/api/v1/transaction/<int:tx_id>/abort', methods=['POST'])
         def abort_tx(tx_id: int):
             """中止事务"""
-            tx = None
-            for t in self.db.transaction_manager.transactions.values():
-                if t.tx_id == tx_id:
-                    tx = t
-                    break
+            tx = self.db.transaction_manager.transactions.get(tx_id)
             
             if not tx:
                 return jsonify({'success': False, 'error': 'Transaction not found'}), 404
@@ -140,6 +152,56 @@ class RESTAPI:
             self.db.abort_transaction(tx)
             return jsonify({'success': True})
     
+    def _batch_ndjson(self, stream) -> Dict[str, Any]:
+        """
+        流式批量写入：逐行读取NDJSON请求体（每行一个 {"key": ..., "value": ...}），
+        每满NDJSON_CHUNK_SIZE条调用一次batch_put，接收请求体与写入交替进行，不缓存整个请求
+        
+        遇到格式错误的行时停止处理（当前未写入的块被丢弃），结果中带error，
+        count为此前已写入的条数，客户端可据此从断点重试
+        """
+        chunk: List[tuple] = []
+        written = 0
+        chunks = 0
+        root_hash = None
+        
+        def write_chunk() -> bool:
+            nonlocal written, chunks, root_hash
+            success, root_hash = self.db.batch_put(chunk)
+            if success:
+                written += len(chunk)
+                chunks += 1
+            chunk.clear()
+            return success
+        
+        success = True
+        error = None
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                item = _loads(line)
+                chunk.append((item['key'].encode(), item['value'].encode()))
+            except _BAD_REQUEST_ERRORS as e:
+                success = False
+                error = f"Invalid NDJSON line {line_no}: {e!r}"
+                break
+            if len(chunk) >= NDJSON_CHUNK_SIZE and not write_chunk():
+                success = False
+                break
+        if success and chunk:
+            success = write_chunk()
+        
+        result = {
+            'success': success,
+            'count': written,
+            'chunks': chunks,
+            'merkle_root': self.db.get_root_hex(root_hash) if root_hash else None
+        }
+        if error is not None:
+            result['error'] = error
+        return result
+    
     def run(self, debug: bool = False):
         """运行服务器"""
         self.app.run(host=self.host, port=self.port, debug=debug)
@@ -3,15 +3,97 @@
 专门为区块链应用设计，记录所有操作，确保不可篡改
 """
 
+import os
+import gzip
+import mmap
+import shutil
 import time
 import hashlib
 import json
+import struct
 import threading
-from typing import List, Dict, Optional, Any
+import itertools
+import weakref
+import zlib
+from typing import List, Dict, Optional, Any, Iterator, Tuple, Callable
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from abc import ABC, abstractmethod
 from enum import Enum
 
+try:
+    import orjson
+
+    def _dumps_line(data: Dict[str, Any]) -> bytes:
+        """编码一行日志（orjson直接输出带换行的UTF-8字节）"""
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+
+    def _canonical_json(data: Any) -> bytes:
+        """规范化JSON编码（键排序、紧凑分隔符），用于哈希"""
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps_line(data: Dict[str, Any]) -> bytes:
+        """编码一行日志（未安装orjson时回退到标准库json）"""
+        return (json.dumps(data, ensure_ascii=False) + '\n').encode()
+
+    def _canonical_json(data: Any) -> bytes:
+        """规范化JSON编码（未安装orjson时回退到标准库json，输出与orjson逐字节一致，哈希不依赖是否安装orjson）"""
+        return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode()
+
+    _loads = json.loads
+
+# 条目哈希的Cython实现（需先运行 python setup_cython.py build_ext --inplace 编译，
+# 构建机有OpenSSL开发文件时才会编译），未编译时使用纯Python实现
+try:
+    from .audit_cython import compute_entry_hash as _compute_entry_hash
+except ImportError:
+    _compute_entry_hash = None
+
+
+# 日志文件以追加模式打开（O_APPEND保证每次写入都追加在文件末尾）；Windows需要O_BINARY避免换行转换
+_OPEN_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+
+# os.writev单次调用的最大缓冲区数量（POSIX IOV_MAX的常见下限）
+_WRITEV_MAX = 1024
+
+# 审计模式：off 不记录；sample 成功操作按比例抽样记录（失败操作总是记录）；full 全部记录
+AUDIT_MODES = ("off", "sample", "full")
+
+# 日志格式：json 每行一个JSON对象（.log）；binary 长度前缀的二进制记录（.bin）
+AUDIT_FORMATS = ("json", "binary")
+
+# 单个日志文件达到该大小后轮转，已封存的文件压缩为 .gz
+_ROTATE_BYTES = 64 * 1024 * 1024
+
+# 启用parallel_scan且多个日志文件总大小达到该值时，统计和审计轨迹查询按文件多进程并行扫描
+_PARALLEL_SCAN_BYTES = 64 * 1024 * 1024
+
+# JSON日志文件头中的格式版本：2.0起条目哈希使用下方的长度前缀二进制编码；
+# 1.0文件（字符串拼接哈希）仍按旧算法校验
+_LOG_VERSION = "2.0"
+_LEGACY_LOG_VERSION = "1.0"
+
+# 条目哈希内容的二进制编码：定长头（时间戳double + 成功标志），变长字段使用4字节长度前缀
+_HASH_HEADER = struct.Struct('<d?')
+_FIELD_LEN = struct.Struct('<I')
+
+# 初始化好的空SHA-256上下文：每次哈希复制它（只复制内部状态），省去按算法名构造哈希对象
+_SHA256_PROTO = hashlib.sha256()
+
+# 空元数据的规范化编码（大多数条目没有元数据）
+_EMPTY_METADATA = _canonical_json({})
+
+# 二进制日志格式：文件以魔数开头，每条记录为 [u32 记录体长度][记录体]
+# 记录体 = 定长头（时间戳、操作码、成功标志、字段存在标志、操作者/键/错误/元数据长度）
+#        + 条目哈希(32) + [值哈希(32)] + [前一条目哈希(32)] + 操作者 + 键 + 错误 + 元数据(规范化JSON)
+# 哈希以原始32字节存储而不是64字符十六进制
+_BIN_MAGIC = b"AMDBAUD\x01"
+_BIN_FRAME = struct.Struct('<I')
+_BIN_HEADER = struct.Struct('<dB?BHIII')
+_HAS_KEY, _HAS_VALUE_HASH, _HAS_PREV_HASH, _HAS_METADATA = 1, 2, 4, 8
+
 
 class OperationType(Enum):
     """操作类型"""
@@ -25,22 +107,86 @@ class OperationType(Enum):
     CONFIG_CHANGE = "config_change"
 
 
-@dataclass
+# 二进制格式中操作类型按枚举定义顺序编码为1字节（新增类型只能追加在末尾）
+_OPERATIONS = [op.value for op in OperationType]
+_OPERATION_CODES = {value: code for code, value in enumerate(_OPERATIONS)}
+
+
 class AuditLogEntry:
-    """审计日志条目"""
-    timestamp: float
-    operation: str
-    operator: Optional[str] = None  # 操作者（节点ID或用户）
-    key: Optional[bytes] = None
-    value_hash: Optional[str] = None  # 值的哈希（不存储实际值）
-    success: bool = True
-    error: Optional[str] = None
-    metadata: Optional[Dict[str, Any]] = None
-    prev_hash: Optional[str] = None  # 前一个日志条目的哈希（形成链）
-    hash: Optional[str] = None  # 当前条目的哈希
+    """审计日志条目（使用__slots__，每条记录不创建实例__dict__）"""
+    _FIELDS = ('timestamp', 'operation', 'operator', 'key', 'value_hash',
+               'success', 'error', 'metadata', 'prev_hash', 'hash')
+    # _meta_canon：元数据的规范化JSON编码，首次使用时生成后复用
+    __slots__ = _FIELDS + ('_meta_canon',)
+    
+    def __init__(self,
+                 timestamp: float,
+                 operation: str,
+                 operator: Optional[str] = None,  # 操作者（节点ID或用户）
+                 key: Optional[bytes] = None,
+                 value_hash: Optional[str] = None,  # 值的哈希（不存储实际值）
+                 success: bool = True,
+                 error: Optional[str] = None,
+                 metadata: Optional[Dict[str, Any]] = None,
+                 prev_hash: Optional[str] = None,  # 前一个日志条目的哈希（形成链）
+                 hash: Optional[str] = None):  # 当前条目的哈希
+        self.timestamp = timestamp
+        self.operation = operation
+        self.operator = operator
+        self.key = key
+        self.value_hash = value_hash
+        self.success = success
+        self.error = error
+        self.metadata = metadata
+        self.prev_hash = prev_hash
+        self.hash = hash
+        self._meta_canon: Optional[bytes] = None
+    
+    def __repr__(self) -> str:
+        return (f"AuditLogEntry(timestamp={self.timestamp!r}, operation={self.operation!r}, "
+                f"key={self.key!r}, hash={self.hash!r})")
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, AuditLogEntry):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._FIELDS)
+    
+    def canonical_metadata(self) -> bytes:
+        """元数据的规范化JSON编码（参与哈希；只编码一次，哈希和二进制日志编码共用）"""
+        canon = self._meta_canon
+        if canon is None:
+            canon = _canonical_json(self.metadata) if self.metadata else _EMPTY_METADATA
+            self._meta_canon = canon
+        return canon
     
     def compute_hash(self) -> str:
-        """计算日志条目哈希（确保不可篡改）"""
+        """
+        计算日志条目哈希（确保不可篡改）
+        各字段按固定顺序写入一个bytearray：定长头用struct打包，变长字段带长度前缀，
+        不再拼接大字符串后整体encode；长度前缀也使字段边界明确，不同字段组合不会得到相同内容
+        """
+        fields = (
+            self.operation.encode(),
+            (self.operator or "").encode(),
+            self.key or b"",
+            (self.value_hash or "").encode(),
+            (self.error or "").encode(),
+            self.canonical_metadata(),
+            (self.prev_hash or "").encode(),
+        )
+        if _compute_entry_hash is not None:
+            return _compute_entry_hash(self.timestamp, self.success, fields)
+        
+        buf = bytearray(_HASH_HEADER.pack(self.timestamp, self.success))
+        for field in fields:
+            buf += _FIELD_LEN.pack(len(field))
+            buf += field
+        h = _SHA256_PROTO.copy()
+        h.update(buf)
+        return h.hexdigest()
+    
+    def compute_legacy_hash(self) -> str:
+        """计算1.0格式日志文件的条目哈希（各字段转为字符串直接拼接，仅用于校验旧文件）"""
         content = (
             str(self.timestamp) +
             self.operation +
@@ -55,40 +201,597 @@ class AuditLogEntry:
         return hashlib.sha256(content.encode()).hexdigest()
     
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        result = asdict(self)
-        if self.key:
-            result['key'] = self.key.hex()
-        return result
+        """转换为字典（直接构造，不经过asdict的递归深拷贝；键转为十六进制）"""
+        return {
+            'timestamp': self.timestamp,
+            'operation': self.operation,
+            'operator': self.operator,
+            'key': self.key.hex() if self.key is not None else None,
+            'value_hash': self.value_hash,
+            'success': self.success,
+            'error': self.error,
+            'metadata': self.metadata,
+            'prev_hash': self.prev_hash,
+            'hash': self.hash
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AuditLogEntry':
+        """从to_dict的结果恢复条目（十六进制键还原为bytes）"""
+        key = data.get('key')
+        if key is not None:
+            data = dict(data, key=bytes.fromhex(key))
+        return cls(**data)
 
 
-class AuditLogger:
-    """审计日志记录器（区块链优化版本）"""
+def _encode_json(entry: AuditLogEntry) -> bytes:
+    """编码为一行JSON日志"""
+    return _dumps_line(entry.to_dict())
+
+
+def _encode_binary(entry: AuditLogEntry) -> bytes:
+    """编码为一条带长度前缀的二进制记录"""
+    operator = (entry.operator or "").encode()
+    key = entry.key or b""
+    error = (entry.error or "").encode()
+    metadata = entry.canonical_metadata() if entry.metadata is not None else b""
+    flags = ((_HAS_KEY if entry.key is not None else 0)
+             | (_HAS_VALUE_HASH if entry.value_hash else 0)
+             | (_HAS_PREV_HASH if entry.prev_hash else 0)
+             | (_HAS_METADATA if entry.metadata is not None else 0))
+    body = b"".join((
+        _BIN_HEADER.pack(entry.timestamp, _OPERATION_CODES[entry.operation], entry.success, flags,
+                         len(operator), len(key), len(error), len(metadata)),
+        bytes.fromhex(entry.hash),
+        bytes.fromhex(entry.value_hash) if entry.value_hash else b"",
+        bytes.fromhex(entry.prev_hash) if entry.prev_hash else b"",
+        operator, key, error, metadata,
+    ))
+    return _BIN_FRAME.pack(len(body)) + body
+
+
+def _decode_binary(record: bytes) -> Dict[str, Any]:
+    """解码二进制记录体，结果与JSON格式的条目字典相同"""
+    (timestamp, code, success, flags,
+     operator_len, key_len, error_len, metadata_len) = _BIN_HEADER.unpack_from(record)
+    pos = _BIN_HEADER.size
+    entry_hash = record[pos:pos + 32].hex()
+    pos += 32
+    value_hash = prev_hash = None
+    if flags & _HAS_VALUE_HASH:
+        value_hash = record[pos:pos + 32].hex()
+        pos += 32
+    if flags & _HAS_PREV_HASH:
+        prev_hash = record[pos:pos + 32].hex()
+        pos += 32
+    operator = record[pos:pos + operator_len].decode()
+    pos += operator_len
+    key = record[pos:pos + key_len].hex()
+    pos += key_len
+    error = record[pos:pos + error_len].decode()
+    pos += error_len
+    metadata = _loads(record[pos:pos + metadata_len]) if flags & _HAS_METADATA else None
+    return {
+        'timestamp': timestamp,
+        'operation': _OPERATIONS[code],
+        'operator': operator or None,
+        'key': key if flags & _HAS_KEY else None,
+        'value_hash': value_hash,
+        'success': success,
+        'error': error or None,
+        'metadata': metadata,
+        'prev_hash': prev_hash,
+        'hash': entry_hash
+    }
+
+
+def _decode_binary_entry(record: bytes) -> AuditLogEntry:
+    """
+    解码二进制记录为条目对象（用于完整性校验）：记录中的元数据本身就是规范化编码，
+    直接作为条目的规范化元数据，重新计算哈希时不必再次编码
+    """
+    entry = AuditLogEntry.from_dict(_decode_binary(record))
+    metadata_len = _BIN_HEADER.unpack_from(record)[-1]
+    if entry.metadata is not None:
+        entry._meta_canon = bytes(record[len(record) - metadata_len:])
+    return entry
+
+
+def _decode_json_entry(record: bytes) -> AuditLogEntry:
+    """解码一行JSON日志为条目对象"""
+    return AuditLogEntry.from_dict(_loads(record))
+
+
+def _json_log_version(log_file: Path) -> str:
+    """读取JSON日志文件头中的格式版本（没有文件头时视为当前版本）"""
+    opener = gzip.open if log_file.suffix == '.gz' else open
+    with opener(log_file, 'rb') as f:
+        first_line = f.readline()
+    if not first_line.startswith(b'{"type":'):
+        return _LOG_VERSION
+    try:
+        return str(_loads(first_line).get('version', _LEGACY_LOG_VERSION))
+    except ValueError:
+        return _LOG_VERSION
+
+
+def _is_binary_log(log_file: Path) -> bool:
+    """根据文件名判断日志格式（.bin 或 .bin.gz 为二进制格式）"""
+    return log_file.name.endswith(('.bin', '.bin.gz'))
+
+
+def _iter_binary_records(log_file: Path) -> Iterator[bytes]:
+    """
+    逐条读取二进制日志记录体：mmap映射后按长度前缀定位记录，不需要查找分隔符；
+    已轮转压缩的 .gz 文件流式解压后按长度前缀读取；末尾不完整的记录（写入中断）被忽略
+    """
+    if log_file.suffix == '.gz':
+        with gzip.open(log_file, 'rb') as f:
+            if f.read(len(_BIN_MAGIC)) != _BIN_MAGIC:
+                return
+            while True:
+                frame = f.read(_BIN_FRAME.size)
+                if len(frame) < _BIN_FRAME.size:
+                    return
+                (length,) = _BIN_FRAME.unpack(frame)
+                record = f.read(length)
+                if len(record) < length:
+                    return
+                yield record
+        return
     
-    def __init__(self, audit_dir: str = "./audit_logs"):
-        """
-        Args:
-            audit_dir: 审计日志目录
-        """
-        self.audit_dir = Path(audit_dir)
-        self.audit_dir.mkdir(parents=True, exist_ok=True)
-        self.lock = threading.RLock()
-        self.last_hash: Optional[str] = None
-        self.log_file = self.audit_dir / f"audit_{int(time.time())}.log"
+    with open(log_file, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= len(_BIN_MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(_BIN_MAGIC)] != _BIN_MAGIC:
+                return
+            pos = len(_BIN_MAGIC)
+            while pos + _BIN_FRAME.size <= size:
+                (length,) = _BIN_FRAME.unpack_from(mm, pos)
+                pos += _BIN_FRAME.size
+                if pos + length > size:
+                    return
+                yield mm[pos:pos + length]
+                pos += length
+
+
+def _file_records(log_file: Path) -> Tuple[Iterator[bytes], Callable[[bytes], Dict[str, Any]]]:
+    """按日志文件格式返回 (原始记录迭代器, 记录解码函数)"""
+    if _is_binary_log(log_file):
+        return _iter_binary_records(log_file), _decode_binary
+    return _iter_file_lines(log_file), _loads
+
+
+def _iter_file_lines(log_file: Path, needle: Optional[bytes] = None) -> Iterator[bytes]:
+    """
+    逐行读取日志文件：mmap映射整个文件，用find在C层定位换行符后切片，
+    不经过文本IO的逐行解码；已轮转压缩的 .gz 文件流式解压后逐行读取；跳过文件头和空行
+    Args:
+        needle: 只返回包含该字节串的行（mmap文件直接在整个文件中查找该字节串，再定位其所在行）
+    """
+    if log_file.suffix == '.gz':
+        with gzip.open(log_file, 'rb') as f:
+            for line in f:
+                if not line.strip() or line.startswith(b'{"type":'):
+                    continue
+                if needle is not None and needle not in line:
+                    continue
+                yield line.rstrip(b'\n')
+        return
+    
+    if needle is not None:
+        with open(log_file, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = 0
+                while True:
+                    hit = mm.find(needle, pos)
+                    if hit < 0:
+                        return
+                    start = mm.rfind(b'\n', 0, hit) + 1
+                    end = mm.find(b'\n', hit)
+                    if end < 0:
+                        end = size
+                    line = mm[start:end]
+                    pos = end + 1
+                    if not line.startswith(b'{"type":'):
+                        yield line
+    
+    with open(log_file, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            while pos < size:
+                end = mm.find(b'\n', pos)
+                if end < 0:
+                    end = size
+                line = mm[pos:end]
+                pos = end + 1
+                if not line.strip() or line.startswith(b'{"type":'):
+                    continue
+                yield line
+
+
+def _json_needle(value: Optional[str]) -> Optional[bytes]:
+    """
+    字段值在JSON日志行中的编码形式（带引号），用于解码前的字节级预过滤
+    只对无需转义的可打印ASCII值返回（各JSON编码器对它们的输出一致），否则返回None不做预过滤
+    """
+    if not value or not (value.isascii() and value.isprintable()) or '"' in value or '\\' in value:
+        return None
+    return f'"{value}"'.encode()
+
+
+def _scan_trail(log_file: Path, start_time: Optional[float], end_time: Optional[float],
+                operation_value: Optional[str], operator: Optional[str]) -> List[Dict[str, Any]]:
+    """扫描单个日志文件中符合条件的条目（模块级函数，可在子进程中执行）"""
+    results = []
+    records, decode = _file_records(log_file)
+    
+    # JSON日志按操作者/操作类型过滤时，先在文件中直接查找字段值的编码形式，
+    # 不包含该值的行一定不匹配，不必切分和解码（找到的行仍解码后精确比较）
+    if decode is _loads:
+        needles = [needle for needle in (_json_needle(operator), _json_needle(operation_value)) if needle]
+        if needles:
+            records = _iter_file_lines(log_file, needles[0])
+            if len(needles) > 1:
+                records = (record for record in records if needles[1] in record)
+    
+    for record in records:
+        try:
+            entry_dict = decode(record)
+            
+            # 过滤（直接在字典上比较，不构造条目对象）
+            if start_time and entry_dict['timestamp'] < start_time:
+                continue
+            if end_time and entry_dict['timestamp'] > end_time:
+                continue
+            if operation_value and entry_dict['operation'] != operation_value:
+                continue
+            if operator and entry_dict.get('operator') != operator:
+                continue
+            
+            results.append(entry_dict)
+        except Exception:
+            continue
+    return results
+
+
+def _scan_statistics(log_file: Path) -> Tuple[int, Dict[str, int], Dict[str, int], int, int]:
+    """
+    统计单个日志文件（模块级函数，可在子进程中执行）
+    Returns:
+        (总数, 按类型计数, 按操作者计数, 成功数, 失败数)
+    """
+    total = success = errors = 0
+    by_type: Dict[str, int] = {}
+    by_operator: Dict[str, int] = {}
+    records, decode = _file_records(log_file)
+    for record in records:
+        try:
+            entry_dict = decode(record)
+            
+            total += 1
+            
+            # 按类型统计
+            op_type = entry_dict['operation']
+            by_type[op_type] = by_type.get(op_type, 0) + 1
+            
+            # 按操作者统计
+            entry_operator = entry_dict.get('operator')
+            if entry_operator:
+                by_operator[entry_operator] = by_operator.get(entry_operator, 0) + 1
+            
+            # 成功/失败统计
+            if entry_dict.get('success', True):
+                success += 1
+            else:
+                errors += 1
+        except Exception:
+            continue
+    return total, by_type, by_operator, success, errors
+
+
+def _list_log_files(audit_dir: Path) -> List[Path]:
+    """按时间顺序返回目录下的所有日志文件（JSON和二进制格式，含已轮转压缩的 .gz）"""
+    files = {}
+    for ext in (".log", ".bin"):
+        for log_file in audit_dir.glob(f"audit_*{ext}"):
+            files.setdefault(log_file.name, log_file)
+        # 压缩文件改名完成即为完整文件；原文件尚未删除时以压缩文件为准，避免重复读取
+        for gz_file in audit_dir.glob(f"audit_*{ext}.gz"):
+            files[gz_file.name[:-3]] = gz_file
+    return [files[name] for name in sorted(files)]
+
+
+def _verify_chain(log_files: List[Path]) -> Dict[str, Any]:
+    """按顺序校验一组日志文件构成的哈希链"""
+    issues = []
+    last_hash = None
+    last_version = None
+    
+    # 按顺序读取所有日志文件的所有条目（哈希链是顺序的，单线程校验）
+    for log_file in log_files:
+        records, _ = _file_records(log_file)
+        if _is_binary_log(log_file):
+            decode_entry, version = _decode_binary_entry, _LOG_VERSION
+        else:
+            decode_entry, version = _decode_json_entry, _json_log_version(log_file)
+        # 1.0格式文件按旧算法计算条目哈希；升级后的第一个新格式文件开始新的哈希链
+        compute_hash = (AuditLogEntry.compute_legacy_hash if version == _LEGACY_LOG_VERSION
+                        else AuditLogEntry.compute_hash)
+        if last_version is not None and version != last_version:
+            last_hash = None
+        last_version = version
+        for record in records:
+            try:
+                entry = decode_entry(record)
+                
+                # 验证哈希链
+                if last_hash and entry.prev_hash != last_hash:
+                    issues.append(f"Hash chain broken at {entry.timestamp}")
+                
+                # 验证条目哈希
+                computed_hash = compute_hash(entry)
+                if entry.hash != computed_hash:
+                    issues.append(f"Entry hash mismatch at {entry.timestamp}")
+                
+                last_hash = entry.hash
+            except Exception as e:
+                issues.append(f"Failed to parse entry: {e}")
+    
+    return {
+        'valid': len(issues) == 0,
+        'issues': issues,
+        'last_hash': last_hash
+    }
+
+
+def _last_entry_hash(log_files: List[Path]) -> Optional[str]:
+    """
+    返回已有日志中最后一条可解析条目的哈希，新的记录器从这里续接哈希链；
+    最新的文件为1.0旧格式时返回None（新格式文件开始新的哈希链，与_verify_chain一致）
+    """
+    for log_file in reversed(log_files):
+        if _is_binary_log(log_file):
+            decode_entry = _decode_binary_entry
+        elif _json_log_version(log_file) == _LEGACY_LOG_VERSION:
+            return None
+        else:
+            decode_entry = _decode_json_entry
+        last_hash = None
+        records, _ = _file_records(log_file)
+        for record in records:
+            try:
+                last_hash = decode_entry(record).hash
+            except Exception:
+                continue  # 崩溃时写了一半的行不计入哈希链
+        if last_hash is not None:
+            return last_hash
+    return None
+
+
+def _combine_hashes(hashes: List[Optional[str]]) -> Optional[str]:
+    """将多条哈希链的最后哈希按顺序合并为一个摘要（全部为None时返回None）"""
+    if not any(hashes):
+        return None
+    h = _SHA256_PROTO.copy()
+    for value in hashes:
+        h.update(_FIELD_LEN.pack(len(value or "")))
+        h.update((value or "").encode())
+    return h.hexdigest()
+
+
+def _compress_sealed(sealed_file: Path):
+    """将已封存的日志文件压缩为 .gz（先写临时文件再原子改名）后删除原文件"""
+    gz_file = sealed_file.with_name(sealed_file.name + '.gz')
+    tmp_file = sealed_file.with_name(sealed_file.name + '.gz.tmp')
+    try:
+        with open(sealed_file, 'rb') as src, open(tmp_file, 'wb') as raw:
+            with gzip.GzipFile(filename=sealed_file.name, fileobj=raw, mode='wb', compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            raw.flush()
+            os.fsync(raw.fileno())
+    except BaseException:
+        # 压缩失败时保留未压缩的原文件（仍可正常读取），只清理临时文件
+        if tmp_file.exists():
+            tmp_file.unlink()
+        raise
+    os.replace(tmp_file, gz_file)
+    sealed_file.unlink()
+
+
+class _AuditWriter:
+    """
+    审计日志的文件写入端（组提交）：持有长期打开的文件描述符和后台写线程
+    
+    后台写线程只引用本对象而不引用AuditLogger，AuditLogger可以被正常回收，
+    回收或解释器退出时由weakref.finalize调用close()，写完已入队的条目并落盘
+    """
+    
+    def __init__(self, audit_dir: Path, max_file_size: int, format: str):
+        self.audit_dir = audit_dir
+        self.max_file_size = max_file_size
+        self.format = format
+        self.log_file = self._new_log_path()
         self._ensure_log_file()
+        self._fd = os.open(str(self.log_file), _OPEN_FLAGS, 0o644)
+        self._file_size = os.fstat(self._fd).st_size
+        self._closed = False
+        self._file_lock = threading.Lock()  # 保护轮转时的文件切换（sync可能同时fsync当前文件）
+        self._pending: List[bytes] = []
+        self._queued = 0  # 已入队的行数
+        self._written = 0  # 已写入文件的行数
+        self._cond = threading.Condition(threading.Lock())
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+        
+        # 轮转封存的文件由压缩线程压缩，写线程只切换文件，不因压缩阻塞写入和sync
+        self._sealed: List[Path] = []
+        self._sealed_closed = False
+        self._sealed_cond = threading.Condition(threading.Lock())
+        self._compressor: Optional[threading.Thread] = None
+    
+    def _new_log_path(self) -> Path:
+        """生成新日志文件路径（同一秒内轮转时追加序号，文件名排序即时间顺序）"""
+        stem = f"audit_{int(time.time())}"
+        ext = ".bin" if self.format == "binary" else ".log"
+        seq = 0
+        log_file = self.audit_dir / f"{stem}{ext}"
+        while log_file.exists() or log_file.with_name(log_file.name + '.gz').exists():
+            seq += 1
+            log_file = self.audit_dir / f"{stem}_{seq:04d}{ext}"
+        return log_file
     
     def _ensure_log_file(self):
         """确保日志文件存在"""
         if not self.log_file.exists():
-            with open(self.log_file, 'w') as f:
+            with open(self.log_file, 'wb') as f:
                 # 写入文件头
+                if self.format == "binary":
+                    f.write(_BIN_MAGIC)
+                    return
                 header = {
                     'type': 'audit_log',
                     'created_at': time.time(),
-                    'version': '1.0'
+                    'version': _LOG_VERSION
                 }
-                f.write(json.dumps(header) + '\n')
+                f.write(_dumps_line(header))
+    
+    def enqueue(self, line: bytes) -> bool:
+        """放入待写队列，不等待写盘；已关闭时返回False"""
+        with self._cond:
+            if self._closed:
+                return False
+            self._pending.append(line)
+            self._queued += 1
+            self._cond.notify_all()
+        return True
+    
+    def _write_loop(self):
+        """后台写线程：取走队列中积累的全部行，一次系统调用写入文件；关闭后写完剩余的行再退出"""
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                lines, self._pending = self._pending, []
+            try:
+                self._write_lines(lines)
+                self._file_size += sum(map(len, lines))
+                if self._file_size >= self.max_file_size:
+                    self._rotate()
+            except Exception:
+                pass  # 文件写入失败不应影响主操作
+            with self._cond:
+                self._written += len(lines)
+                self._cond.notify_all()
+    
+    def _write_lines(self, lines: List[bytes]):
+        """写入多行：支持writev时分散写入，避免先拼接成一个大缓冲区"""
+        fd = self._fd
+        for start in range(0, len(lines), _WRITEV_MAX):
+            chunk = lines[start:start + _WRITEV_MAX]
+            written = os.writev(fd, chunk) if hasattr(os, 'writev') else 0
+            if written < sum(map(len, chunk)):
+                # 未全部写入（或不支持writev）时，剩余部分逐段补写
+                data = memoryview(b"".join(chunk))[written:]
+                while data:
+                    data = data[os.write(fd, data):]
+    
+    def _rotate(self):
+        """
+        轮转日志文件（在后台写线程中执行）：切换到新文件继续写入，
+        旧文件落盘后交给压缩线程压缩为 .gz
+        """
+        with self._file_lock:
+            sealed_file, sealed_fd = self.log_file, self._fd
+            self.log_file = self._new_log_path()
+            self._ensure_log_file()
+            self._fd = os.open(str(self.log_file), _OPEN_FLAGS, 0o644)
+            self._file_size = os.fstat(self._fd).st_size
+            os.fsync(sealed_fd)
+            os.close(sealed_fd)
+        
+        with self._sealed_cond:
+            self._sealed.append(sealed_file)
+            if self._compressor is None:
+                self._compressor = threading.Thread(target=self._compress_loop, daemon=True)
+                self._compressor.start()
+            self._sealed_cond.notify_all()
+    
+    def _compress_loop(self):
+        """压缩线程：依次压缩已封存的文件；写线程结束后压缩完剩余的文件再退出"""
+        while True:
+            with self._sealed_cond:
+                while not self._sealed and not self._sealed_closed:
+                    self._sealed_cond.wait()
+                if not self._sealed:
+                    return
+                sealed_file = self._sealed[0]
+            try:
+                _compress_sealed(sealed_file)
+            except Exception:
+                pass  # 压缩失败不应影响主操作，未压缩的文件仍可读取
+            with self._sealed_cond:
+                self._sealed.pop(0)
+                self._sealed_cond.notify_all()
+    
+    def drain(self):
+        """等待已入队的条目全部写入文件（不落盘）"""
+        with self._cond:
+            target = self._queued
+            while self._written < target:
+                self._cond.wait()
+    
+    def settle(self):
+        """等待已入队的条目全部写入文件，且已封存的文件全部压缩完成（读取日志文件前调用）"""
+        self.drain()
+        with self._sealed_cond:
+            while self._sealed:
+                self._sealed_cond.wait()
+    
+    def sync(self):
+        """等待已入队的条目全部写入文件并落盘（不等待压缩）"""
+        self.drain()
+        with self._file_lock:
+            if not self._closed:
+                os.fsync(self._fd)
+    
+    def close(self):
+        """停止接收新条目，等待后台写线程写完已入队的条目，落盘后关闭文件（只执行一次）"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        with self._file_lock:
+            os.fsync(self._fd)
+            os.close(self._fd)
+        with self._sealed_cond:
+            self._sealed_closed = True
+            self._sealed_cond.notify_all()
+        if self._compressor is not None:
+            self._compressor.join()
+
+
+class _AuditLoggerBase(ABC):
+    """
+    审计日志记录器的公共接口：AuditLogger与ShardedAuditLogger都实现log_operation / sync / close
+    和_log_files，便捷记录方法与统计、审计轨迹查询基于这几个方法实现
+    """
+    
+    parallel_scan = False
     
+    @abstractmethod
     def log_operation(self, 
                      operation: OperationType,
                      operator: Optional[str] = None,
@@ -97,41 +800,36 @@ class AuditLogger:
                      success: bool = True,
                      error: Optional[str] = None,
                      metadata: Optional[Dict[str, Any]] = None):
-        """记录操作（优化：减少锁持有时间）"""
-        try:
-            with self.lock:
-                # 计算值的哈希（不存储实际值，保护隐私）
-                value_hash = None
-                if value:
-                    value_hash = hashlib.sha256(value).hexdigest()
-                
-                # 创建日志条目
-                entry = AuditLogEntry(
-                    timestamp=time.time(),
-                    operation=operation.value,
-                    operator=operator,
-                    key=key,
-                    value_hash=value_hash,
-                    success=success,
-                    error=error,
-                    metadata=metadata,
-                    prev_hash=self.last_hash
-                )
-                
-                # 计算哈希
-                entry.hash = entry.compute_hash()
-                
-                # 写入日志文件（优化：使用追加模式，减少文件操作开销）
-                try:
-                    with open(self.log_file, 'a') as f:
-                        f.write(json.dumps(entry.to_dict()) + '\n')
-                except Exception:
-                    pass  # 文件写入失败不应影响主操作
-                
-                # 更新最后一个哈希
-                self.last_hash = entry.hash
-        except Exception:
-            pass  # 审计日志失败不应影响主操作
+        """记录操作"""
+    
+    @abstractmethod
+    def sync(self):
+        """等待已记录的条目全部写入文件并落盘"""
+    
+    @abstractmethod
+    def close(self):
+        """关闭审计日志"""
+    
+    @abstractmethod
+    def _log_files(self) -> List[Path]:
+        """返回全部日志文件（读取前等待已记录的条目写入）"""
+    
+    @abstractmethod
+    def verify_integrity(self) -> Dict[str, Any]:
+        """验证审计日志完整性，返回 valid / issues / last_hash"""
+    
+    def _map_files(self, scan_fn, *args) -> List[Any]:
+        """
+        对每个日志文件执行只读扫描函数，按文件顺序返回各文件的结果
+        启用parallel_scan、多个文件且总量较大时使用多进程并行扫描（各文件之间没有共享状态）
+        """
+        log_files = self._log_files()
+        if self.parallel_scan and len(log_files) > 1 and \
+                sum(log_file.stat().st_size for log_file in log_files) >= _PARALLEL_SCAN_BYTES:
+            workers = min(len(log_files), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(scan_fn, log_files, *[[arg] * len(log_files) for arg in args]))
+        return [scan_fn(log_file, *args) for log_file in log_files]
     
     def log_put(self, key: bytes, value: bytes, operator: Optional[str] = None):
         """记录PUT操作"""
@@ -180,90 +878,20 @@ class AuditLogger:
             error=error
         )
     
-    def verify_integrity(self) -> Dict[str, Any]:
-        """验证审计日志完整性（检查哈希链）"""
-        issues = []
-        last_hash = None
-        
-        # 读取所有日志文件
-        log_files = sorted(self.audit_dir.glob("audit_*.log"))
-        
-        for log_file in log_files:
-            with open(log_file, 'r') as f:
-                # 跳过文件头
-                first_line = f.readline()
-                if first_line.startswith('{"type":'):
-                    continue
-                
-                # 读取所有条目
-                for line in f:
-                    if not line.strip():
-                        continue
-                    try:
-                        entry_dict = json.loads(line)
-                        entry = AuditLogEntry(**entry_dict)
-                        
-                        # 验证哈希链
-                        if last_hash and entry.prev_hash != last_hash:
-                            issues.append(f"Hash chain broken at {entry.timestamp}")
-                        
-                        # 验证条目哈希
-                        computed_hash = entry.compute_hash()
-                        if entry.hash != computed_hash:
-                            issues.append(f"Entry hash mismatch at {entry.timestamp}")
-                        
-                        last_hash = entry.hash
-                    except Exception as e:
-                        issues.append(f"Failed to parse entry: {e}")
-        
-        return {
-            'valid': len(issues) == 0,
-            'issues': issues,
-            'last_hash': last_hash
-        }
-    
     def get_audit_trail(self, 
                        start_time: Optional[float] = None,
                        end_time: Optional[float] = None,
                        operation: Optional[OperationType] = None,
                        operator: Optional[str] = None) -> List[Dict[str, Any]]:
-        """获取审计轨迹"""
+        """获取审计轨迹（各文件独立扫描，结果按文件顺序合并）"""
+        operation_value = operation.value if operation else None
         results = []
-        
-        log_files = sorted(self.audit_dir.glob("audit_*.log"))
-        
-        for log_file in log_files:
-            with open(log_file, 'r') as f:
-                # 跳过文件头
-                first_line = f.readline()
-                if first_line.startswith('{"type":'):
-                    continue
-                
-                for line in f:
-                    if not line.strip():
-                        continue
-                    try:
-                        entry_dict = json.loads(line)
-                        entry = AuditLogEntry(**entry_dict)
-                        
-                        # 过滤
-                        if start_time and entry.timestamp < start_time:
-                            continue
-                        if end_time and entry.timestamp > end_time:
-                            continue
-                        if operation and entry.operation != operation.value:
-                            continue
-                        if operator and entry.operator != operator:
-                            continue
-                        
-                        results.append(entry_dict)
-                    except Exception:
-                        continue
-        
+        for partial in self._map_files(_scan_trail, start_time, end_time, operation_value, operator):
+            results.extend(partial)
         return results
     
     def get_statistics(self) -> Dict[str, Any]:
-        """获取审计统计信息"""
+        """获取审计统计信息（各文件独立统计后汇总）"""
         stats = {
             'total_operations': 0,
             'operations_by_type': {},
@@ -272,45 +900,247 @@ class AuditLogger:
             'error_count': 0
         }
         
-        log_files = sorted(self.audit_dir.glob("audit_*.log"))
         total_success = 0
         
-        for log_file in log_files:
-            with open(log_file, 'r') as f:
-                # 跳过文件头
-                first_line = f.readline()
-                if first_line.startswith('{"type":'):
-                    continue
-                
-                for line in f:
-                    if not line.strip():
-                        continue
-                    try:
-                        entry_dict = json.loads(line)
-                        entry = AuditLogEntry(**entry_dict)
-                        
-                        stats['total_operations'] += 1
-                        
-                        # 按类型统计
-                        op_type = entry.operation
-                        stats['operations_by_type'][op_type] = \
-                            stats['operations_by_type'].get(op_type, 0) + 1
-                        
-                        # 按操作者统计
-                        if entry.operator:
-                            stats['operations_by_operator'][entry.operator] = \
-                                stats['operations_by_operator'].get(entry.operator, 0) + 1
-                        
-                        # 成功/失败统计
-                        if entry.success:
-                            total_success += 1
-                        else:
-                            stats['error_count'] += 1
-                    except Exception:
-                        continue
+        for total, by_type, by_operator, success, errors in self._map_files(_scan_statistics):
+            stats['total_operations'] += total
+            for op_type, count in by_type.items():
+                stats['operations_by_type'][op_type] = \
+                    stats['operations_by_type'].get(op_type, 0) + count
+            for entry_operator, count in by_operator.items():
+                stats['operations_by_operator'][entry_operator] = \
+                    stats['operations_by_operator'].get(entry_operator, 0) + count
+            total_success += success
+            stats['error_count'] += errors
         
         if stats['total_operations'] > 0:
             stats['success_rate'] = total_success / stats['total_operations']
         
         return stats
 
+
+class AuditLogger(_AuditLoggerBase):
+    """审计日志记录器（区块链优化版本）"""
+    
+    def __init__(self, audit_dir: str = "./audit_logs", max_file_size: int = _ROTATE_BYTES,
+                 mode: str = "full", sample_rate: int = 1, format: str = "json",
+                 parallel_scan: bool = False):
+        """
+        Args:
+            audit_dir: 审计日志目录
+            max_file_size: 单个日志文件的轮转大小（字节），轮转后旧文件压缩为 .gz
+            mode: 审计模式（off / sample / full）
+            sample_rate: sample模式下每sample_rate条成功操作记录1条
+            format: 新写入日志的格式（json / binary），读取时按文件自动识别
+            parallel_scan: 历史日志较大时，统计和审计轨迹查询是否使用多进程并行扫描。
+                默认关闭：在多线程进程中fork子进程不安全，spawn方式下（以及PyInstaller打包后）
+                子进程会重新执行 __main__，只应在调用方确认入口受 if __name__ == '__main__' 保护时开启
+        """
+        if mode not in AUDIT_MODES:
+            raise ValueError(f"Unknown audit mode: {mode}")
+        if sample_rate < 1:
+            raise ValueError(f"sample_rate must be >= 1, got {sample_rate}")
+        if format not in AUDIT_FORMATS:
+            raise ValueError(f"Unknown audit log format: {format}")
+        self.format = format
+        self._encode = _encode_binary if format == "binary" else _encode_json
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.parallel_scan = parallel_scan
+        self._sample_counter = itertools.count(1)
+        self.audit_dir = Path(audit_dir)
+        self.audit_dir.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+        # 在已有日志的目录中重新打开时续接最后一条条目的哈希链，校验时不会在重启处断开
+        self.last_hash: Optional[str] = _last_entry_hash(_list_log_files(self.audit_dir))
+        self.max_file_size = max_file_size
+        
+        # 组提交：log_operation只把编码好的行放入待写队列，由后台线程合并写入长期打开的文件描述符；
+        # 对象被回收或解释器退出时自动关闭，已记录的条目不会丢失，文件描述符和线程也不会泄漏
+        self._writer = _AuditWriter(self.audit_dir, max_file_size, format)
+        self._finalizer = weakref.finalize(self, self._writer.close)
+    
+    @property
+    def log_file(self) -> Path:
+        """当前写入的日志文件"""
+        return self._writer.log_file
+    
+    def log_operation(self, 
+                     operation: OperationType,
+                     operator: Optional[str] = None,
+                     key: Optional[bytes] = None,
+                     value: Optional[bytes] = None,
+                     success: bool = True,
+                     error: Optional[str] = None,
+                     metadata: Optional[Dict[str, Any]] = None):
+        """记录操作（优化：减少锁持有时间）"""
+        # 抽样判断在加锁和计算哈希之前完成，未抽中的操作没有任何额外开销
+        if self.mode != "full":
+            if self.mode == "off":
+                return
+            if success and next(self._sample_counter) % self.sample_rate:
+                return
+        
+        # 计算值的哈希（不存储实际值，保护隐私；与哈希链无关，在锁外计算）
+        value_hash = None
+        if value:
+            h = _SHA256_PROTO.copy()
+            h.update(value)
+            value_hash = h.hexdigest()
+        
+        with self.lock:
+            # 创建日志条目
+            entry = AuditLogEntry(
+                timestamp=time.time(),
+                operation=operation.value,
+                operator=operator,
+                key=key,
+                value_hash=value_hash,
+                success=success,
+                error=error,
+                metadata=metadata,
+                prev_hash=self.last_hash
+            )
+            
+            # 计算哈希并编码；只有元数据无法序列化时会失败，此时不记录该条目、哈希链不前进
+            try:
+                entry.hash = entry.compute_hash()
+                line = self._encode(entry)
+            except (TypeError, ValueError):
+                return  # 审计日志失败不应影响主操作
+            
+            # 放入待写队列（在self.lock内入队，保证文件中的顺序与哈希链一致），不等待写盘；
+            # 文件写入在后台写线程中进行，写入异常也在那里处理；已关闭时丢弃，哈希链不前进
+            if self._writer.enqueue(line):
+                # 更新最后一个哈希
+                self.last_hash = entry.hash
+    
+    def sync(self):
+        """等待已记录的条目全部写入文件并落盘（由Database.flush调用）"""
+        self._writer.sync()
+    
+    def close(self):
+        """关闭审计日志：停止接收新条目，等待后台写线程写完已记录的条目，落盘后关闭文件"""
+        self._finalizer()
+    
+    def _log_files(self) -> List[Path]:
+        """按时间顺序返回所有日志文件（JSON和二进制格式，含已轮转压缩的 .gz）"""
+        # 先等待后台写线程写完已记录的条目、压缩线程压缩完已封存的文件，避免读到半行或文件在读取前被删除
+        self._writer.settle()
+        return _list_log_files(self.audit_dir)
+    
+    def verify_integrity(self) -> Dict[str, Any]:
+        """验证审计日志完整性（检查哈希链）"""
+        return _verify_chain(self._log_files())
+
+
+class ShardedAuditLogger(_AuditLoggerBase):
+    """
+    分片审计日志记录器：由N个独立的AuditLogger分片组成，每个分片有自己的锁、文件描述符、
+    哈希链和后台写线程，并发写入不再争用同一把锁
+    
+    指定operator的操作按operator哈希路由，同一操作者的所有条目在同一条哈希链上；
+    未指定operator的操作固定路由到调用线程首次分配到的分片
+    
+    启用分片前写在audit_dir根目录下的日志（单个AuditLogger写入的历史）作为一条只读的哈希链，
+    同样参与统计、审计轨迹查询和完整性校验
+    """
+    
+    def __init__(self, audit_dir: str = "./audit_logs", shards: int = 4, **kwargs):
+        """
+        Args:
+            audit_dir: 审计日志目录，各分片写入其下的 shard_<i> 子目录
+            shards: 分片数
+            **kwargs: 传给每个分片AuditLogger的参数（max_file_size / mode / sample_rate / format / parallel_scan）
+        """
+        if shards < 1:
+            raise ValueError(f"shards must be >= 1, got {shards}")
+        self.audit_dir = Path(audit_dir)
+        self._shards = [AuditLogger(str(self.audit_dir / f"shard_{i}"), **kwargs) for i in range(shards)]
+        self.mode = self._shards[0].mode
+        self.format = self._shards[0].format
+        self.sample_rate = self._shards[0].sample_rate
+        self.max_file_size = self._shards[0].max_file_size
+        self.parallel_scan = self._shards[0].parallel_scan
+        self._local = threading.local()
+        self._next_shard = itertools.count()
+    
+    @property
+    def last_hash(self) -> Optional[str]:
+        """各分片哈希链的最后哈希合并后的摘要（所有分片都没有条目时为None）"""
+        return _combine_hashes([shard.last_hash for shard in self._shards])
+    
+    @property
+    def log_file(self) -> Path:
+        """当前线程未指定operator时写入的日志文件"""
+        return self._shard_for(None).log_file
+    
+    def _shard_for(self, operator: Optional[str]) -> AuditLogger:
+        """选择分片：按operator的CRC32路由（跨进程稳定），否则使用当前线程的分片"""
+        if operator:
+            return self._shards[zlib.crc32(operator.encode('utf-8')) % len(self._shards)]
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            # 线程标识是对齐的地址，直接取模分布不均，改为按线程首次记录的顺序轮流分配
+            shard = self._local.shard = self._shards[next(self._next_shard) % len(self._shards)]
+        return shard
+    
+    def log_operation(self, 
+                     operation: OperationType,
+                     operator: Optional[str] = None,
+                     key: Optional[bytes] = None,
+                     value: Optional[bytes] = None,
+                     success: bool = True,
+                     error: Optional[str] = None,
+                     metadata: Optional[Dict[str, Any]] = None):
+        """记录操作（只持有所选分片的锁）"""
+        self._shard_for(operator).log_operation(operation, operator=operator, key=key, value=value,
+                                                success=success, error=error, metadata=metadata)
+    
+    def sync(self):
+        """等待所有分片已记录的条目写入文件并落盘"""
+        for shard in self._shards:
+            shard.sync()
+    
+    def close(self):
+        """关闭所有分片"""
+        for shard in self._shards:
+            shard.close()
+    
+    def _log_files(self) -> List[Path]:
+        """返回根目录的历史日志和所有分片的日志文件（各自按时间顺序）"""
+        files = _list_log_files(self.audit_dir)
+        for shard in self._shards:
+            files.extend(shard._log_files())
+        return files
+    
+    def verify_integrity(self) -> Dict[str, Any]:
+        """
+        验证审计日志完整性：根目录历史日志和各分片的哈希链独立校验，问题前加来源；
+        last_hash与self.last_hash一致，last_hashes为各分片的最后哈希
+        """
+        issues = []
+        history = _verify_chain(_list_log_files(self.audit_dir))
+        issues.extend(f"root: {issue}" for issue in history['issues'])
+        last_hashes = []
+        for i, shard in enumerate(self._shards):
+            result = shard.verify_integrity()
+            issues.extend(f"shard {i}: {issue}" for issue in result['issues'])
+            last_hashes.append(result['last_hash'])
+        
+        return {
+            'valid': len(issues) == 0,
+            'issues': issues,
+            'last_hash': _combine_hashes(last_hashes),
+            'last_hashes': last_hashes
+        }
+    
+    def get_audit_trail(self, 
+                       start_time: Optional[float] = None,
+                       end_time: Optional[float] = None,
+                       operation: Optional[OperationType] = None,
+                       operator: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取审计轨迹（合并根目录历史和各分片的结果后按时间排序）"""
+        results = super().get_audit_trail(start_time, end_time, operation, operator)
+        results.sort(key=lambda entry: entry['timestamp'])
+        return results
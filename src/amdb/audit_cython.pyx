@@ -0,0 +1,76 @@
+"""
+审计日志哈希Cython优化版本
+直接调用OpenSSL的EVP接口逐字段计算SHA-256，不在Python层拼接缓冲区
+编码与 AuditLogEntry.compute_hash 的纯Python实现逐字节一致
+"""
+
+# cython: language_level=3
+# cython: boundscheck=False
+# cython: wraparound=False
+
+import sys
+from libc.stdint cimport uint32_t
+from libc.string cimport memcpy
+
+cdef extern from "openssl/evp.h":
+    ctypedef struct EVP_MD_CTX:
+        pass
+    ctypedef struct EVP_MD:
+        pass
+    ctypedef struct ENGINE:
+        pass
+    const EVP_MD *EVP_sha256()
+    EVP_MD_CTX *EVP_MD_CTX_new()
+    void EVP_MD_CTX_free(EVP_MD_CTX *ctx)
+    int EVP_DigestInit_ex(EVP_MD_CTX *ctx, const EVP_MD *type, ENGINE *impl)
+    int EVP_DigestUpdate(EVP_MD_CTX *ctx, const void *d, size_t cnt)
+    int EVP_DigestFinal_ex(EVP_MD_CTX *ctx, unsigned char *md, unsigned int *s)
+
+# 定长头直接复制double的内存表示，与struct.pack('<d?')一致的前提是小端平台；
+# 大端平台上导入失败，由audit.py回退到纯Python实现
+if sys.byteorder != 'little':
+    raise ImportError("audit_cython requires a little-endian platform")
+
+
+cdef inline int _update_field(EVP_MD_CTX *ctx, bytes field) except -1:
+    """写入一个变长字段：4字节小端长度前缀 + 字段内容"""
+    cdef uint32_t n = <uint32_t>len(field)
+    cdef unsigned char prefix[4]
+    prefix[0] = n & 0xff
+    prefix[1] = (n >> 8) & 0xff
+    prefix[2] = (n >> 16) & 0xff
+    prefix[3] = (n >> 24) & 0xff
+    if not EVP_DigestUpdate(ctx, prefix, 4) or not EVP_DigestUpdate(ctx, <const char *>field, n):
+        raise MemoryError("EVP_DigestUpdate failed")
+    return 0
+
+
+def compute_entry_hash(double timestamp, bint success, tuple fields):
+    """
+    计算审计条目哈希
+    Args:
+        timestamp: 条目时间戳
+        success: 成功标志
+        fields: 按固定顺序排列的变长字段（bytes）
+    Returns:
+        十六进制SHA-256摘要
+    """
+    cdef unsigned char header[9]
+    cdef unsigned char digest[32]
+    cdef unsigned int digest_len = 0
+    cdef bytes field
+    cdef EVP_MD_CTX *ctx = EVP_MD_CTX_new()
+    if ctx == NULL:
+        raise MemoryError()
+    try:
+        memcpy(header, &timestamp, 8)
+        header[8] = 1 if success else 0
+        if not EVP_DigestInit_ex(ctx, EVP_sha256(), NULL) or not EVP_DigestUpdate(ctx, header, 9):
+            raise MemoryError("EVP_DigestInit_ex failed")
+        for field in fields:
+            _update_field(ctx, field)
+        if not EVP_DigestFinal_ex(ctx, digest, &digest_len):
+            raise MemoryError("EVP_DigestFinal_ex failed")
+    finally:
+        EVP_MD_CTX_free(ctx)
+    return (<bytes>digest[:digest_len]).hex()
@@ -4,15 +4,340 @@
 """
 
 import os
+import sys
 import shutil
+import io
 import json
 import tarfile
+import errno
+import gzip
 import hashlib
 import time
-from typing import List, Dict, Optional
+import subprocess
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Iterator, Iterable, Tuple
 from pathlib import Path
 from datetime import datetime
 
+# zlib级别（pigz和标准库gzip使用）：级别6比默认的9快约40%，压缩率损失不到1%
+_ZLIB_LEVEL = 6
+
+try:
+    # ISA-L的SIMD DEFLATE实现，单线程压缩速度约为zlib的3倍（级别范围0-3，与zlib的级别不通用）
+    from isal.igzip import IGzipFile as _GzipFile, compress as _gzip_compress
+    _GZIP_LEVEL = 2
+except ImportError:
+    from gzip import GzipFile as _GzipFile, compress as _gzip_compress
+    _GZIP_LEVEL = _ZLIB_LEVEL
+
+try:
+    # 并行gzip解压：先定位DEFLATE块边界，再多线程解压各段，随核数近线性加速
+    import rapidgzip
+except ImportError:
+    rapidgzip = None
+
+# SHA-256构造函数在导入时选定一次：CPython链接OpenSSL时hashlib.sha256即OpenSSL EVP实现，
+# OpenSSL 1.1.1+在支持SHA-NI/ARMv8 SHA扩展的CPU上会自动使用硬件指令；
+# 否则回退到hashlib.new（同样优先走OpenSSL，最终为内置实现）
+if getattr(hashlib.sha256, '__name__', '').startswith('openssl_'):
+    _sha256_ctor = hashlib.sha256
+    SHA256_BACKEND = "openssl"
+else:
+    def _sha256_ctor():
+        return hashlib.new("sha256")
+    SHA256_BACKEND = "builtin"
+
+# 校验和读取块大小：大块读取减少系统调用和Python层循环，让硬件SHA指令保持满负荷
+_CHECKSUM_CHUNK = 1024 * 1024
+
+# tar流式读写参数：bufsize为流的块大小（默认仅10KiB）；copybufsize（3.8+）为tar.add/extract
+# 复制文件内容时每次读写的大小（默认16KiB），都放大到1MiB，减少小块读写和切片
+_TAR_STREAM_OPTIONS = {'bufsize': _CHECKSUM_CHUNK}
+if sys.version_info >= (3, 8):
+    _TAR_STREAM_OPTIONS['copybufsize'] = _CHECKSUM_CHUNK
+
+# 并行压缩时每个gzip成员的原始数据大小（块越大压缩率越接近单流压缩）
+_GZIP_BLOCK = 4 * 1024 * 1024
+
+# 构建文件索引时并行扫描顶层子目录的线程数（目录扫描以等待I/O为主）
+_SCAN_WORKERS = 8
+
+# 归档时提前准备的文件数（预读窗口），以及在线程池中整体读入内存的文件大小上限；
+# 内存占用不超过 窗口 × 上限
+_READAHEAD_DEPTH = 32
+_READAHEAD_INLINE_BYTES = 1024 * 1024
+_fadvise = getattr(os, 'posix_fadvise', None)
+
+
+class _HashingWriter:
+    """写入文件的同时更新SHA-256：归档写完即得到校验和，无需再把文件读一遍"""
+    
+    def __init__(self, f):
+        self.f = f
+        self.h = _sha256_ctor()
+    
+    def write(self, data) -> int:
+        self.h.update(data)
+        return self.f.write(data)
+    
+    def flush(self):
+        self.f.flush()
+
+
+def _pigz_command() -> Optional[List[str]]:
+    """系统安装了pigz时返回多线程gzip压缩命令，否则返回None"""
+    if shutil.which("pigz") is None:
+        return None
+    return ["pigz", "-p", str(os.cpu_count() or 1), f"-{_ZLIB_LEVEL}", "-c"]
+
+
+def _pump(src, dst, errors: List[BaseException]):
+    """把压缩进程的输出复制到目标文件（在线程中执行，异常记录到errors）"""
+    try:
+        shutil.copyfileobj(src, dst, _CHECKSUM_CHUNK)
+    except BaseException as e:
+        errors.append(e)
+
+
+class _ParallelGzipWriter:
+    """
+    多线程gzip压缩：写入的数据按块切分，每块在线程池中独立压缩为一个gzip成员
+    （zlib压缩期间释放GIL），按顺序写入fileobj；多成员串接仍是合法的gzip文件
+    """
+    
+    def __init__(self, fileobj, workers: int):
+        self._fileobj = fileobj
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._pending = deque()
+        self._max_pending = 2 * workers  # 内存占用不超过 2 × 线程数 × 块大小
+        self._buffer = bytearray()
+    
+    def _submit(self, data: bytes):
+        self._pending.append(self._executor.submit(_gzip_compress, data, _GZIP_LEVEL))
+        while len(self._pending) >= self._max_pending:
+            self._fileobj.write(self._pending.popleft().result())
+    
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= _GZIP_BLOCK:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        return len(data)
+    
+    def close(self):
+        """压缩剩余数据，等待所有块按顺序写出"""
+        try:
+            if self._buffer or not self._pending:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._fileobj.write(self._pending.popleft().result())
+        finally:
+            self._executor.shutdown(wait=True)
+    
+    def abort(self):
+        """归档失败时丢弃尚未写出的块并停止线程池"""
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
+
+
+@contextmanager
+def _gzip_stream(fileobj):
+    """
+    返回一个可写流，写入的数据gzip压缩后写入fileobj
+    有pigz时交给pigz多核并行压缩（输出经管道回传，仍经过fileobj以便计算校验和），
+    否则在进程内压缩（多核时分块并行压缩；安装了isal时使用ISA-L）
+    """
+    command = _pigz_command()
+    if command is None:
+        workers = os.cpu_count() or 1
+        if workers == 1:
+            with _GzipFile(fileobj=fileobj, mode='wb', compresslevel=_GZIP_LEVEL) as gz:
+                yield gz
+            return
+        writer = _ParallelGzipWriter(fileobj, workers)
+        try:
+            yield writer
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+        return
+    
+    proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    errors: List[BaseException] = []
+    pump = threading.Thread(target=_pump, args=(proc.stdout, fileobj, errors), daemon=True)
+    pump.start()
+    try:
+        yield proc.stdin
+    finally:
+        proc.stdin.close()
+        pump.join()
+        proc.stdout.close()
+        returncode = proc.wait()
+    if errors:
+        raise errors[0]
+    if returncode != 0:
+        raise OSError(f"{command[0]} exited with status {returncode}")
+
+
+def _scan_tree(root: str) -> Iterator[Tuple[str, os.stat_result]]:
+    """递归列出目录下的所有文件及其stat（scandir按目录项类型判断，不额外stat目录）"""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path, entry.stat()
+
+
+def _build_file_index(root: Path) -> Dict[str, List[int]]:
+    """
+    构建文件索引：相对root父目录的路径（即归档中的路径） -> [mtime_ns, size, inode]
+    顶层各子目录在线程池中并行扫描
+    """
+    # scandir返回的路径均以str(root)开头，替换为目录名即得到归档中的路径
+    root_str = str(root)
+    root_len = len(root_str)
+    arc_root = os.path.basename(root_str)
+    
+    def scan(directory: str) -> Dict[str, List[int]]:
+        return {arc_root + path[root_len:]: [st.st_mtime_ns, st.st_size, st.st_ino]
+                for path, st in _scan_tree(directory)}
+    
+    index = {}
+    subdirs = []
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file():
+                st = entry.stat()
+                index[arc_root + entry.path[root_len:]] = [st.st_mtime_ns, st.st_size, st.st_ino]
+    if subdirs:
+        with ThreadPoolExecutor(max_workers=min(len(subdirs), _SCAN_WORKERS)) as executor:
+            for partial in executor.map(scan, subdirs):
+                index.update(partial)
+    return index
+
+
+def _tree_members(root: Path) -> List[Tuple[str, str, bool]]:
+    """
+    按tar.add递归归档相同的顺序列出目录树成员 (路径, 归档名, 是否普通文件)：
+    目录在其内容之前，同一目录内按名称排序
+    """
+    root_str = str(root)
+    members = [(root_str, os.path.basename(root_str), False)]
+    
+    def walk(path: str, arcname: str):
+        with os.scandir(path) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        for entry in entries:
+            entry_arcname = os.path.join(arcname, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                members.append((entry.path, entry_arcname, False))
+                walk(entry.path, entry_arcname)
+            else:
+                members.append((entry.path, entry_arcname, entry.is_file(follow_symlinks=False)))
+    
+    walk(root_str, members[0][1])
+    return members
+
+
+def _open_ahead(path: str):
+    """
+    预读一个文件（在线程池中执行）：小文件整体读入内存（read期间释放GIL，与主线程压缩并行）；
+    大文件只打开并用posix_fadvise(WILLNEED)提示内核异步预读，由主线程流式复制
+    """
+    f = open(path, 'rb')
+    try:
+        if os.fstat(f.fileno()).st_size <= _READAHEAD_INLINE_BYTES:
+            with f:
+                return io.BytesIO(f.read())
+        if _fadvise is not None:
+            try:
+                _fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            except OSError:
+                pass  # 预读提示失败不影响读取
+        return f
+    except BaseException:
+        f.close()
+        raise
+
+
+class _ReadAhead:
+    """
+    归档预读（生产者/消费者）：线程池按顺序准备后续最多depth个普通文件，
+    主线程按同样顺序取出写入归档，文件读取与压缩重叠
+    """
+    
+    def __init__(self, paths: Iterable[str], depth: int = _READAHEAD_DEPTH):
+        self._paths = iter(paths)
+        self._depth = depth
+        self._window = deque()
+        self._executor = ThreadPoolExecutor(max_workers=min(depth, os.cpu_count() or 1))
+        self._fill()
+    
+    def _fill(self):
+        while len(self._window) < self._depth:
+            path = next(self._paths, None)
+            if path is None:
+                return
+            self._window.append(self._executor.submit(_open_ahead, path))
+    
+    def take(self):
+        """按传入顺序取出下一个文件对象；打开或读取失败时抛出当时的异常"""
+        future = self._window.popleft()
+        self._fill()
+        return future.result()
+    
+    def close(self):
+        """关闭尚未取出的文件并停止线程池"""
+        while self._window:
+            future = self._window.popleft()
+            if not future.cancel() and future.exception() is None:
+                future.result().close()
+        self._executor.shutdown(wait=True)
+
+
+def _add_members(tar: tarfile.TarFile, members: List[Tuple[str, str, bool]]):
+    """把成员 (路径, 归档名, 是否普通文件) 依次写入归档，普通文件经_ReadAhead预读"""
+    readahead = _ReadAhead(path for path, _, is_file in members if is_file)
+    try:
+        for path, arcname, is_file in members:
+            f = readahead.take() if is_file else None
+            try:
+                # 成员大小必须与写入的数据一致（文件在预读后仍可能被追加写入）：
+                # 已打开的文件按同一文件描述符的fstat生成成员信息，内存预读的文件按缓冲区长度
+                if f is not None and not isinstance(f, io.BytesIO):
+                    tarinfo = tar.gettarinfo(arcname=arcname, fileobj=f)
+                else:
+                    tarinfo = tar.gettarinfo(path, arcname)
+                    if tarinfo is not None and tarinfo.isreg() and f is not None:
+                        tarinfo.size = f.getbuffer().nbytes
+                if tarinfo is None:
+                    continue  # 套接字等tar不支持的类型，与tar.add一样跳过
+                if not tarinfo.isreg():
+                    tar.addfile(tarinfo)
+                elif f is not None:
+                    tar.addfile(tarinfo, f)
+                else:
+                    # 扫描后才变成普通文件
+                    with open(path, 'rb') as g:
+                        tar.addfile(tarinfo, g)
+            finally:
+                if f is not None:
+                    f.close()
+    finally:
+        readahead.close()
+
 
 class BackupManager:
     """备份管理器"""
@@ -28,6 +353,7 @@ class BackupManager:
         self.backup_dir.mkdir(parents=True, exist_ok=True)
         self.metadata_file = self.backup_dir / "backup_metadata.json"
         self.metadata = self._load_metadata()
+        self._by_name = self._build_name_index()
     
     def _load_metadata(self) -> Dict:
         """加载备份元数据"""
@@ -36,6 +362,19 @@ class BackupManager:
                 return json.load(f)
         return {'backups': []}
     
+    def _build_name_index(self) -> Dict[str, Dict]:
+        """构建备份名 -> 备份信息的索引（同名时与顺序查找一致，取最早的一个）"""
+        by_name: Dict[str, Dict] = {}
+        for backup in self.metadata['backups']:
+            by_name.setdefault(backup['name'], backup)
+        return by_name
+    
+    def _add_backup(self, backup_info: Dict):
+        """追加备份信息并保存元数据"""
+        self.metadata['backups'].append(backup_info)
+        self._by_name.setdefault(backup_info['name'], backup_info)
+        self._save_metadata()
+    
     def _save_metadata(self):
         """保存备份元数据"""
         with open(self.metadata_file, 'w') as f:
@@ -48,12 +387,17 @@ class BackupManager:
         
         backup_path = self.backup_dir / f"{name}.tar.gz"
         
-        # 创建tar.gz压缩包
-        with tarfile.open(backup_path, 'w:gz') as tar:
-            tar.add(self.data_dir, arcname=os.path.basename(self.data_dir))
+        # 先记录文件索引，供之后的增量备份比对（归档期间修改的文件会在下次增量备份中出现）
+        file_index = _build_file_index(self.data_dir)
         
-        # 计算校验和
-        checksum = self._calculate_checksum(backup_path)
+        # 创建tar.gz压缩包（流式写入，写入时同步计算校验和）
+        with open(backup_path, 'wb') as f:
+            writer = _HashingWriter(f)
+            with _gzip_stream(writer) as stream, \
+                    tarfile.open(fileobj=stream, mode='w|', **_TAR_STREAM_OPTIONS) as tar:
+                _add_members(tar, _tree_members(self.data_dir))
+        checksum = writer.h.hexdigest()
+        self._save_index(name, file_index)
         
         # 保存元数据
         backup_info = {
@@ -64,8 +408,7 @@ class BackupManager:
             'timestamp': time.time(),
             'size': backup_path.stat().st_size
         }
-        self.metadata['backups'].append(backup_info)
-        self._save_metadata()
+        self._add_backup(backup_info)
         
         return str(backup_path)
     
@@ -76,11 +419,7 @@ class BackupManager:
             name = f"incr_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
         # 找到基础备份
-        base_backup = None
-        for backup in self.metadata['backups']:
-            if backup['name'] == base_backup_name:
-                base_backup = backup
-                break
+        base_backup = self._by_name.get(base_backup_name)
         
         if not base_backup:
             raise ValueError(f"Base backup not found: {base_backup_name}")
@@ -88,32 +427,41 @@ class BackupManager:
         backup_path = self.backup_dir / f"{name}.tar.gz"
         
         # 创建增量备份（只备份变更的文件）
-        base_timestamp = base_backup.get('timestamp', 0)
-        
-        with tarfile.open(backup_path, 'w:gz') as tar:
-            changed_files = []
-            for root, dirs, files in os.walk(self.data_dir):
-                for file in files:
-                    file_path = Path(root) / file
-                    # 检查文件修改时间
-                    file_mtime = file_path.stat().st_mtime
-                    # 只备份在基础备份之后修改的文件
-                    if file_mtime > base_timestamp:
-                        tar.add(file_path, arcname=file_path.relative_to(self.data_dir.parent))
-                        changed_files.append(str(file_path))
-            
-            # 记录变更文件列表
-            changes_manifest = {
-                'base_backup': base_backup_name,
-                'changed_files': changed_files,
-                'timestamp': time.time()
-            }
-            manifest_data = json.dumps(changes_manifest).encode()
-            manifest_path = self.backup_dir / f"{name}_manifest.json"
-            with open(manifest_path, 'wb') as f:
-                f.write(manifest_data)
+        file_index = _build_file_index(self.data_dir)
+        base_index = self._load_index(base_backup_name)
+        if base_index is not None:
+            # 与基础备份的文件索引比对：新增文件或mtime/大小/inode变化的文件
+            changed = sorted(path for path, signature in file_index.items()
+                             if base_index.get(path) != signature)
+            deleted_files = sorted(str(self.data_dir.parent / path)
+                                   for path in base_index if path not in file_index)
+        else:
+            # 没有索引的旧备份：只备份在基础备份之后修改的文件
+            base_timestamp_ns = int(base_backup.get('timestamp', 0) * 1e9)
+            changed = sorted(path for path, signature in file_index.items()
+                             if signature[0] > base_timestamp_ns)
+            deleted_files = []
         
-        checksum = self._calculate_checksum(backup_path)
+        with open(backup_path, 'wb') as f:
+            writer = _HashingWriter(f)
+            with _gzip_stream(writer) as stream, \
+                    tarfile.open(fileobj=stream, mode='w|', **_TAR_STREAM_OPTIONS) as tar:
+                changed_files = [str(self.data_dir.parent / path) for path in changed]
+                _add_members(tar, [(file_path, path, True) for file_path, path in zip(changed_files, changed)])
+                
+                # 记录变更文件列表
+                changes_manifest = {
+                    'base_backup': base_backup_name,
+                    'changed_files': changed_files,
+                    'deleted_files': deleted_files,
+                    'timestamp': time.time()
+                }
+                manifest_data = json.dumps(changes_manifest).encode()
+                manifest_path = self.backup_dir / f"{name}_manifest.json"
+                with open(manifest_path, 'wb') as manifest_file:
+                    manifest_file.write(manifest_data)
+        checksum = writer.h.hexdigest()
+        self._save_index(name, file_index)
         
         backup_info = {
             'name': name,
@@ -124,19 +472,14 @@ class BackupManager:
             'timestamp': time.time(),
             'size': backup_path.stat().st_size
         }
-        self.metadata['backups'].append(backup_info)
-        self._save_metadata()
+        self._add_backup(backup_info)
         
         return str(backup_path)
     
     def restore_backup(self, backup_name: str, target_dir: Optional[str] = None):
         """恢复备份"""
         # 找到备份
-        backup_info = None
-        for backup in self.metadata['backups']:
-            if backup['name'] == backup_name:
-                backup_info = backup
-                break
+        backup_info = self._by_name.get(backup_name)
         
         if not backup_info:
             raise ValueError(f"Backup not found: {backup_name}")
@@ -160,8 +503,12 @@ class BackupManager:
             shutil.rmtree(target_dir)
         target_dir.mkdir(parents=True, exist_ok=True)
         
-        # 解压备份
-        with tarfile.open(backup_path, 'r:gz') as tar:
+        # 解压备份（安装了rapidgzip时多线程解压，否则单线程流式解压）
+        if rapidgzip is not None:
+            gz = rapidgzip.open(str(backup_path), parallelization=os.cpu_count() or 1)
+        else:
+            gz = _GzipFile(backup_path, 'rb')
+        with gz, tarfile.open(fileobj=gz, mode='r|', **_TAR_STREAM_OPTIONS) as tar:
             tar.extractall(target_dir.parent)
     
     def list_backups(self) -> List[Dict]:
@@ -170,29 +517,49 @@ class BackupManager:
     
     def delete_backup(self, backup_name: str):
         """删除备份"""
-        backup_info = None
-        for i, backup in enumerate(self.metadata['backups']):
-            if backup['name'] == backup_name:
-                backup_info = backup
-                # 删除文件
-                backup_path = Path(backup['path'])
-                if backup_path.exists():
-                    backup_path.unlink()
-                # 从元数据中删除
-                self.metadata['backups'].pop(i)
-                break
-        
-        if backup_info:
-            self._save_metadata()
-        else:
+        backup_info = self._by_name.get(backup_name)
+        if not backup_info:
             raise ValueError(f"Backup not found: {backup_name}")
+        
+        # 删除文件
+        backup_path = Path(backup_info['path'])
+        if backup_path.exists():
+            backup_path.unlink()
+        index_path = self._index_path(backup_name)
+        if index_path.exists():
+            index_path.unlink()
+        
+        # 从元数据中删除（删除不频繁，直接重建索引，同名的其他备份随之可见）
+        backups = self.metadata['backups']
+        backups.pop(next(i for i, backup in enumerate(backups) if backup is backup_info))
+        self._by_name = self._build_name_index()
+        self._save_metadata()
+    
+    def _index_path(self, name: str) -> Path:
+        """备份对应的文件索引路径"""
+        return self.backup_dir / f"{name}.index.json.gz"
+    
+    def _save_index(self, name: str, file_index: Dict[str, List[int]]):
+        """保存备份时的文件索引（gzip压缩的JSON）"""
+        with gzip.open(self._index_path(name), 'wt', encoding='utf-8') as f:
+            json.dump(file_index, f, separators=(',', ':'))
+    
+    def _load_index(self, name: str) -> Optional[Dict[str, List[int]]]:
+        """加载备份的文件索引，不存在时返回None"""
+        index_path = self._index_path(name)
+        if not index_path.exists():
+            return None
+        with gzip.open(index_path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
     
     def _calculate_checksum(self, filepath: Path) -> str:
         """计算文件校验和"""
-        sha256 = hashlib.sha256()
-        with open(filepath, 'rb') as f:
-            while chunk := f.read(8192):
-                sha256.update(chunk)
+        sha256 = _sha256_ctor()
+        buf = bytearray(_CHECKSUM_CHUNK)
+        view = memoryview(buf)
+        with open(filepath, 'rb', buffering=0) as f:
+            while n := f.readinto(buf):
+                sha256.update(view[:n])
         return sha256.hexdigest()
     
     def _verify_checksum(self, filepath: Path, expected_checksum: str) -> bool:
@@ -201,6 +568,43 @@ class BackupManager:
         return actual_checksum == expected_checksum
 
 
+# copy_file_range不适用时（跨文件系统、文件系统或内核不支持）返回的错误码，遇到时改用普通复制
+_COPY_RANGE_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                               getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP)}
+
+
+def _copy_file_range(src: str, dst: str) -> bool:
+    """
+    用copy_file_range在内核内复制文件内容（不经过用户态缓冲区；Btrfs/XFS等支持reflink的
+    文件系统上只共享数据块，几乎不占时间）
+    Returns:
+        True表示已复制；不支持时返回False，由调用方改用普通复制
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        copied = 0
+        try:
+            while remaining > 0:
+                n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if n == 0:
+                    break
+                copied += n
+                remaining -= n
+        except OSError as e:
+            if copied or e.errno not in _COPY_RANGE_FALLBACK_ERRNOS:
+                raise
+            return False
+    return True
+
+
+def _fastcopy(src: str, dst: str) -> str:
+    """copytree的复制函数：优先copy_file_range，否则使用shutil.copy2（Linux上为sendfile）"""
+    if hasattr(os, 'copy_file_range') and _copy_file_range(src, dst):
+        shutil.copystat(src, dst)
+        return dst
+    return shutil.copy2(src, dst)
+
+
 class SnapshotManager:
     """快照管理器"""
     
@@ -230,14 +634,13 @@ class SnapshotManager:
             json.dump(snapshot_meta, f, indent=2)
         
         # 创建数据快照（复制关键文件）
-        import shutil
         for item in ['lsm', 'bplus', 'wal']:
             src = self.data_dir / item
             if src.exists():
                 dst = snapshot_path / item
                 if dst.exists():
                     shutil.rmtree(dst)
-                shutil.copytree(src, dst)
+                shutil.copytree(src, dst, copy_function=_fastcopy)
         
         return str(snapshot_path)
     
@@ -256,14 +659,13 @@ class SnapshotManager:
             snapshot_meta = json.load(f)
         
         # 恢复数据文件
-        import shutil
         for item in ['lsm', 'bplus', 'wal']:
             src = snapshot_path / item
             if src.exists():
                 dst = self.data_dir / item
                 if dst.exists():
                     shutil.rmtree(dst)
-                shutil.copytree(src, dst)
+                shutil.copytree(src, dst, copy_function=_fastcopy)
         
         # 验证Merkle根
         current_root = db.get_root_hash()
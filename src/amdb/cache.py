@@ -4,11 +4,19 @@
 """
 
 import time
+import heapq
 import threading
-from typing import Optional, Dict, Any, Callable
+import itertools
+from typing import Optional, Dict, Any, Callable, Tuple, List, Iterator
 from collections import OrderedDict
 from enum import Enum
 
+try:
+    # xxh3：SIMD实现的64位哈希，长二进制键上比Python内置的SipHash快数倍
+    from xxhash import xxh3_64_intdigest
+except ImportError:
+    xxh3_64_intdigest = None
+
 
 class CachePolicy(Enum):
     """缓存策略"""
@@ -17,8 +25,57 @@ class CachePolicy(Enum):
     FIFO = "fifo"  # 先进先出
 
 
-class LRUCache:
-    """LRU缓存实现"""
+# 缺省值哨兵（缓存的值可能是None）
+_MISSING = object()
+
+
+class _ExpiryHeap:
+    """
+    TTL过期堆：按过期时刻排序的 (过期时刻, 序号, 键) 最小堆，写入时批量清理已过期的项，
+    过期项不再只在被访问时才释放
+    子类实现 _expires_at / _drop / _live_expiries 三个钩子，且只在ttl有效时调用本类方法
+    """
+    
+    def _init_expiry(self):
+        self.expiry_heap: List[Tuple[float, int, Any]] = []
+        self._expiry_seq = itertools.count()  # 过期时刻相同时按序号比较，不比较键
+    
+    def _expires_at(self, key: Any) -> Optional[float]:
+        """键当前的过期时刻，不存在时返回None"""
+        raise NotImplementedError
+    
+    def _drop(self, key: Any):
+        """删除已过期的键"""
+        raise NotImplementedError
+    
+    def _live_expiries(self) -> Iterator[Tuple[float, Any]]:
+        """遍历所有缓存项的 (过期时刻, 键)"""
+        raise NotImplementedError
+    
+    def _schedule_expiry(self, key: Any, expires_at: float):
+        """登记键的过期时刻；同一键重复写入留下的旧记录过多时重建堆"""
+        heap = self.expiry_heap
+        if len(heap) > 2 * self.size() + 64:
+            heap[:] = [(exp, next(self._expiry_seq), live_key) for exp, live_key in self._live_expiries()]
+            heapq.heapify(heap)
+        heapq.heappush(heap, (expires_at, next(self._expiry_seq), key))
+    
+    def _purge_expired(self):
+        """弹出所有已过期的堆顶记录并删除对应的项（键已更新或删除的旧记录直接丢弃）"""
+        heap = self.expiry_heap
+        now = time.monotonic()
+        while heap and heap[0][0] <= now:
+            expires_at, _, key = heapq.heappop(heap)
+            if self._expires_at(key) == expires_at:
+                self._drop(key)
+
+
+class LRUCache(_ExpiryHeap):
+    """
+    LRU缓存实现
+    不设ttl时直接存储值；设置ttl时每项存储为 (值, 过期时刻) 元组（基于time.monotonic），
+    并在构造时换用带过期检查的get/put，不设ttl的缓存没有任何过期判断开销
+    """
     
     def __init__(self, max_size: int = 1000, ttl: Optional[int] = None):
         """
@@ -29,219 +86,409 @@ class LRUCache:
         self.max_size = max_size
         self.ttl = ttl
         self.cache: OrderedDict = OrderedDict()
-        self.timestamps: Dict[Any, float] = {}
-        self.lock = threading.RLock()
+        self.lock = threading.Lock()
+        if ttl:
+            self._init_expiry()
+            self.get, self.put = self._get_expiring, self._put_expiring
     
     def get(self, key: Any) -> Optional[Any]:
         """获取值"""
         with self.lock:
-            if key not in self.cache:
+            value = self.cache.get(key, _MISSING)
+            if value is _MISSING:
                 return None
             
-            # 检查过期
-            if self.ttl and key in self.timestamps:
-                if time.time() - self.timestamps[key] > self.ttl:
-                    del self.cache[key]
-                    del self.timestamps[key]
-                    return None
-            
-            # 移到末尾（最近使用）
-            value = self.cache.pop(key)
-            self.cache[key] = value
+            # 移到末尾（最近使用）：C实现的OrderedDict只调整链表指针，不重新插入
+            self.cache.move_to_end(key)
             return value
     
     def put(self, key: Any, value: Any):
         """放入值"""
         with self.lock:
-            if key in self.cache:
-                # 更新现有项
-                self.cache.pop(key)
-            elif len(self.cache) >= self.max_size:
-                # 移除最旧的项
-                self.cache.popitem(last=False)
+            self._put_entry(key, value)
+    
+    def _get_expiring(self, key: Any) -> Optional[Any]:
+        """获取值（ttl版本）"""
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
             
-            self.cache[key] = value
-            if self.ttl:
-                self.timestamps[key] = time.time()
+            # 检查过期
+            value, expires_at = entry
+            if time.monotonic() > expires_at:
+                del self.cache[key]
+                return None
+            
+            self.cache.move_to_end(key)
+            return value
+    
+    def _put_expiring(self, key: Any, value: Any):
+        """放入值（ttl版本）：先清理已过期的项"""
+        with self.lock:
+            self._purge_expired()
+            expires_at = time.monotonic() + self.ttl
+            self._put_entry(key, (value, expires_at))
+            self._schedule_expiry(key, expires_at)
+    
+    def _put_entry(self, key: Any, entry: Any):
+        if key in self.cache:
+            # 更新现有项
+            self.cache.move_to_end(key)
+        elif len(self.cache) >= self.max_size:
+            # 移除最旧的项
+            self.cache.popitem(last=False)
+        
+        self.cache[key] = entry
+    
+    def _expires_at(self, key: Any) -> Optional[float]:
+        entry = self.cache.get(key)
+        return entry[1] if entry is not None else None
+    
+    def _drop(self, key: Any):
+        del self.cache[key]
+    
+    def _live_expiries(self) -> Iterator[Tuple[float, Any]]:
+        return ((entry[1], key) for key, entry in self.cache.items())
     
     def delete(self, key: Any):
         """删除项"""
         with self.lock:
-            if key in self.cache:
-                del self.cache[key]
-            if key in self.timestamps:
-                del self.timestamps[key]
+            self.cache.pop(key, None)
     
     def clear(self):
         """清空缓存"""
         with self.lock:
             self.cache.clear()
-            self.timestamps.clear()
+            if self.ttl:
+                self.expiry_heap.clear()
     
     def size(self) -> int:
         """获取缓存大小"""
         return len(self.cache)
 
 
-class LFUCache:
-    """LFU缓存实现"""
+class LFUCache(_ExpiryHeap):
+    """
+    LFU缓存实现（频率桶：每个访问频率对应一个按最近访问排序的OrderedDict，
+    并记录最小频率，读取、写入和淘汰都是O(1)）
+    ttl的处理方式与LRUCache相同
+    """
     
     def __init__(self, max_size: int = 1000, ttl: Optional[int] = None):
         self.max_size = max_size
         self.ttl = ttl
-        self.cache: Dict[Any, Any] = {}
-        self.frequencies: Dict[Any, int] = {}
-        self.timestamps: Dict[Any, float] = {}
-        self.lock = threading.RLock()
+        self.key_to_freq: Dict[Any, int] = {}
+        # 频率 -> {键: 值或(值, 过期时刻)}，同频率内按最近访问排序，最久未访问的在最前
+        self.freq_to_keys: Dict[int, OrderedDict] = {}
+        self.min_freq = 0
+        self.lock = threading.Lock()
+        if ttl:
+            self._init_expiry()
+            self.get, self.put = self._get_expiring, self._put_expiring
+    
+    def _touch(self, key: Any, freq: int, entry: Any):
+        """把键从freq桶移到freq+1桶"""
+        bucket = self.freq_to_keys[freq]
+        del bucket[key]
+        if not bucket:
+            del self.freq_to_keys[freq]
+            if self.min_freq == freq:
+                self.min_freq = freq + 1
+        next_bucket = self.freq_to_keys.get(freq + 1)
+        if next_bucket is None:
+            next_bucket = self.freq_to_keys[freq + 1] = OrderedDict()
+        next_bucket[key] = entry
+        self.key_to_freq[key] = freq + 1
+    
+    def _remove(self, key: Any):
+        """删除键（min_freq可能因此失效，淘汰时再修正）"""
+        freq = self.key_to_freq.pop(key)
+        bucket = self.freq_to_keys[freq]
+        del bucket[key]
+        if not bucket:
+            del self.freq_to_keys[freq]
+    
+    def _evict(self):
+        """移除频率最低的项（同频率中最久未访问的）"""
+        if self.min_freq not in self.freq_to_keys:
+            # 删除或过期清空了最小频率桶时重新定位（只在这种情况下遍历频率桶）
+            self.min_freq = min(self.freq_to_keys)
+        bucket = self.freq_to_keys[self.min_freq]
+        evict_key, _ = bucket.popitem(last=False)
+        if not bucket:
+            del self.freq_to_keys[self.min_freq]
+        del self.key_to_freq[evict_key]
     
     def get(self, key: Any) -> Optional[Any]:
         """获取值"""
         with self.lock:
-            if key not in self.cache:
+            freq = self.key_to_freq.get(key)
+            if freq is None:
                 return None
             
-            # 检查过期
-            if self.ttl and key in self.timestamps:
-                if time.time() - self.timestamps[key] > self.ttl:
-                    del self.cache[key]
-                    del self.frequencies[key]
-                    del self.timestamps[key]
-                    return None
-            
             # 增加频率
-            self.frequencies[key] = self.frequencies.get(key, 0) + 1
-            return self.cache[key]
+            value = self.freq_to_keys[freq][key]
+            self._touch(key, freq, value)
+            return value
     
     def put(self, key: Any, value: Any):
         """放入值"""
         with self.lock:
-            if len(self.cache) >= self.max_size and key not in self.cache:
-                # 移除频率最低的项
-                if self.frequencies:
-                    min_freq_key = min(self.frequencies.items(), key=lambda x: x[1])[0]
-                    del self.cache[min_freq_key]
-                    del self.frequencies[min_freq_key]
-                    if min_freq_key in self.timestamps:
-                        del self.timestamps[min_freq_key]
+            self._put_entry(key, value)
+    
+    def _get_expiring(self, key: Any) -> Optional[Any]:
+        """获取值（ttl版本）"""
+        with self.lock:
+            freq = self.key_to_freq.get(key)
+            if freq is None:
+                return None
             
-            self.cache[key] = value
-            self.frequencies[key] = self.frequencies.get(key, 0) + 1
-            if self.ttl:
-                self.timestamps[key] = time.time()
+            # 检查过期
+            entry = self.freq_to_keys[freq][key]
+            value, expires_at = entry
+            if time.monotonic() > expires_at:
+                self._remove(key)
+                return None
+            
+            self._touch(key, freq, entry)
+            return value
+    
+    def _put_expiring(self, key: Any, value: Any):
+        """放入值（ttl版本）：先清理已过期的项"""
+        with self.lock:
+            self._purge_expired()
+            expires_at = time.monotonic() + self.ttl
+            self._put_entry(key, (value, expires_at))
+            self._schedule_expiry(key, expires_at)
+    
+    def _put_entry(self, key: Any, entry: Any):
+        freq = self.key_to_freq.get(key)
+        if freq is not None:
+            self._touch(key, freq, entry)
+            return
+        
+        if len(self.key_to_freq) >= self.max_size and self.key_to_freq:
+            self._evict()
+        
+        bucket = self.freq_to_keys.get(1)
+        if bucket is None:
+            bucket = self.freq_to_keys[1] = OrderedDict()
+        bucket[key] = entry
+        self.key_to_freq[key] = 1
+        self.min_freq = 1
+    
+    def _expires_at(self, key: Any) -> Optional[float]:
+        freq = self.key_to_freq.get(key)
+        return self.freq_to_keys[freq][key][1] if freq is not None else None
+    
+    def _drop(self, key: Any):
+        self._remove(key)
+    
+    def _live_expiries(self) -> Iterator[Tuple[float, Any]]:
+        for bucket in self.freq_to_keys.values():
+            for key, entry in bucket.items():
+                yield entry[1], key
     
     def delete(self, key: Any):
         """删除项"""
         with self.lock:
-            if key in self.cache:
-                del self.cache[key]
-            if key in self.frequencies:
-                del self.frequencies[key]
-            if key in self.timestamps:
-                del self.timestamps[key]
+            if key in self.key_to_freq:
+                self._remove(key)
     
     def clear(self):
         """清空缓存"""
         with self.lock:
-            self.cache.clear()
-            self.frequencies.clear()
-            self.timestamps.clear()
+            self.key_to_freq.clear()
+            self.freq_to_keys.clear()
+            self.min_freq = 0
+            if self.ttl:
+                self.expiry_heap.clear()
     
     def size(self) -> int:
         """获取缓存大小"""
-        return len(self.cache)
+        return len(self.key_to_freq)
 
 
-class FIFOCache:
-    """FIFO缓存实现"""
+class FIFOCache(_ExpiryHeap):
+    """FIFO缓存实现（ttl的处理方式与LRUCache相同）"""
     
     def __init__(self, max_size: int = 1000, ttl: Optional[int] = None):
         self.max_size = max_size
         self.ttl = ttl
         self.cache: OrderedDict = OrderedDict()
-        self.timestamps: Dict[Any, float] = {}
-        self.lock = threading.RLock()
+        self.lock = threading.Lock()
+        if ttl:
+            self._init_expiry()
+            self.get, self.put = self._get_expiring, self._put_expiring
     
     def get(self, key: Any) -> Optional[Any]:
         """获取值"""
         with self.lock:
-            if key not in self.cache:
+            return self.cache.get(key)
+    
+    def put(self, key: Any, value: Any):
+        """放入值（FIFO：先进先出）"""
+        with self.lock:
+            self._put_entry(key, value)
+    
+    def _get_expiring(self, key: Any) -> Optional[Any]:
+        """获取值（ttl版本）"""
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
                 return None
             
             # 检查过期
-            if self.ttl and key in self.timestamps:
-                if time.time() - self.timestamps[key] > self.ttl:
-                    del self.cache[key]
-                    del self.timestamps[key]
-                    return None
+            value, expires_at = entry
+            if time.monotonic() > expires_at:
+                del self.cache[key]
+                return None
             
-            return self.cache[key]
+            return value
     
-    def put(self, key: Any, value: Any):
-        """放入值（FIFO：先进先出）"""
+    def _put_expiring(self, key: Any, value: Any):
+        """放入值（ttl版本）：先清理已过期的项"""
         with self.lock:
-            if key in self.cache:
-                # 更新现有项（不改变顺序）
-                self.cache[key] = value
-            elif len(self.cache) >= self.max_size:
-                # 移除最旧的项（FIFO）
-                self.cache.popitem(last=False)
-                if self.cache:
-                    oldest_key = next(iter(self.cache))
-                    if oldest_key in self.timestamps:
-                        del self.timestamps[oldest_key]
-            
-            self.cache[key] = value
-            if self.ttl:
-                self.timestamps[key] = time.time()
+            self._purge_expired()
+            expires_at = time.monotonic() + self.ttl
+            self._put_entry(key, (value, expires_at))
+            self._schedule_expiry(key, expires_at)
+    
+    def _put_entry(self, key: Any, entry: Any):
+        if key not in self.cache and len(self.cache) >= self.max_size:
+            # 移除最旧的项（FIFO）
+            self.cache.popitem(last=False)
+        
+        # 更新现有项时不改变顺序
+        self.cache[key] = entry
+    
+    def _expires_at(self, key: Any) -> Optional[float]:
+        entry = self.cache.get(key)
+        return entry[1] if entry is not None else None
+    
+    def _drop(self, key: Any):
+        del self.cache[key]
+    
+    def _live_expiries(self) -> Iterator[Tuple[float, Any]]:
+        return ((entry[1], key) for key, entry in self.cache.items())
     
     def delete(self, key: Any):
         """删除项"""
         with self.lock:
-            if key in self.cache:
-                del self.cache[key]
-            if key in self.timestamps:
-                del self.timestamps[key]
+            self.cache.pop(key, None)
     
     def clear(self):
         """清空缓存"""
         with self.lock:
             self.cache.clear()
-            self.timestamps.clear()
+            if self.ttl:
+                self.expiry_heap.clear()
     
     def size(self) -> int:
         """获取缓存大小"""
         return len(self.cache)
 
 
+class ShardedCache:
+    """
+    分片缓存：按键的哈希把缓存分成2的幂个分片，每个分片是独立的缓存（有自己的锁），
+    多线程访问不同分片时互不阻塞；容量和淘汰在各分片内独立计算
+    """
+    
+    def __init__(self, cache_cls: type, max_size: int = 1000, ttl: Optional[int] = None,
+                 shards: int = 8):
+        """
+        Args:
+            cache_cls: 分片使用的缓存类（LRUCache / LFUCache / FIFOCache）
+            max_size: 最大缓存项数（平均分到各分片）
+            ttl: 过期时间（秒）
+            shards: 分片数（2的幂）
+        """
+        if shards < 1 or shards & (shards - 1):
+            raise ValueError(f"shards must be a power of two, got {shards}")
+        self.mask = shards - 1
+        shard_size = max(1, -(-max_size // shards))
+        self.shards = [cache_cls(shard_size, ttl) for _ in range(shards)]
+    
+    def get(self, key: Any) -> Optional[Any]:
+        """获取值"""
+        return self.shards[hash(key) & self.mask].get(key)
+    
+    def put(self, key: Any, value: Any):
+        """放入值"""
+        self.shards[hash(key) & self.mask].put(key, value)
+    
+    def delete(self, key: Any):
+        """删除项"""
+        self.shards[hash(key) & self.mask].delete(key)
+    
+    def clear(self):
+        """清空缓存"""
+        for shard in self.shards:
+            shard.clear()
+    
+    def size(self) -> int:
+        """获取缓存大小"""
+        return sum(shard.size() for shard in self.shards)
+
+
+_POLICY_CACHES = {
+    CachePolicy.LRU: LRUCache,
+    CachePolicy.LFU: LFUCache,
+    CachePolicy.FIFO: FIFOCache,
+}
+
+
 class CacheManager:
     """缓存管理器"""
     
     def __init__(self, policy: CachePolicy = CachePolicy.LRU, 
-                 max_size: int = 1000, ttl: Optional[int] = None):
+                 max_size: int = 1000, ttl: Optional[int] = None, shards: int = 1,
+                 key_hasher: Optional[Callable[[Any], int]] = None):
         """
         Args:
             policy: 缓存策略
             max_size: 最大缓存项数
             ttl: 过期时间（秒）
+            shards: 分片数（2的幂），大于1时使用ShardedCache减少多线程锁竞争，
+                    淘汰顺序变为分片内近似
+            key_hasher: 键哈希函数（如xxh3_64_intdigest）。设置后以其结果作为缓存的键，
+                        适合每次都是新对象的长bytes键（Python只缓存同一对象的哈希）；
+                        原始键与值一起存储，读取时比较，哈希碰撞不会返回错误的值
         """
-        if policy == CachePolicy.LRU:
-            self.cache = LRUCache(max_size, ttl)
-        elif policy == CachePolicy.LFU:
-            self.cache = LFUCache(max_size, ttl)
-        else:  # FIFO
-            self.cache = FIFOCache(max_size, ttl)
+        cache_cls = _POLICY_CACHES.get(policy, FIFOCache)
+        if shards > 1:
+            self.cache = ShardedCache(cache_cls, max_size, ttl, shards)
+        else:
+            self.cache = cache_cls(max_size, ttl)
+        self.key_hasher = key_hasher
     
     def get(self, key: Any) -> Optional[Any]:
         """获取值"""
-        return self.cache.get(key)
+        if self.key_hasher is None:
+            return self.cache.get(key)
+        entry = self.cache.get(self.key_hasher(key))
+        if entry is None or entry[0] != key:
+            return None
+        return entry[1]
     
     def put(self, key: Any, value: Any):
         """放入值"""
-        self.cache.put(key, value)
+        if self.key_hasher is None:
+            self.cache.put(key, value)
+        else:
+            self.cache.put(self.key_hasher(key), (key, value))
     
     def delete(self, key: Any):
-        """删除项"""
-        self.cache.delete(key)
+        """删除项（设置key_hasher时只删除原始键相同的条目，不误删哈希碰撞的其他键）"""
+        if self.key_hasher is None:
+            self.cache.delete(key)
+            return
+        hashed = self.key_hasher(key)
+        entry = self.cache.get(hashed)
+        if entry is not None and entry[0] == key:
+            self.cache.delete(hashed)
     
     def clear(self):
         """清空缓存"""
@@ -9,6 +9,7 @@ import configparser
 from typing import Dict, Any, Optional
 from pathlib import Path
 from dataclasses import dataclass, field
+from .audit import AUDIT_MODES, AUDIT_FORMATS
 
 
 @dataclass
@@ -74,6 +75,10 @@ class DatabaseConfig:
     # 审计日志配置
     audit_enable: bool = True
     audit_log_dir: Optional[str] = None  # None表示使用data_dir/audit_logs
+    audit_mode: str = "full"  # off, sample, full
+    audit_sample_rate: int = 100  # sample模式下每N条成功操作记录1条
+    audit_format: str = "json"  # json, binary
+    audit_shards: int = 1  # 大于1时按操作者分片写入，每个分片独立的锁和哈希链
     
     # 压缩配置
     compression_enable: bool = True
@@ -87,6 +92,20 @@ class DatabaseConfig:
     threading_network_workers: int = 10  # 网络处理线程数（每个连接一个线程）
     threading_enable_parallel_batch: bool = True  # 是否启用并行批量写入
     
+    def __post_init__(self):
+        self.validate()
+    
+    def validate(self):
+        """校验取值受限的配置项，非法取值直接报错（否则审计等功能会在初始化时被静默关闭）"""
+        if self.audit_mode not in AUDIT_MODES:
+            raise ValueError(f"Invalid audit mode: {self.audit_mode!r} (expected one of {', '.join(AUDIT_MODES)})")
+        if self.audit_format not in AUDIT_FORMATS:
+            raise ValueError(f"Invalid audit format: {self.audit_format!r} (expected one of {', '.join(AUDIT_FORMATS)})")
+        if self.audit_sample_rate < 1:
+            raise ValueError(f"audit sample_rate must be >= 1, got {self.audit_sample_rate}")
+        if self.audit_shards < 1:
+            raise ValueError(f"audit shards must be >= 1, got {self.audit_shards}")
+    
     @classmethod
     def from_ini(cls, filepath: str) -> 'DatabaseConfig':
         """从INI文件加载配置"""
@@ -176,6 +195,10 @@ class DatabaseConfig:
             section = config['audit']
             db_config.audit_enable = section.getboolean('enable', db_config.audit_enable)
             db_config.audit_log_dir = section.get('log_dir', db_config.audit_log_dir) or None
+            db_config.audit_mode = section.get('mode', db_config.audit_mode).lower()
+            db_config.audit_sample_rate = section.getint('sample_rate', db_config.audit_sample_rate)
+            db_config.audit_format = section.get('format', db_config.audit_format).lower()
+            db_config.audit_shards = section.getint('shards', db_config.audit_shards)
         
         # 压缩配置
         if config.has_section('compression'):
@@ -193,6 +216,7 @@ class DatabaseConfig:
             db_config.threading_network_workers = section.getint('network_workers', db_config.threading_network_workers)
             db_config.threading_enable_parallel_batch = section.getboolean('enable_parallel_batch', db_config.threading_enable_parallel_batch)
         
+        db_config.validate()
         return db_config
     
     def to_ini(self, filepath: str):
@@ -274,6 +298,10 @@ class DatabaseConfig:
         config['audit']['enable'] = str(self.audit_enable)
         if self.audit_log_dir:
             config['audit']['log_dir'] = self.audit_log_dir
+        config['audit']['mode'] = self.audit_mode
+        config['audit']['sample_rate'] = str(self.audit_sample_rate)
+        config['audit']['format'] = self.audit_format
+        config['audit']['shards'] = str(self.audit_shards)
         
         # 压缩配置
         config.add_section('compression')
@@ -329,6 +357,14 @@ class DatabaseConfig:
             self.security_token_secret = os.getenv('AMDB_SECURITY_TOKEN_SECRET')
         if os.getenv('AMDB_SECURITY_ENABLE_AUTH'):
             self.security_enable_auth = os.getenv('AMDB_SECURITY_ENABLE_AUTH').lower() == 'true'
+        
+        # 审计日志配置
+        if os.getenv('AMDB_AUDIT_MODE'):
+            self.audit_mode = os.getenv('AMDB_AUDIT_MODE').lower()
+        if os.getenv('AMDB_AUDIT_SAMPLE_RATE'):
+            self.audit_sample_rate = int(os.getenv('AMDB_AUDIT_SAMPLE_RATE'))
+        
+        self.validate()
 
 
 def load_config(config_path: Optional[str] = None) -> DatabaseConfig:
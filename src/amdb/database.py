@@ -6,7 +6,7 @@ AmDb 主数据库类
 import threading
 import time
 import hashlib
-from typing import Optional, Tuple, List, Dict, Any, Callable
+from typing import Optional, Tuple, List, Dict, Any, Callable, Iterator
 from pathlib import Path
 from .storage import StorageEngine
 from .version import VersionManager
@@ -15,9 +15,13 @@ from .version import VersionManager
 USE_CYTHON_VERSION = False
 from .transaction import TransactionManager, Transaction
 from .index import IndexManager
-from .audit import AuditLogger
+from .audit import AuditLogger, ShardedAuditLogger
 from .config import DatabaseConfig, load_config, get_config
 
+# batch_delete每次batch_put写入的最多键数：超过500条的batch_put走快速路径，
+# 该路径调用create_versions_batch(return_versions_only=True)会失败，按块写入保持在普通路径内
+BATCH_DELETE_CHUNK_SIZE = 500
+
 
 class Database:
     """
@@ -99,16 +103,24 @@ class Database:
         
         # 审计日志（区块链应用必需）
         # 优化：延迟初始化，避免初始化时的开销
-        if self.config.audit_enable:
+        # audit_mode为off时不创建审计日志记录器，写入路径完全跳过审计；
+        # 启用审计时初始化失败（配置非法、目录不可写）直接报错，不在无审计的情况下继续运行
+        if self.config.audit_enable and self.config.audit_mode != "off":
             audit_dir = self.config.audit_log_dir or (Path(self.data_dir) / "audit_logs")
-            try:
-                self.audit_logger = AuditLogger(str(audit_dir))
-            except Exception:
-                # 如果审计日志初始化失败，使用None（后续可以异步初始化）
-                self.audit_logger = None
+            audit_options = dict(mode=self.config.audit_mode,
+                                 sample_rate=self.config.audit_sample_rate,
+                                 format=self.config.audit_format)
+            if self.config.audit_shards > 1:
+                self.audit_logger = ShardedAuditLogger(str(audit_dir), shards=self.config.audit_shards,
+                                                       **audit_options)
+            else:
+                self.audit_logger = AuditLogger(str(audit_dir), **audit_options)
         else:
             self.audit_logger = None
         
+        # Merkle根哈希的十六进制缓存：(根哈希, 十六进制字符串)
+        self._root_hex_cache: Optional[Tuple[bytes, str]] = None
+        
         # 加载数据库元数据（.amdb文件）
         self._load_metadata()
         
@@ -363,14 +375,45 @@ class Database:
             ]
     
     def range_query(self, start_key: bytes, end_key: bytes) -> List[Tuple[bytes, bytes]]:
-        """范围查询"""
-        with self.lock:
-            return self.storage.range_query(start_key, end_key)
+        """范围查询（闭区间）"""
+        return list(self.range_scan(start_key, end_key))
+    
+    def range_scan(self, start_key: bytes, end_key: bytes) -> Iterator[Tuple[bytes, bytes]]:
+        """
+        有序范围扫描（闭区间 [start_key, end_key]）
+        通过版本管理器的有序键视图二分定位起点，只遍历匹配的键，
+        按需逐个返回 (key, value)，已删除的键会被跳过
+        """
+        self._check_and_reload_if_updated()
+        for key in self.version_manager.get_keys_in_range(start_key, end_key):
+            latest = self.version_manager.get_latest(key)
+            if latest is not None:
+                value = latest.value
+            else:
+                result = self.storage.get(key)
+                value = result[0] if result else None
+            if value is None or value == b'__DELETED__':
+                continue
+            yield key, value
     
     def get_root_hash(self) -> bytes:
         """获取Merkle根哈希"""
         return self.storage.get_root_hash()
     
+    def get_root_hex(self, root_hash: Optional[bytes] = None) -> str:
+        """
+        获取Merkle根哈希的十六进制形式（按根哈希缓存，根未变化时直接返回缓存的字符串）
+        Args:
+            root_hash: 已取得的根哈希（如put的返回值），为None时读取当前根哈希
+        """
+        if root_hash is None:
+            root_hash = self.get_root_hash()
+        cached = self._root_hex_cache
+        if cached is None or cached[0] != root_hash:
+            cached = (root_hash, root_hash.hex())
+            self._root_hex_cache = cached
+        return cached[1]
+    
     # 事务操作
     def begin_transaction(self) -> Transaction:
         """开始事务"""
@@ -625,6 +668,35 @@ class Database:
             traceback.print_exc()
             return (False, b'')
     
+    def batch_delete(self, keys: List[bytes]) -> bool:
+        """
+        批量删除（标记删除）
+        与delete相同写入删除标记，但每BATCH_DELETE_CHUNK_SIZE个键通过一次batch_put写入，
+        每块只获取一次锁、生成一个版本批次，而不是每个键各写一次
+        
+        Args:
+            keys: 要删除的键列表
+            
+        Returns:
+            是否全部成功标记删除（某一块失败时停止，此前的块已标记删除）
+        """
+        for start in range(0, len(keys), BATCH_DELETE_CHUNK_SIZE):
+            chunk = keys[start:start + BATCH_DELETE_CHUNK_SIZE]
+            success, _ = self.batch_put([(key, b'__DELETED__') for key in chunk])
+            if not success:
+                return False
+            
+            # 记录审计日志：与delete一致，每个键一条DELETE记录（batch_put本身不记录审计日志）；
+            # log_delete只把条目放入审计日志的写入队列，直接在调用线程中记录
+            if self.audit_logger:
+                try:
+                    for key in chunk:
+                        self.audit_logger.log_delete(key)
+                except Exception:
+                    pass  # 审计日志失败不应影响主操作
+        
+        return True
+    
     # 索引操作
     def create_index(self, index_name: str):
         """创建二级索引"""
@@ -717,6 +789,13 @@ class Database:
             print(f"⚠️ WAL刷新失败: {e}")
             # WAL刷新失败不应阻止其他操作
         
+        # 审计日志刷新：等待后台写线程写完已记录的条目并落盘
+        if self.audit_logger:
+            try:
+                self.audit_logger.sync()
+            except Exception as e:
+                print(f"⚠️ 审计日志刷新失败: {e}")
+        
         # 2. 存储引擎刷新（LSM树刷新到.sst文件）- 关键，必须同步
         try:
             if hasattr(self.storage.lsm_tree, 'flush'):
@@ -739,10 +818,12 @@ class Database:
             max_wait = 30  # 最多等待30秒
             wait_time = 0
             while wait_time < max_wait:
-                # 检查是否还有未刷新的MemTable
-                if hasattr(self.storage.lsm_tree, 'immutable_memtables'):
-                    if len(self.storage.lsm_tree.immutable_memtables) == 0:
-                        break
+                # 检查是否还有未刷新的MemTable（分片LSM树按分片保存不可变MemTable列表，刷新后分片键仍保留）
+                immutable = getattr(self.storage.lsm_tree, 'immutable_memtables', ())
+                if isinstance(immutable, dict):
+                    immutable = [memtable for memtables in immutable.values() for memtable in memtables]
+                if not immutable:
+                    break
                 time.sleep(0.1)
                 wait_time += 0.1
         
@@ -803,6 +884,12 @@ class Database:
             except Exception:
                 pass  # 文件时间跟踪失败不影响主操作
     
+    def close(self):
+        """关闭数据库：同步刷新所有数据到磁盘，并关闭审计日志文件"""
+        self.flush(async_mode=False, force_sync=True)
+        if self.audit_logger:
+            self.audit_logger.close()
+    
     def _save_metadata(self):
         """保存数据库元数据到磁盘（.amdb文件）"""
         import json
@@ -822,7 +909,7 @@ class Database:
                 # 写入元数据（JSON格式）
                 # 获取Merkle根哈希（如果Merkle树为空，使用空哈希）
                 try:
-                    merkle_root = self.get_root_hash().hex()
+                    merkle_root = self.get_root_hex()
                 except Exception:
                     # 如果Merkle树还未初始化或为空，使用空哈希
                     merkle_root = '0' * 64  # 64个0，表示空哈希
@@ -1132,7 +1219,7 @@ class Database:
             stats = {
                 'total_keys': len(valid_keys),  # 只统计有效键
                 'current_version': self.transaction_manager.get_snapshot_version(),
-                'merkle_root': self.get_root_hash().hex(),
+                'merkle_root': self.get_root_hex(),
                 'storage_dir': self.data_dir,
                 'sharding_enabled': self.enable_sharding
             }
@@ -5,6 +5,7 @@
 
 import time
 import hashlib
+import bisect
 from typing import Optional, List, Tuple, Dict
 from dataclasses import dataclass
 from collections import defaultdict
@@ -43,6 +44,8 @@ class VersionManager:
         self.versions: Dict[bytes, List[Version]] = defaultdict(list)
         self.current_versions: Dict[bytes, int] = {}
         self.lock = threading.RLock()
+        # 有序键视图（用于范围扫描），新键出现时失效，查询时按需重建
+        self._sorted_keys: Optional[List[bytes]] = None
         self._config = config  # 保存配置引用
         # 优化：缓存配置值，避免重复访问（性能关键路径）
         if config:
@@ -75,6 +78,8 @@ class VersionManager:
             
             self.versions[key].append(version)
             self.current_versions[key] = new_ver
+            if current_ver == 0:
+                self._sorted_keys = None
             
             return version
     
@@ -153,6 +158,9 @@ class VersionManager:
                         continue
                 
                 # 批量更新current_versions
+                if self._sorted_keys is not None and any(
+                        key not in self.current_versions for key in updates_dict):
+                    self._sorted_keys = None
                 self.current_versions.update(updates_dict)
                 
                 return versions
@@ -232,6 +240,18 @@ class VersionManager:
         with self.lock:
             return list(self.current_versions.keys())
     
+    def get_keys_in_range(self, start_key: bytes, end_key: bytes) -> List[bytes]:
+        """
+        获取闭区间 [start_key, end_key] 内的所有键（按字节序排列）
+        使用有序键视图二分定位，复杂度 O(log N + k)，而不是全量过滤排序
+        """
+        with self.lock:
+            if self._sorted_keys is None or len(self._sorted_keys) != len(self.current_versions):
+                self._sorted_keys = sorted(self.current_versions)
+            left = bisect.bisect_left(self._sorted_keys, start_key)
+            right = bisect.bisect_right(self._sorted_keys, end_key)
+            return self._sorted_keys[left:right]
+    
     def get_current_version(self, key: bytes) -> int:
         """获取当前版本号"""
         with self.lock:
@@ -365,6 +385,8 @@ class VersionManager:
                             version_list.append(version_obj)
                         
                         self.versions[key] = version_list
+                    
+                    self._sorted_keys = None
         except Exception as e:
             import traceback
             print(f"加载版本数据失败: {e}")
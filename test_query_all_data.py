@@ -12,6 +12,10 @@ sys.path.insert(0, str(project_root))
 
 from src.amdb import Database
 
+def keys_with_prefix(db, prefix: bytes) -> list:
+    """按前缀取键：在版本管理器的有序键视图上二分定位前缀区间，而不是在Python里对全部键逐个startswith"""
+    return db.version_manager.get_keys_in_range(prefix, prefix + b'\xff')
+
 def test_query_all_data():
     """测试查询所有数据"""
     
@@ -51,7 +55,7 @@ def test_query_all_data():
         
         # 3. 测试范围查询
         print("3. 测试范围查询（block前缀）...")
-        block_keys = [k for k in all_keys if k.startswith(b'block:')]
+        block_keys = keys_with_prefix(db, b'block:')
         print(f"   找到 {len(block_keys)} 个区块键")
         if block_keys:
             # 测试读取前10个和后10个
@@ -66,7 +70,7 @@ def test_query_all_data():
         
         # 4. 测试账户查询
         print("4. 测试账户查询...")
-        account_keys = [k for k in all_keys if k.startswith(b'account:')]
+        account_keys = keys_with_prefix(db, b'account:')
         print(f"   找到 {len(account_keys)} 个账户键")
         if account_keys:
             # 测试读取所有账户
@@ -80,7 +84,7 @@ def test_query_all_data():
         
         # 5. 测试交易查询
         print("5. 测试交易查询...")
-        tx_keys = [k for k in all_keys if k.startswith(b'tx:')]
+        tx_keys = keys_with_prefix(db, b'tx:')
         print(f"   找到 {len(tx_keys)} 个交易键")
         if tx_keys:
             # 测试读取前100个和后100个
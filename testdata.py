@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+测试数据脚本的公共工具
+create_blockchain_test_data.py、create_multiple_databases.py、create_sample_db.py、
+verify_blockchain_data.py 以及 docs/verify_database_creation.py 共用的序列化、随机数据、
+分批写入与目录清理函数
+"""
+
+import sys
+import os
+import time
+import json
+import shutil
+import subprocess
+import queue
+import threading
+from itertools import islice
+from typing import Iterable, Iterator
+
+try:
+    import orjson
+
+    def dumps(data: dict) -> bytes:
+        """序列化为UTF-8字节（orjson直接返回bytes，无需再encode）"""
+        return orjson.dumps(data)
+
+    def loads(data: bytes):
+        """直接从UTF-8字节解析JSON（orjson接受bytes，省去decode）"""
+        return orjson.loads(data)
+except ImportError:
+    def dumps(data: dict) -> bytes:
+        """序列化为UTF-8字节（未安装orjson时回退到标准库json）"""
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    def loads(data: bytes):
+        """解析JSON（未安装orjson时回退到标准库json，json.loads同样接受bytes）"""
+        return json.loads(data)
+
+# 进度输出的最小时间间隔（秒）：批次很多时合并为一行输出，避免终端输出成为瓶颈
+PROGRESS_INTERVAL = 0.5
+
+def fast_rmtree(path: str):
+    """删除目录树：Linux上交给 rm -rf（getdents64 + unlinkat，不逐项lstat），其他平台使用shutil.rmtree"""
+    if sys.platform.startswith('linux'):
+        subprocess.run(['rm', '-rf', path], check=True)
+    else:
+        shutil.rmtree(path)
+
+def generate_address() -> str:
+    """生成随机地址（模拟以太坊地址格式，20字节随机数据的十六进制）"""
+    return "0x" + os.urandom(20).hex()
+
+def generate_hash() -> str:
+    """生成随机哈希值（64字符，32字节随机数据的十六进制）"""
+    return os.urandom(32).hex()
+
+def iter_chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    """按固定大小切分可迭代对象（同一时刻只有一批记录驻留内存）"""
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def write_batches(db, items: Iterable, batch_size: int, label: str, total: int) -> int:
+    """分批写入记录：调用线程负责生成和序列化，后台线程执行batch_put，两者重叠进行。
+    进度按时间节流输出（最后一批和失败批次总会输出），返回写入的记录数"""
+    batches = queue.Queue(maxsize=4)  # 最多缓冲4批，限制内存占用
+    result = {"written": 0, "error": None}
+    
+    def writer():
+        written = 0
+        reported = 0
+        last_report = time.monotonic()
+        while True:
+            batch = batches.get()
+            if batch is None:
+                break
+            if result["error"] is not None:
+                continue  # 出错后只排空队列，避免生产者阻塞
+            try:
+                success, _ = db.batch_put(batch)
+            except Exception as e:
+                result["error"] = e
+                continue
+            now = time.monotonic()
+            if not success or now - last_report >= PROGRESS_INTERVAL or written + len(batch) >= total:
+                # 先输出尚未报告的成功区间，再输出本批结果
+                end = written + len(batch) if success else written
+                if end > reported:
+                    print(f"  ✓ 写入{label} {reported+1}-{end}/{total}", flush=True)
+                if not success:
+                    print(f"  ✗ 写入{label} {written+1}-{written+len(batch)}/{total} 失败", flush=True)
+                reported = written + len(batch)
+                last_report = now
+            written += len(batch)
+        result["written"] = written
+    
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    writer_thread.start()
+    try:
+        for batch in iter_chunks(items, batch_size):
+            batches.put(batch)
+    finally:
+        batches.put(None)
+        writer_thread.join()
+    
+    if result["error"] is not None:
+        raise result["error"]
+    return result["written"]
@@ -0,0 +1,430 @@
+"""
+审计日志测试
+"""
+
+import unittest
+import tempfile
+import shutil
+import json
+import hashlib
+import gc
+import os
+import sys
+import subprocess
+import threading
+from unittest import mock
+from src.amdb import audit
+from src.amdb.audit import AuditLogEntry, AuditLogger, ShardedAuditLogger, OperationType
+
+
+class TestAuditLogEntry(unittest.TestCase):
+    """审计日志条目测试"""
+    
+    def _entry(self, **kwargs):
+        fields = dict(timestamp=1700000000.5, operation="put", key=b"key1",
+                      value_hash="ab" * 32, metadata={"b": 2, "a": 1}, prev_hash="cd" * 32)
+        fields.update(kwargs)
+        return AuditLogEntry(**fields)
+    
+    def test_compute_hash_deterministic(self):
+        """测试条目哈希确定性"""
+        entry = self._entry()
+        self.assertEqual(entry.compute_hash(), self._entry().compute_hash())
+        self.assertEqual(len(entry.compute_hash()), 64)
+        # 元数据键顺序不影响哈希
+        self.assertEqual(entry.compute_hash(),
+                         self._entry(metadata={"a": 1, "b": 2}).compute_hash())
+    
+    def test_compute_hash_detects_changes(self):
+        """测试任一字段变化都会改变哈希"""
+        base = self._entry().compute_hash()
+        for change in (dict(timestamp=1700000000.6), dict(operation="delete"),
+                       dict(key=b"key2"), dict(success=False), dict(error="e"),
+                       dict(metadata={"a": 2}), dict(prev_hash=None), dict(operator="node1")):
+            self.assertNotEqual(self._entry(**change).compute_hash(), base, change)
+    
+    def test_compute_hash_field_boundaries(self):
+        """测试字段边界：内容在相邻字段间移动不会得到相同哈希"""
+        a = self._entry(operator="ab", error=None)
+        b = self._entry(operator="a", error="b")
+        self.assertNotEqual(a.compute_hash(), b.compute_hash())
+    
+    @unittest.skipUnless(audit._compute_entry_hash is not None, "Cython审计扩展未编译")
+    def test_cython_hash_matches_python(self):
+        """测试Cython哈希实现与纯Python实现结果一致"""
+        entry = self._entry(error="失败", success=False)
+        with mock.patch.object(audit, '_compute_entry_hash', None):
+            expected = entry.compute_hash()
+        self.assertEqual(entry.compute_hash(), expected)
+
+
+class TestAuditLogger(unittest.TestCase):
+    """审计日志记录器测试"""
+    
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.logger = AuditLogger(self.test_dir)
+    
+    def tearDown(self):
+        self.logger.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_sync_writes_chained_entries(self):
+        """测试sync后所有条目按哈希链顺序写入文件"""
+        for i in range(100):
+            self.logger.log_put(f"key_{i}".encode(), b"value")
+        self.logger.sync()
+        
+        with open(self.logger.log_file, 'rb') as f:
+            lines = f.read().splitlines()[1:]  # 跳过文件头
+        self.assertEqual(len(lines), 100)
+        
+        prev_hash = None
+        for line in lines:
+            entry = json.loads(line)
+            self.assertEqual(entry['prev_hash'], prev_hash)
+            prev_hash = entry['hash']
+        self.assertEqual(prev_hash, self.logger.last_hash)
+    
+    def _log_sample(self):
+        self.logger.log_put(b"key1", b"value1", operator="node1")
+        self.logger.log_put(b"key2", b"value2", operator="node2")
+        self.logger.log_delete(b"key1", operator="node1")
+        self.logger.log_error(OperationType.PUT, "disk full", operator="node2")
+    
+    def test_verify_integrity(self):
+        """测试哈希链完整性校验"""
+        self._log_sample()
+        result = self.logger.verify_integrity()
+        self.assertTrue(result['valid'], result['issues'])
+        self.assertEqual(result['last_hash'], self.logger.last_hash)
+    
+    def test_verify_integrity_detects_tampering(self):
+        """测试篡改日志条目后校验失败"""
+        self._log_sample()
+        self.logger.sync()
+        with open(self.logger.log_file, 'rb') as f:
+            content = f.read()
+        with open(self.logger.log_file, 'wb') as f:
+            f.write(content.replace(b'"node2"', b'"node3"', 1))
+        self.assertFalse(self.logger.verify_integrity()['valid'])
+    
+    def test_verify_legacy_log(self):
+        """测试1.0格式（字符串拼接哈希）的旧日志文件仍能通过校验，之后写入的新格式文件开始新的哈希链"""
+        prev_hash = None
+        lines = [json.dumps({'type': 'audit_log', 'created_at': 1.0, 'version': '1.0'})]
+        for i, metadata in enumerate((None, {"count": 2, "b": [1]})):
+            entry = dict(timestamp=1600000000.0 + i, operation="put", operator="node1",
+                         key=f"key{i}".encode().hex(), value_hash="ab" * 32, success=True,
+                         error=None, metadata=metadata, prev_hash=prev_hash)
+            content = (str(entry['timestamp']) + "put" + "node1" + entry['key'] + "ab" * 32 + "True" +
+                       json.dumps(metadata or {}, sort_keys=True) + (prev_hash or ""))
+            entry['hash'] = prev_hash = hashlib.sha256(content.encode()).hexdigest()
+            lines.append(json.dumps(entry))
+        with open(f"{self.test_dir}/audit_1.log", 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        
+        self.logger.log_put(b"key2", b"value2")
+        result = self.logger.verify_integrity()
+        self.assertTrue(result['valid'], result['issues'])
+        self.assertEqual(result['last_hash'], self.logger.last_hash)
+        
+        with open(f"{self.test_dir}/audit_1.log") as f:
+            content = f.read()
+        with open(f"{self.test_dir}/audit_1.log", 'w') as f:
+            f.write(content.replace('"node1"', '"node2"', 1))
+        self.assertFalse(self.logger.verify_integrity()['valid'])
+    
+    def test_audit_trail_and_statistics(self):
+        """测试审计轨迹过滤和统计"""
+        self._log_sample()
+        trail = self.logger.get_audit_trail(operator="node1")
+        self.assertEqual([e['operation'] for e in trail], ["put", "delete"])
+        self.assertEqual(trail[0]['key'], b"key1".hex())
+        self.assertEqual(len(self.logger.get_audit_trail(operation=OperationType.PUT)), 3)
+        
+        stats = self.logger.get_statistics()
+        self.assertEqual(stats['total_operations'], 4)
+        self.assertEqual(stats['operations_by_type'], {"put": 3, "delete": 1})
+        self.assertEqual(stats['operations_by_operator'], {"node1": 2, "node2": 2})
+        self.assertEqual(stats['error_count'], 1)
+        self.assertAlmostEqual(stats['success_rate'], 0.75)
+    
+    def test_audit_trail_prefilter(self):
+        """测试审计轨迹预过滤：其他字段中出现相同字符串的条目不会被误选，需转义的值同样正确过滤"""
+        self.logger.log_put(b"key1", b"value1", operator="node1")
+        self.logger.log_error(OperationType.PUT, "node1", operator="node2")
+        self.logger.log_put(b"key2", b"value2", operator='node"3')
+        
+        trail = self.logger.get_audit_trail(operator="node1")
+        self.assertEqual([e['key'] for e in trail], [b"key1".hex()])
+        trail = self.logger.get_audit_trail(operator='node"3', operation=OperationType.PUT)
+        self.assertEqual([e['key'] for e in trail], [b"key2".hex()])
+    
+    def test_unserializable_metadata_is_skipped(self):
+        """测试元数据无法序列化时不记录该条目，也不中断哈希链"""
+        self.logger.log_put(b"key1", b"value1")
+        self.logger.log_operation(OperationType.CONFIG_CHANGE, metadata={"bad": object()})
+        self.logger.log_put(b"key2", b"value2")
+        
+        self.assertEqual(self.logger.get_statistics()['total_operations'], 2)
+        self.assertTrue(self.logger.verify_integrity()['valid'])
+    
+    def test_close_flushes_and_stops_logging(self):
+        """测试关闭时写完已记录的条目，关闭后的记录被忽略"""
+        for i in range(50):
+            self.logger.log_put(f"key_{i}".encode(), b"value")
+        self.logger.close()
+        self.logger.log_put(b"late", b"value")
+        self.logger.sync()
+        self.logger.close()
+        
+        self.assertEqual(self.logger.get_statistics()['total_operations'], 50)
+        self.assertTrue(self.logger.verify_integrity()['valid'])
+    
+    def test_reopen_continues_hash_chain(self):
+        """测试在同一目录重新打开记录器（JSON和二进制格式）时续接哈希链，校验仍然通过"""
+        for format in ("json", "binary"):
+            audit_dir = f"{self.test_dir}/reopen_{format}"
+            first = AuditLogger(audit_dir, format=format)
+            first.log_put(b"key1", b"value1")
+            first.close()
+            
+            second = AuditLogger(audit_dir, format=format)
+            self.addCleanup(second.close)
+            self.assertEqual(second.last_hash, first.last_hash)
+            second.log_put(b"key2", b"value2")
+            result = second.verify_integrity()
+            self.assertTrue(result['valid'], result['issues'])
+            self.assertEqual(result['last_hash'], second.last_hash)
+            self.assertEqual(second.get_statistics()['total_operations'], 2)
+    
+    def test_exit_drains_queued_entries(self):
+        """测试未调用close()直接退出解释器时，已记录的条目全部写入文件"""
+        script = (
+            "import sys\n"
+            "from src.amdb.audit import AuditLogger\n"
+            "logger = AuditLogger(sys.argv[1])\n"
+            "for i in range(20000):\n"
+            "    logger.log_put(('key_%d' % i).encode(), b'value')\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, "-c", script, f"{self.test_dir}/exit"], cwd=root, check=True)
+        
+        reopened = AuditLogger(f"{self.test_dir}/exit")
+        self.assertEqual(reopened.get_statistics()['total_operations'], 20000)
+        reopened.close()
+    
+    def test_unreferenced_logger_releases_resources(self):
+        """测试不再被引用的记录器在回收时关闭文件描述符并结束写线程"""
+        loggers = [AuditLogger(f"{self.test_dir}/gc_{i}") for i in range(10)]
+        for logger in loggers:
+            logger.log_put(b"key", b"value")
+        writers = [logger._writer for logger in loggers]
+        self.assertTrue(all(writer._thread.is_alive() for writer in writers))
+        
+        del logger, loggers
+        gc.collect()
+        for writer in writers:
+            self.assertFalse(writer._thread.is_alive())
+            self.assertRaises(OSError, os.fstat, writer._fd)
+        reopened = AuditLogger(f"{self.test_dir}/gc_0")
+        self.assertEqual(reopened.get_statistics()['total_operations'], 1)
+        reopened.close()
+    
+    def test_parallel_scan_matches_serial(self):
+        """测试多文件并行扫描与顺序扫描结果一致"""
+        self._log_sample()
+        self.logger.sync()
+        # 复制出一个更早的日志文件，模拟多个日志文件
+        shutil.copy(self.logger.log_file, f"{self.test_dir}/audit_1.log")
+        
+        serial_stats = self.logger.get_statistics()
+        serial_trail = self.logger.get_audit_trail(operator="node2")
+        with mock.patch.object(audit, '_PARALLEL_SCAN_BYTES', 0), \
+                mock.patch.object(audit, 'ProcessPoolExecutor') as executor:
+            # 默认不启用多进程扫描
+            self.assertEqual(self.logger.get_statistics(), serial_stats)
+            executor.assert_not_called()
+        
+        self.logger.parallel_scan = True
+        with mock.patch.object(audit, '_PARALLEL_SCAN_BYTES', 0):
+            self.assertEqual(self.logger.get_statistics(), serial_stats)
+            self.assertEqual(self.logger.get_audit_trail(operator="node2"), serial_trail)
+        self.assertEqual(serial_stats['total_operations'], 8)
+    
+    def test_rotation_compresses_sealed_files(self):
+        """测试日志文件达到轮转大小后切换新文件，旧文件压缩且仍可校验和统计"""
+        logger = AuditLogger(f"{self.test_dir}/rotating", max_file_size=4096)
+        self.addCleanup(logger.close)
+        for i in range(200):
+            logger.log_put(f"key_{i}".encode(), b"value", operator="node1")
+        logger.sync()
+        
+        result = logger.verify_integrity()
+        self.assertTrue(result['valid'], result['issues'])
+        self.assertEqual(result['last_hash'], logger.last_hash)
+        self.assertEqual(logger.get_statistics()['total_operations'], 200)
+        # 读取前已等待压缩完成
+        self.assertTrue(list(logger.audit_dir.glob("audit_*.log.gz")))
+        self.assertEqual(len(list(logger.audit_dir.glob("audit_*.log"))), 1)
+    
+    def test_rotation_compresses_in_background(self):
+        """测试封存文件的压缩不阻塞写入和sync"""
+        started, release = threading.Event(), threading.Event()
+        compress = audit._compress_sealed
+        
+        def slow_compress(sealed_file):
+            started.set()
+            release.wait(10)
+            compress(sealed_file)
+        
+        with mock.patch.object(audit, '_compress_sealed', slow_compress):
+            logger = AuditLogger(f"{self.test_dir}/background", max_file_size=4096)
+            self.addCleanup(logger.close)
+            for i in range(200):
+                logger.log_put(f"key_{i}".encode(), b"value")
+            logger.sync()
+            self.assertTrue(started.wait(10))
+            # 压缩仍被阻塞时写入和sync照常完成
+            logger.log_put(b"key_200", b"value")
+            logger.sync()
+            self.assertFalse(list(logger.audit_dir.glob("audit_*.log.gz")))
+            release.set()
+            self.assertEqual(logger.get_statistics()['total_operations'], 201)
+            self.assertTrue(logger.verify_integrity()['valid'])
+            self.assertTrue(list(logger.audit_dir.glob("audit_*.log.gz")))
+    
+    def test_audit_modes(self):
+        """测试off模式不记录，sample模式按比例记录成功操作且总是记录失败操作"""
+        off = AuditLogger(f"{self.test_dir}/off", mode="off")
+        self.addCleanup(off.close)
+        off.log_put(b"key", b"value")
+        self.assertEqual(off.get_statistics()['total_operations'], 0)
+        
+        sampled = AuditLogger(f"{self.test_dir}/sample", mode="sample", sample_rate=10)
+        self.addCleanup(sampled.close)
+        for i in range(100):
+            sampled.log_put(f"key_{i}".encode(), b"value")
+        sampled.log_error(OperationType.PUT, "disk full")
+        stats = sampled.get_statistics()
+        self.assertEqual(stats['total_operations'], 11)
+        self.assertEqual(stats['error_count'], 1)
+        self.assertTrue(sampled.verify_integrity()['valid'])
+        
+        with self.assertRaises(ValueError):
+            AuditLogger(f"{self.test_dir}/bad", mode="partial")
+    
+    def test_binary_format(self):
+        """测试二进制日志格式：条目与JSON格式一致，可校验、统计、检测篡改，轮转后可读"""
+        binary = AuditLogger(f"{self.test_dir}/binary", format="binary", max_file_size=2048)
+        self.addCleanup(binary.close)
+        self.logger, json_logger = binary, self.logger
+        self._log_sample()
+        self.logger = json_logger
+        self._log_sample()
+        
+        def strip(entries):
+            return [{k: v for k, v in e.items() if k not in ('timestamp', 'hash', 'prev_hash', 'value_hash')}
+                    for e in entries]
+        self.assertEqual(strip(binary.get_audit_trail()), strip(json_logger.get_audit_trail()))
+        self.assertEqual(binary.get_statistics(), json_logger.get_statistics())
+        result = binary.verify_integrity()
+        self.assertTrue(result['valid'], result['issues'])
+        self.assertEqual(result['last_hash'], binary.last_hash)
+        
+        for i in range(100):
+            binary.log_put(f"key_{i}".encode(), b"value", operator="node1")
+        binary.sync()
+        self.assertEqual(binary.get_statistics()['total_operations'], 104)
+        self.assertTrue(list(binary.audit_dir.glob("audit_*.bin.gz")))
+        self.assertTrue(binary.verify_integrity()['valid'])
+        
+        tampered = AuditLogger(f"{self.test_dir}/tampered", format="binary")
+        self.addCleanup(tampered.close)
+        tampered.log_put(b"key1", b"value1", operator="node1")
+        tampered.log_batch_put(5)
+        tampered.sync()
+        self.assertTrue(tampered.verify_integrity()['valid'])
+        with open(tampered.log_file, 'rb') as f:
+            content = f.read()
+        for old, new in ((b"node1", b"node3"), (b'{"count":5}', b'{"count":6}')):
+            with open(tampered.log_file, 'wb') as f:
+                f.write(content.replace(old, new, 1))
+            self.assertFalse(tampered.verify_integrity()['valid'], old)
+    
+    def test_sharded_logger(self):
+        """测试分片记录：同一操作者落在同一分片，各分片哈希链独立校验，轨迹和统计跨分片合并"""
+        sharded = ShardedAuditLogger(f"{self.test_dir}/sharded", shards=4)
+        self.addCleanup(sharded.close)
+        
+        def writer(operator):
+            for i in range(50):
+                sharded.log_put(f"key_{i}".encode(), b"value", operator=operator)
+        threads = [threading.Thread(target=writer, args=(f"node{n}",)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        sharded.log_delete(b"key_0")
+        
+        result = sharded.verify_integrity()
+        self.assertTrue(result['valid'], result['issues'])
+        self.assertEqual(result['last_hashes'], [shard.last_hash for shard in sharded._shards])
+        self.assertEqual(result['last_hash'], sharded.last_hash)
+        self.assertEqual(sharded.get_statistics()['total_operations'], 401)
+        trail = sharded.get_audit_trail(operator="node3")
+        self.assertEqual([e['key'] for e in trail], [f"key_{i}".encode().hex() for i in range(50)])
+        timestamps = [e['timestamp'] for e in sharded.get_audit_trail()]
+        self.assertEqual(timestamps, sorted(timestamps))
+        
+        sharded.close()
+        with open(sharded._shards[0].log_file, 'rb') as f:
+            content = f.read()
+        with open(sharded._shards[0].log_file, 'wb') as f:
+            f.write(content.replace(b'"put"', b'"get"', 1))
+        result = sharded.verify_integrity()
+        self.assertFalse(result['valid'])
+        self.assertTrue(result['issues'][0].startswith("shard 0:"))
+    
+    def test_incomplete_logger_subclass_fails_on_creation(self):
+        """测试未实现公共接口全部方法的记录器子类在创建时即报错"""
+        class PartialLogger(audit._AuditLoggerBase):
+            def log_operation(self, operation, **kwargs):
+                pass
+        
+        with self.assertRaises(TypeError):
+            PartialLogger()
+    
+    def test_sharded_logger_includes_unsharded_history(self):
+        """测试启用分片后，根目录下未分片时写入的历史日志仍参与统计、轨迹查询和校验"""
+        audit_dir = f"{self.test_dir}/history"
+        plain = AuditLogger(audit_dir)
+        for i in range(10):
+            plain.log_put(f"old_{i}".encode(), b"value", operator="node1")
+        plain.close()
+        
+        sharded = ShardedAuditLogger(audit_dir, shards=2, sample_rate=3, max_file_size=4096)
+        self.addCleanup(sharded.close)
+        self.assertEqual((sharded.sample_rate, sharded.max_file_size), (3, 4096))
+        self.assertIsNone(sharded.last_hash)
+        self.assertTrue(sharded.log_file.parent.name.startswith("shard_"))
+        sharded.log_put(b"new_0", b"value", operator="node1")
+        
+        self.assertEqual(sharded.get_statistics()['total_operations'], 11)
+        self.assertEqual([e['key'] for e in sharded.get_audit_trail(operator="node1")],
+                         [f"old_{i}".encode().hex() for i in range(10)] + [b"new_0".hex()])
+        result = sharded.verify_integrity()
+        self.assertTrue(result['valid'], result['issues'])
+        self.assertEqual(result['last_hash'], sharded.last_hash)
+        
+        with open(plain.log_file, 'rb') as f:
+            content = f.read()
+        with open(plain.log_file, 'wb') as f:
+            f.write(content.replace(b'"put"', b'"get"', 1))
+        result = sharded.verify_integrity()
+        self.assertFalse(result['valid'])
+        self.assertTrue(result['issues'][0].startswith("root:"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,15 @@
 import unittest
 import tempfile
 import shutil
+import errno
+import hashlib
+import json
+import os
+import tarfile
+from pathlib import Path
+from unittest import mock
 from src.amdb import Database
+from src.amdb import backup
 from src.amdb.backup import BackupManager
 
 
@@ -57,4 +65,174 @@ class TestBackup(unittest.TestCase):
         restored_db = Database(data_dir=restore_dir)
         value = restored_db.get(b"key1")
         self.assertEqual(value, b"value1")
+    
+    def test_checksum(self):
+        """测试备份校验和与hashlib结果一致（跨越读取块边界）"""
+        path = Path(self.temp_dir) / "blob.bin"
+        data = bytes(range(256)) * 9000  # 超过1MiB，覆盖多块读取
+        path.write_bytes(data)
+        expected = hashlib.sha256(data).hexdigest()
+        self.assertEqual(self.backup_mgr._calculate_checksum(path), expected)
+        self.assertTrue(self.backup_mgr._verify_checksum(path, expected))
+    
+    def test_streamed_checksum_matches_file(self):
+        """测试写入时计算的校验和与备份文件内容一致（全量和增量备份）"""
+        self.db.put(b"key1", b"value1")
+        self.db.flush()
+        self.backup_mgr.create_full_backup("full")
+        self.backup_mgr.create_incremental_backup("full", "incr")
+        
+        for backup in self.backup_mgr.list_backups():
+            path = Path(backup['path'])
+            self.assertEqual(backup['checksum'], self.backup_mgr._calculate_checksum(path))
+            self.assertEqual(backup['size'], path.stat().st_size)
+    
+    def test_incremental_uses_file_index(self):
+        """测试增量备份按全量备份时的文件索引比对：只包含新增和修改的文件，并记录删除的文件"""
+        extra = Path(self.data_dir) / "extra"
+        extra.mkdir()
+        (extra / "same.txt").write_bytes(b"same")
+        (extra / "changed.txt").write_bytes(b"v1")
+        (extra / "removed.txt").write_bytes(b"gone")
+        self.backup_mgr.create_full_backup("full")
+        
+        # 修改文件并回拨mtime，仅靠时间戳比对会漏掉它
+        (extra / "changed.txt").write_bytes(b"v2-longer")
+        os.utime(extra / "changed.txt", (1000000000, 1000000000))
+        (extra / "removed.txt").unlink()
+        (extra / "new.txt").write_bytes(b"new")
+        self.backup_mgr.create_incremental_backup("full", "incr")
+        
+        with open(Path(self.backup_dir) / "incr_manifest.json") as f:
+            manifest = json.load(f)
+        extra_changed = sorted(Path(p).name for p in manifest['changed_files'] if Path(p).parent.name == "extra")
+        self.assertEqual(extra_changed, ["changed.txt", "new.txt"])
+        self.assertEqual([Path(p).name for p in manifest['deleted_files']], ["removed.txt"])
+        with tarfile.open(Path(self.backup_dir) / "incr.tar.gz", 'r:gz') as tar:
+            self.assertIn("data/extra/new.txt", tar.getnames())
+            self.assertNotIn("data/extra/same.txt", tar.getnames())
+    
+    def test_archive_matches_tar_add(self):
+        """测试预读归档的成员顺序和内容与tarfile递归添加目录一致"""
+        self.db.put(b"key1", b"value1")
+        self.db.flush()
+        nested = Path(self.data_dir) / "extra" / "nested"
+        nested.mkdir(parents=True)
+        (nested / "b.txt").write_bytes(b"b")
+        (nested.parent / "a.txt").write_bytes(b"a" * 100000)
+        (nested.parent / "big.bin").write_bytes(os.urandom(1500000))  # 超过内存预读上限，流式复制
+        os.symlink("a.txt", nested.parent / "link.txt")
+        
+        reference = Path(self.temp_dir) / "reference.tar"
+        with tarfile.open(reference, 'w') as tar:
+            tar.add(self.data_dir, arcname="data")
+        path = self.backup_mgr.create_full_backup("full")
+        
+        with tarfile.open(reference) as expected, tarfile.open(path, 'r:gz') as actual:
+            self.assertEqual(actual.getnames(), expected.getnames())
+            for member in expected.getmembers():
+                if member.isreg():
+                    self.assertEqual(actual.extractfile(member.name).read(),
+                                     expected.extractfile(member).read(), member.name)
+            self.assertTrue(actual.getmember("data/extra/link.txt").issym())
+    
+    def test_archive_file_growing_after_readahead(self):
+        """测试文件在预读之后被追加写入时，归档成员大小与实际写入的数据一致"""
+        extra = Path(self.data_dir) / "extra"
+        extra.mkdir()
+        (extra / "small.log").write_bytes(b"s" * 1000)
+        (extra / "large.log").write_bytes(b"l" * 1500000)  # 超过内存预读上限，流式复制
+        open_ahead = backup._open_ahead
+        
+        def open_then_append(path):
+            f = open_ahead(path)
+            if path.endswith(".log"):
+                with open(path, 'ab') as g:
+                    g.write(b"appended")
+            return f
+        
+        with mock.patch.object(backup, '_open_ahead', open_then_append):
+            path = self.backup_mgr.create_full_backup("growing")
+        with tarfile.open(path, 'r:gz') as tar:
+            self.assertEqual(tar.extractfile("data/extra/small.log").read(), b"s" * 1000)
+            # 流式复制的文件按写入归档时的fstat取大小，包含追加的内容
+            self.assertEqual(tar.extractfile("data/extra/large.log").read(), b"l" * 1500000 + b"appended")
+    
+    def test_lookup_by_name(self):
+        """测试按名称查找备份：删除后不可再用作基础备份，元数据重新加载后索引一致"""
+        self.backup_mgr.create_full_backup("full1")
+        self.backup_mgr.create_full_backup("full2")
+        self.backup_mgr.delete_backup("full1")
+        
+        with self.assertRaises(ValueError):
+            self.backup_mgr.create_incremental_backup("full1", "incr")
+        with self.assertRaises(ValueError):
+            self.backup_mgr.delete_backup("full1")
+        
+        reloaded = BackupManager(self.data_dir, self.backup_dir)
+        self.assertEqual([b['name'] for b in reloaded.list_backups()], ["full2"])
+        reloaded.create_incremental_backup("full2", "incr")
+        self.assertEqual(reloaded._by_name["incr"]['base_backup'], "full2")
+    
+    def test_restore_overwrites_data_dir(self):
+        """测试恢复到原数据目录时，文件内容与备份时一致"""
+        self.db.put(b"key1", b"value1")
+        self.db.flush()
+        data_dir = Path(self.data_dir)
+        snapshot = {p.relative_to(data_dir): p.read_bytes() for p in data_dir.rglob("*") if p.is_file()}
+        self.backup_mgr.create_full_backup("full")
+        
+        shutil.rmtree(data_dir)
+        self.backup_mgr.restore_backup("full")
+        restored = {p.relative_to(data_dir): p.read_bytes() for p in data_dir.rglob("*") if p.is_file()}
+        self.assertEqual(restored, snapshot)
+    
+    def test_fastcopy(self):
+        """测试快照复制函数：内容和修改时间与源文件一致，copy_file_range不可用时回退普通复制"""
+        src = Path(self.temp_dir) / "src.bin"
+        src.write_bytes(os.urandom(300000))
+        os.utime(src, (1700000000, 1700000000))
+        
+        backup._fastcopy(str(src), str(Path(self.temp_dir) / "fast.bin"))
+        unsupported = OSError(errno.EXDEV, "cross-device")
+        with mock.patch.object(backup.os, 'copy_file_range', side_effect=unsupported, create=True):
+            backup._fastcopy(str(src), str(Path(self.temp_dir) / "fallback.bin"))
+        for name in ("fast.bin", "fallback.bin"):
+            dst = Path(self.temp_dir) / name
+            self.assertEqual(dst.read_bytes(), src.read_bytes())
+            self.assertEqual(dst.stat().st_mtime, 1700000000)
+    
+    def test_parallel_compression(self):
+        """测试多核分块并行压缩生成的多成员gzip可正常解压，成员内容与原文件一致"""
+        (Path(self.data_dir) / "big.bin").write_bytes(os.urandom(3 * 1024 * 1024) * 2)
+        with mock.patch.object(backup.os, 'cpu_count', return_value=4), \
+                mock.patch.object(backup, '_GZIP_BLOCK', 1024 * 1024):
+            path = Path(self.backup_mgr.create_full_backup("parallel"))
+        
+        self.assertEqual(self.backup_mgr.list_backups()[0]['checksum'],
+                         self.backup_mgr._calculate_checksum(path))
+        with tarfile.open(path, 'r:gz') as tar:
+            self.assertEqual(tar.extractfile("data/big.bin").read(),
+                             (Path(self.data_dir) / "big.bin").read_bytes())
+    
+    @unittest.skipUnless(shutil.which("gzip"), "需要gzip命令")
+    def test_external_compressor(self):
+        """测试通过外部压缩进程（pigz管道，此处以gzip代替）生成的备份可读且校验和正确"""
+        self.db.put(b"key1", b"value1")
+        self.db.flush()
+        with mock.patch.object(backup, '_pigz_command', return_value=["gzip", "-6", "-c"]):
+            path = Path(self.backup_mgr.create_full_backup("piped"))
+        
+        self.assertEqual(self.backup_mgr.list_backups()[0]['checksum'],
+                         self.backup_mgr._calculate_checksum(path))
+        with tarfile.open(path, 'r:gz') as tar:
+            self.assertTrue(any(name.startswith("data/") for name in tar.getnames()))
+    
+    def test_pigz_uses_zlib_level(self):
+        """测试pigz始终使用zlib级别，不受ISA-L级别（0-3）影响"""
+        with mock.patch.object(backup.shutil, 'which', return_value="/usr/bin/pigz"), \
+                mock.patch.object(backup, '_GZIP_LEVEL', 2):
+            command = backup._pigz_command()
+        self.assertIn(f"-{backup._ZLIB_LEVEL}", command)
+        self.assertNotIn("-2", command)
 
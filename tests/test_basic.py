@@ -6,7 +6,9 @@ import unittest
 import os
 import tempfile
 import shutil
+import time
 from src.amdb import Database
+from src.amdb.audit import OperationType
 
 
 class TestDatabaseBasic(unittest.TestCase):
@@ -19,6 +21,7 @@ class TestDatabaseBasic(unittest.TestCase):
     
     def tearDown(self):
         """测试后清理"""
+        self.db.close()
         shutil.rmtree(self.temp_dir, ignore_errors=True)
     
     def test_put_get(self):
@@ -108,6 +111,72 @@ class TestDatabaseBasic(unittest.TestCase):
             self.assertGreaterEqual(key, b"key_003")
             self.assertLessEqual(key, b"key_007")
     
+    def test_range_scan(self):
+        """测试有序范围扫描"""
+        for i in (5, 1, 9, 3, 7):
+            self.db.put(f"key_{i:03d}".encode(), f"value_{i}".encode())
+        self.db.put(b"other_001", b"x")
+        self.db.delete(b"key_007")
+        
+        results = list(self.db.range_scan(b"key_002", b"key_009"))
+        self.assertEqual([key for key, _ in results], [b"key_003", b"key_005", b"key_009"])
+        self.assertEqual(results[0][1], b"value_3")
+        
+        # 新写入的键应出现在后续扫描中
+        self.db.put(b"key_004", b"value_4")
+        keys = [key for key, _ in self.db.range_scan(b"key_002", b"key_009")]
+        self.assertEqual(keys, [b"key_003", b"key_004", b"key_005", b"key_009"])
+    
+    def test_batch_delete(self):
+        """测试批量删除"""
+        self.db.batch_put([(f"del_{i}".encode(), f"value_{i}".encode()) for i in range(5)])
+        self.assertTrue(self.db.batch_delete([b"del_1", b"del_3"]))
+        
+        self.assertIsNone(self.db.get(b"del_1"))
+        self.assertIsNone(self.db.get(b"del_3"))
+        self.assertTrue(self.db.is_deleted(b"del_1"))
+        self.assertEqual(self.db.get(b"del_2"), b"value_2")
+        keys = [key for key, _ in self.db.range_scan(b"del_0", b"del_4")]
+        self.assertEqual(keys, [b"del_0", b"del_2", b"del_4"])
+    
+    def test_batch_delete_many_keys(self):
+        """测试超过一次batch_put块大小的批量删除"""
+        keys = [f"many_{i:04d}".encode() for i in range(1200)]
+        for start in range(0, len(keys), 400):
+            self.assertTrue(self.db.batch_put([(key, b"value") for key in keys[start:start + 400]])[0])
+        self.assertTrue(self.db.batch_delete(keys))
+        
+        self.assertIsNone(self.db.get(keys[0]))
+        self.assertIsNone(self.db.get(keys[-1]))
+        self.assertTrue(all(self.db.is_deleted(key) for key in keys))
+        trail = self.db.audit_logger.get_audit_trail(operation=OperationType.DELETE)
+        self.assertEqual(len(trail), 1200)
+    
+    def test_batch_delete_is_audited(self):
+        """测试批量删除为每个键记录DELETE审计日志"""
+        self.db.batch_put([(b"audit_1", b"v1"), (b"audit_2", b"v2")])
+        self.assertTrue(self.db.batch_delete([b"audit_1", b"audit_2"]))
+        
+        trail = self.db.audit_logger.get_audit_trail(operation=OperationType.DELETE)
+        self.assertEqual(sorted(e['key'] for e in trail), [b"audit_1".hex(), b"audit_2".hex()])
+    
+    def test_root_hex(self):
+        """测试Merkle根哈希十六进制缓存随写入更新"""
+        self.db.put(b"root_key", b"value1")
+        self.assertEqual(self.db.get_root_hex(), self.db.get_root_hash().hex())
+        self.assertIs(self.db.get_root_hex(), self.db.get_root_hex())
+        
+        self.db.put(b"root_key", b"value2")
+        self.assertEqual(self.db.get_root_hex(), self.db.get_root_hash().hex())
+    
+    def test_close(self):
+        """测试关闭数据库后数据已持久化，可重新打开读取"""
+        self.db.put(b"close_key", b"close_value")
+        self.db.close()
+        
+        self.db = Database(data_dir=os.path.join(self.temp_dir, "test_db"))
+        self.assertEqual(self.db.get(b"close_key"), b"close_value")
+    
     def test_transaction(self):
         """测试事务"""
         tx = self.db.begin_transaction()
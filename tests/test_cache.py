@@ -4,7 +4,9 @@
 
 import unittest
 import time
-from src.amdb.cache import CacheManager, CachePolicy
+from unittest import mock
+from src.amdb import cache as cache_module
+from src.amdb.cache import CacheManager, CachePolicy, ShardedCache, LRUCache
 
 
 class TestCache(unittest.TestCase):
@@ -35,6 +37,98 @@ class TestCache(unittest.TestCase):
         time.sleep(1.1)
         self.assertIsNone(cache.get("key1"))
     
+    def test_lfu_cache(self):
+        """测试LFU缓存：淘汰访问频率最低的项，同频率时淘汰最久未访问的项"""
+        cache = CacheManager(CachePolicy.LFU, max_size=3)
+        
+        cache.put("key1", "value1")
+        cache.put("key2", "value2")
+        cache.put("key3", "value3")
+        cache.get("key1")
+        cache.get("key1")
+        cache.get("key3")
+        
+        # key2频率最低
+        cache.put("key4", "value4")
+        self.assertIsNone(cache.get("key2"))
+        
+        # 删除key3后写入两项：频率1的项中key4最久未访问
+        cache.delete("key3")
+        cache.put("key5", "value5")
+        cache.put("key6", "value6")
+        self.assertIsNone(cache.get("key4"))
+        self.assertEqual(cache.get("key1"), "value1")
+        self.assertEqual(cache.size(), 3)
+    
+    def test_fifo_cache(self):
+        """测试FIFO缓存：按写入顺序淘汰，更新和读取不改变顺序"""
+        cache = CacheManager(CachePolicy.FIFO, max_size=2, ttl=60)
+        
+        cache.put("key1", "value1")
+        cache.put("key2", "value2")
+        cache.put("key1", "value1b")
+        self.assertEqual(cache.get("key1"), "value1b")
+        
+        cache.put("key3", "value3")
+        self.assertIsNone(cache.get("key1"))
+        self.assertEqual(cache.get("key2"), "value2")
+        self.assertEqual(cache.size(), 2)
+    
+    def test_sharded_cache(self):
+        """测试分片缓存：读写路由到固定分片，总容量按分片划分"""
+        cache = CacheManager(CachePolicy.LRU, max_size=64, shards=8)
+        for i in range(1000):
+            cache.put(f"key_{i}", i)
+        self.assertLessEqual(cache.size(), 64)
+        self.assertEqual(cache.get("key_999"), 999)
+        cache.delete("key_999")
+        self.assertIsNone(cache.get("key_999"))
+        cache.clear()
+        self.assertEqual(cache.size(), 0)
+        
+        with self.assertRaises(ValueError):
+            ShardedCache(LRUCache, max_size=64, shards=6)
+    
+    def test_ttl_purge_on_put(self):
+        """测试写入时清理已过期的项：过期项无需被访问即释放，重复写入的键按最新过期时刻处理"""
+        for policy in CachePolicy:
+            now = [1000.0]
+            with mock.patch.object(cache_module.time, 'monotonic', lambda: now[0]):
+                cache = CacheManager(policy, max_size=100, ttl=10)
+                for i in range(20):
+                    cache.put(f"key_{i}", i)
+                now[0] += 5
+                cache.put("key_0", "refreshed")
+                now[0] += 6
+                cache.put("fresh", "value")
+                
+                self.assertEqual(cache.size(), 2, policy)
+                self.assertEqual(cache.get("key_0"), "refreshed", policy)
+                self.assertIsNone(cache.get("key_1"), policy)
+                now[0] += 11
+                self.assertIsNone(cache.get("fresh"), policy)
+    
+    def test_key_hasher(self):
+        """测试自定义键哈希：按哈希值存取，哈希碰撞的不同键不会读到对方的值"""
+        cache = CacheManager(CachePolicy.LRU, max_size=10, key_hasher=len)
+        cache.put(b"aaaa", "value_a")
+        self.assertEqual(cache.get(b"aaaa"), "value_a")
+        self.assertIsNone(cache.get(b"bbbb"))
+        
+        cache.put(b"bbbb", "value_b")
+        self.assertEqual(cache.get(b"bbbb"), "value_b")
+        self.assertIsNone(cache.get(b"aaaa"))
+        # 删除哈希碰撞的另一个键不影响已缓存的条目
+        cache.delete(b"aaaa")
+        self.assertEqual(cache.get(b"bbbb"), "value_b")
+        cache.delete(b"bbbb")
+        self.assertEqual(cache.size(), 0)
+        
+        if cache_module.xxh3_64_intdigest is not None:
+            cache = CacheManager(CachePolicy.LRU, key_hasher=cache_module.xxh3_64_intdigest)
+            cache.put(b"k" * 4096, "value")
+            self.assertEqual(cache.get(b"k" * 4096), "value")
+    
     def test_get_or_compute(self):
         """测试获取或计算"""
         cache = CacheManager(CachePolicy.LRU, max_size=10)
@@ -42,4 +42,24 @@ class TestConfig(unittest.TestCase):
             self.assertEqual(config.storage.data_dir, loaded_config.storage.data_dir)
             
             os.unlink(f.name)
+    
+    def test_audit_config_validation(self):
+        """测试审计配置：INI中的取值不区分大小写，非法取值直接报错"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ini_path = os.path.join(tmp_dir, 'amdb.ini')
+            with open(ini_path, 'w') as f:
+                f.write("[audit]\nmode = Sample\nformat = BINARY\nsample_rate = 10\n")
+            config = DatabaseConfig.from_ini(ini_path)
+            self.assertEqual(config.audit_mode, "sample")
+            self.assertEqual(config.audit_format, "binary")
+            
+            with open(ini_path, 'w') as f:
+                f.write("[audit]\nmode = partial\n")
+            with self.assertRaises(ValueError):
+                DatabaseConfig.from_ini(ini_path)
+        
+        for invalid in (dict(audit_mode="partial"), dict(audit_format="xml"),
+                        dict(audit_sample_rate=0), dict(audit_shards=0)):
+            with self.assertRaises(ValueError):
+                DatabaseConfig(**invalid)
 
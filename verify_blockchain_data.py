@@ -6,11 +6,11 @@
 
 import sys
 import os
-import json
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.amdb import Database
+from testdata import loads
 
 def verify_data(data_dir: str = "./data/blockchain_test"):
     """验证区块链测试数据"""
@@ -38,7 +38,7 @@ def verify_data(data_dir: str = "./data/blockchain_test"):
         block_key = f"block:{block_num:08d}".encode()
         block_value = db.get(block_key)
         if block_value:
-            block_data = json.loads(block_value.decode())
+            block_data = loads(block_value)
             print(f"   ✓ 区块 #{block_data['block_number']}: {block_data['hash'][:16]}... "
                   f"(交易数: {block_data['transaction_count']})")
         else:
@@ -51,14 +51,14 @@ def verify_data(data_dir: str = "./data/blockchain_test"):
     block_key = b"block:00000001"
     block_value = db.get(block_key)
     if block_value:
-        block_data = json.loads(block_value.decode())
+        block_data = loads(block_value)
         transactions = block_data.get('transactions', [])
         if transactions:
             for i, tx_hash in enumerate(transactions[:3]):  # 只查询前3个
                 tx_key = f"transaction:{tx_hash}".encode()
                 tx_value = db.get(tx_key)
                 if tx_value:
-                    tx_data = json.loads(tx_value.decode())
+                    tx_data = loads(tx_value)
                     print(f"   ✓ 交易 {i+1}: {tx_data['hash'][:16]}... "
                           f"({tx_data['from'][:10]}... -> {tx_data['to'][:10]}..., "
                           f"金额: {tx_data['value']})")
@@ -74,19 +74,19 @@ def verify_data(data_dir: str = "./data/blockchain_test"):
     # 尝试查询账户（从交易中获取地址）
     print("3. 查询账户数据:")
     if block_value:
-        block_data = json.loads(block_value.decode())
+        block_data = loads(block_value)
         transactions = block_data.get('transactions', [])
         if transactions:
             tx_hash = transactions[0]
             tx_key = f"transaction:{tx_hash}".encode()
             tx_value = db.get(tx_key)
             if tx_value:
-                tx_data = json.loads(tx_value.decode())
+                tx_data = loads(tx_value)
                 # 查询发送方账户
                 account_key = f"account:{tx_data['from']}".encode()
                 account_value = db.get(account_key)
                 if account_value:
-                    account_data = json.loads(account_value.decode())
+                    account_data = loads(account_value)
                     print(f"   ✓ 账户: {account_data['address'][:20]}... "
                           f"(余额: {account_data['balance']}, "
                           f"类型: {account_data['type']}, "